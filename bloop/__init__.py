@@ -1,4 +1,4 @@
-from .conditions import Condition
+from .conditions import Condition, param
 from .engine import Engine
 from .exceptions import (
     BloopException,
@@ -7,9 +7,10 @@ from .exceptions import (
     RecordsExpired,
     ShardIteratorExpired,
     TableMismatch,
+    UnprocessedObjects,
 )
 from .models import BaseModel, Column, GlobalSecondaryIndex, LocalSecondaryIndex
-from .search import QueryIterator, ScanIterator
+from .search import ParallelScanIterator, QueryIterator, ScanIterator
 from .signals import (
     before_create_table,
     model_bound,
@@ -42,7 +43,7 @@ __all__ = [
 
     # Exceptions
     "BloopException", "ConstraintViolation", "MissingObjects",
-    "RecordsExpired", "ShardIteratorExpired", "TableMismatch",
+    "RecordsExpired", "ShardIteratorExpired", "TableMismatch", "UnprocessedObjects",
 
     # Signals
     "before_create_table", "model_bound", "model_created", "model_validated",
@@ -52,6 +53,6 @@ __all__ = [
     "UUID", "Binary", "Boolean", "DateTime", "Integer", "List", "Map", "Number", "Set", "String",
 
     # Misc
-    "Condition", "QueryIterator", "ScanIterator", "Stream"
+    "Condition", "ParallelScanIterator", "QueryIterator", "ScanIterator", "Stream", "param"
 ]
 __version__ = "1.1.0"
@@ -1,19 +1,19 @@
 # http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/ \
 #   Expressions.SpecifyingConditions.html#ConditionExpressionReference.Syntax
 import collections
+import weakref
 
 from .exceptions import InvalidCondition
 from .signals import (
     object_deleted,
     object_loaded,
-    object_modified,
     object_saved,
 )
-from .types import supports_operation
-from .util import WeakDefaultDictionary, missing
+from .types import LIST, MAP, supports_operation
+from .util import missing
 
 
-__all__ = ["Condition", "render"]
+__all__ = ["Condition", "Param", "param", "render"]
 
 
 comparison_aliases = {
@@ -30,28 +30,22 @@ comparisons = list(comparison_aliases.keys())
 # CONDITION TRACKING ============================================================================== CONDITION TRACKING
 
 
-# Tracks the state of instances of models:
-# 1) Are any columns marked for including in an update?
-# 2) Latest snapshot for atomic operations
-_obj_tracking = WeakDefaultDictionary(lambda: {"marked": set(), "snapshot": None})
+# Tracks the state of instances of models, outside the instances so copies and pickles don't carry it:
+# 1) Are any columns marked for including in an update?  See mark()
+# 2) Latest snapshot for atomic operations.  See sync()
+_obj_marked = weakref.WeakKeyDictionary()
+_obj_snapshots = weakref.WeakKeyDictionary()
+_NOT_MARKED = frozenset()
 
 
 @object_deleted.connect
 def on_object_deleted(_, *, obj, **kwargs):
-    _obj_tracking[obj].pop("snapshot", None)
+    _obj_snapshots.pop(obj, None)
 
 
 @object_loaded.connect
-def on_object_loaded(_, *, engine, obj, **kwargs):
-    sync(obj, engine)
-
-
-@object_modified.connect
-def on_object_modified(_, *, obj, column, **kwargs):
-    # Mark a column for a given object as being modified in any way.
-    # Any marked columns will be pushed (possibly as DELETES) in
-    # future UpdateItem calls that include the object.
-    _obj_tracking[obj]["marked"].add(column)
+def on_object_loaded(_, *, engine, obj, attrs=None, **kwargs):
+    sync(obj, engine, attrs=attrs)
 
 
 @object_saved.connect
@@ -59,42 +53,143 @@ def on_object_saved(_, *, engine, obj, **kwargs):
     sync(obj, engine)
 
 
-def sync(obj, engine):
+def sync(obj, engine, attrs=None):
     """Mark the object as having been persisted at least once.
 
-    Store the latest snapshot of all marked values."""
-    snapshot = Condition()
+    Store the latest snapshot of all marked values, as (marked columns, {dynamo_name: dumped value}).
+    When the item's attrs are available (they were just loaded) they're kept as-is, so nothing is dumped.
+    The snapshot's condition is only built when an atomic operation asks for it; see get_snapshot."""
     # Only expect values (or lack of a value) for columns that have been explicitly set
-    for column in sorted(_obj_tracking[obj]["marked"], key=lambda col: col.dynamo_name):
-        value = getattr(obj, column.model_name, None)
-        value = engine._dump(column.typedef, value)
-        condition = column == value
-        # The renderer shouldn't try to dump the value again.
+    marked = frozenset(_obj_marked.get(obj, _NOT_MARKED))
+    if attrs is None:
         # We're dumping immediately in case the value is mutable,
         # such as a set or (many) custom data types.
-        condition.dumped = True
-        snapshot &= condition
-    _obj_tracking[obj]["snapshot"] = snapshot
+        attrs = {
+            column.dynamo_name: engine._dump_value(column, getattr(obj, column.model_name, None))
+            for column in marked}
+    _obj_snapshots[obj] = (marked, attrs)
 
 
 def get_snapshot(obj):
-    # Cached value
-    snapshot = _obj_tracking[obj].get("snapshot", None)
-    if snapshot is not None:
-        return snapshot
+    """Returns a condition that expects the values of the object's last sync.
+
+    If the object has never been synced, the condition expects every column to be empty.
+    When the model has a ``version_column``, the condition only expects that column's value."""
+    snapshot = _obj_snapshots.get(obj, None)
+    if snapshot is None:
+        columns, attrs = obj.Meta.columns, {}
+    else:
+        columns, attrs = snapshot
+    version_column = obj.Meta.version_column
+    if version_column is not None:
+        if snapshot is not None and version_column not in columns:
+            raise InvalidCondition(missing_version_message(obj))
+        columns = (version_column,)
+    condition = Condition()
+    for column in sorted(columns, key=lambda col: col.dynamo_name):
+        comparison = column.is_(attrs.get(column.dynamo_name, None))
+        # The renderer shouldn't try to dump the value again.
+        comparison.dumped = True
+        condition &= comparison
+    return condition
+
+
+def get_synced(obj):
+    """Returns the dumped value of each column from the object's last sync, or None if it was never synced"""
+    snapshot = _obj_snapshots.get(obj, None)
+    if snapshot is None:
+        return None
+    columns, attrs = snapshot
+    return {column: attrs.get(column.dynamo_name, None) for column in columns}
+
+
+def get_synced_version(obj, engine):
+    """Returns the version of the object's last sync, which an atomic save or update increments.
+
+    An object that was never synced uses its local version, or 0 if it doesn't have one."""
+    version_column = obj.Meta.version_column
+    snapshot = _obj_snapshots.get(obj, None)
+    if snapshot is None:
+        return getattr(obj, version_column.model_name, None) or 0
+    columns, attrs = snapshot
+    if version_column not in columns:
+        raise InvalidCondition(missing_version_message(obj))
+    return engine._load(version_column.typedef, attrs.get(version_column.dynamo_name, None)) or 0
 
-    # If the object has never been synced, create and cache
-    # a condition that expects every column to be empty
-    snapshot = Condition()
-    for column in sorted(obj.Meta.columns, key=lambda col: col.dynamo_name):
-        snapshot &= column.is_(None)
-    _obj_tracking[obj]["snapshot"] = snapshot
-    return snapshot
+
+def missing_version_message(obj):
+    return "The version column of {!r} wasn't loaded, so it can't be used in an atomic operation.".format(obj)
+
+
+def same_value(dumped, other):
+    """True if two dumped values are equal.  Sets are compared without their order."""
+    if dumped == other:
+        return True
+    if not isinstance(dumped, dict) or not isinstance(other, dict):
+        return False
+    if len(dumped) != 1 or dumped.keys() != other.keys():
+        return False
+    backing_type, = dumped.keys()
+    if backing_type not in ("SS", "NS", "BS"):
+        return False
+    return set(dumped[backing_type]) == set(other[backing_type])
+
+
+def merge_synced(obj, columns, attrs):
+    """Update the last sync with new values for some columns, from attrs in DynamoDB's wire format.
+
+    Used after an UpdateItem that only returned the updated attributes.  Columns that aren't in attrs
+    no longer have a value."""
+    synced_columns, synced = _obj_snapshots.get(obj, None) or (_NOT_MARKED, {})
+    synced = dict(synced)
+    for column in columns:
+        synced[column.dynamo_name] = attrs.get(column.dynamo_name, None)
+    _obj_snapshots[obj] = (synced_columns.union(columns), synced)
+
+
+def diff_paths(synced, dumped, path=None):
+    """Yields (path, dumped value) for each part of a dumped value that doesn't match the synced value.
+
+    Maps are compared key by key, and Lists of the same length are compared index by index, so changing one
+    field of a large document only yields the path to that field.  A removed field yields its path and None."""
+    path = path or []
+    if same_value(dumped, synced):
+        return
+    synced_type, dumped_type = backing_type_of(synced), backing_type_of(dumped)
+    if synced_type == dumped_type == MAP:
+        synced, dumped = synced[MAP], dumped[MAP]
+        for key in sorted(set(synced) | set(dumped)):
+            yield from diff_paths(synced.get(key, None), dumped.get(key, None), path + [key])
+    elif synced_type == dumped_type == LIST and len(synced[LIST]) == len(dumped[LIST]):
+        for index, (synced_value, dumped_value) in enumerate(zip(synced[LIST], dumped[LIST])):
+            yield from diff_paths(synced_value, dumped_value, path + [index])
+    else:
+        yield path, dumped
+
+
+def backing_type_of(dumped):
+    """backing_type_of({"M": {...}}) -> "M" """
+    if isinstance(dumped, dict) and len(dumped) == 1:
+        return next(iter(dumped))
+    return None
 
 
 def get_marked(obj):
     """Returns the set of marked columns for an object"""
-    return set(_obj_tracking[obj]["marked"])
+    return set(_obj_marked.get(obj, _NOT_MARKED))
+
+
+def mark(obj, columns):
+    """Marks columns for an object as modified in any way.
+
+    Any marked columns will be pushed (possibly as DELETES) in future UpdateItem calls that include the object.
+    Marks are kept by object identity, so a copy of the object starts without any marks or snapshot.
+    Each object's marks are a set that's updated in place."""
+    marked = _obj_marked.get(obj, None)
+    if marked is None:
+        _obj_marked[obj] = set(columns)
+    else:
+        marked.update(columns)
 
 
 # END CONDITION TRACKING ====================================================================== END CONDITION TRACKING
@@ -105,6 +200,68 @@ def get_marked(obj):
 
 Reference = collections.namedtuple("Reference", ["name", "type", "value"])
 
+# Rendered expressions and names for each structure of filter, projection, key, and condition.
+# See ConditionRenderer.render_structure
+RenderedStructure = collections.namedtuple("RenderedStructure", ["expressions", "refs", "value_refs"])
+# The least recently used structure is evicted when the cache is full.
+_render_cache = collections.OrderedDict()
+_RENDER_CACHE_SIZE = 1024
+
+
+def dump_column_value(engine, column, value, *, inner=False):
+    """Dump a value through the typedef of a column, or of the path into a column.
+
+    inner=True uses column.typedef.inner_type instead of column.typedef"""
+    if not inner and not path_of(column):
+        return engine._dump_value(column, value)
+    typedef = column.typedef
+    for segment in path_of(column):
+        typedef = typedef[segment]
+    if inner:
+        typedef = typedef.inner_typedef
+    return engine._dump(typedef, value)
+
+
+class Param:
+    """A named placeholder for a value that's provided each time a prepared query runs.
+
+    Rendering a condition binds the placeholder to the column (and path) it's compared against, so the value
+    can be dumped later without rendering the condition again.  Create these with :func:`~bloop.conditions.param`.
+
+    :param str name: The keyword this value is passed as to
+        :func:`PreparedQuery.execute <bloop.search.PreparedQuery.execute>`.
+    """
+    def __init__(self, name, *, column=None, inner=False):
+        self.name = name
+        self.column = column
+        self.inner = inner
+
+    def __repr__(self):
+        return "<Param[{}]>".format(self.name)
+
+    def bind(self, column, *, inner=False):
+        """Returns a new placeholder with the same name, bound to the column its value is dumped through"""
+        return Param(self.name, column=column, inner=inner)
+
+    def dump(self, engine, value):
+        if self.column is None:
+            raise InvalidCondition("{!r} isn't bound to a column.".format(self))
+        return dump_column_value(engine, self.column, value, inner=self.inner)
+
+
+def param(name):
+    """A placeholder for a condition's value, provided later to a prepared query.
+
+    .. code-block:: python
+
+        >>> query = engine.prepare_query(User.by_email, key=User.email == param("email"))
+        >>> user = query.execute(email="user@domain.com").one()
+
+    :param str name: The keyword the value is passed as when the query is executed.
+    :rtype: :class:`~bloop.conditions.Param`
+    """
+    return Param(name)
+
 
 def is_empty(ref):
     """True if ref is a value ref with None value"""
@@ -119,8 +276,10 @@ class ReferenceTracker:
 
     :param engine: Used to dump column values for value refs.
     :type engine: :class:`~bloop.engine.Engine`
+    :param bool params: *(Optional)* Allow :class:`~bloop.conditions.Param` placeholders as values.  Only
+        prepared queries substitute their values before the request is sent.  Default is False.
     """
-    def __init__(self, engine):
+    def __init__(self, engine, *, params=False):
         self.__next_index = 0
         self.counts = collections.defaultdict(lambda: 0)
         self.attr_values = {}
@@ -128,6 +287,10 @@ class ReferenceTracker:
         # Index ref -> attr name for de-duplication
         self.name_attr_index = {}
         self.engine = engine
+        self.params = params
+        # (id(column), id(value), inner) -> dumped value, while rendering values that were already dumped.
+        # See ConditionRenderer.render_structure
+        self._dumped = None
 
     @property
     def next_index(self):
@@ -162,19 +325,26 @@ class ReferenceTracker:
                 str_pieces.append(self._name_ref(piece))
         return ".".join(str_pieces)
 
+    def _dump(self, column, value, *, dumped=False, inner=False):
+        """inner=True uses column.typedef.inner_type instead of column.typedef"""
+        if dumped:
+            return value
+        if self._dumped is not None:
+            try:
+                return self._dumped[(id(column), id(value), inner)]
+            except KeyError:
+                pass
+        if isinstance(value, Param):
+            if not self.params:
+                raise InvalidCondition("{!r} can only be used in a prepared query.".format(value))
+            # Dumped when the prepared query runs; see PreparedQuery.execute
+            return value.bind(column, inner=inner)
+        return dump_column_value(self.engine, column, value, inner=inner)
+
     def _value_ref(self, column, value, *, dumped=False, inner=False):
         """inner=True uses column.typedef.inner_type instead of column.typedef"""
         ref = ":v{}".format(self.next_index)
-
-        # Need to dump this value
-        if not dumped:
-            typedef = column.typedef
-            for segment in path_of(column):
-                typedef = typedef[segment]
-            if inner:
-                typedef = typedef.inner_typedef
-            value = self.engine._dump(typedef, value)
-
+        value = self._dump(column, value, dumped=dumped, inner=inner)
         self.attr_values[ref] = value
         self.counts[ref] += 1
         return ref, value
@@ -225,6 +395,17 @@ class ReferenceTracker:
             ref_type = "value"
         return Reference(name=name, type=ref_type, value=value)
 
+    def _save(self):
+        """The names and counters, to restore into a new tracker with :func:`_restore`"""
+        return (self.__next_index, dict(self.counts), dict(self.attr_names), dict(self.name_attr_index))
+
+    def _restore(self, saved):
+        next_index, counts, attr_names, name_attr_index = saved
+        self.__next_index = next_index
+        self.counts.update(counts)
+        self.attr_names.update(attr_names)
+        self.name_attr_index.update(name_attr_index)
+
     def pop_refs(self, *refs):
         """Decrement the usage of each ref by 1.
 
@@ -251,11 +432,12 @@ class ReferenceTracker:
                     del self.name_attr_index[path_segment]
 
 
-def render(engine, obj=None, filter=None, projection=None, key=None, atomic=None, condition=None, update=None):
-    renderer = ConditionRenderer(engine)
+def render(engine, obj=None, filter=None, projection=None, key=None, atomic=None, condition=None, update=None,
+           diff=False, actions=None, params=False):
+    renderer = ConditionRenderer(engine, params=params)
     renderer.render(
         obj=obj, condition=condition,
-        atomic=atomic, update=update,
+        atomic=atomic, update=update, diff=diff, actions=actions,
         filter=filter, projection=projection, key=key,
     )
     return renderer.rendered
@@ -288,13 +470,16 @@ class ConditionRenderer:
 
     :param engine: Used to dump values in conditions into the appropriate wire format.
     :type engine: :class:`~bloop.engine.Engine`
+    :param bool params: *(Optional)* Allow :class:`~bloop.conditions.Param` placeholders in conditions.
+        Default is False.
     """
-    def __init__(self, engine):
-        self.refs = ReferenceTracker(engine)
+    def __init__(self, engine, *, params=False):
+        self.refs = ReferenceTracker(engine, params=params)
         self.engine = engine
         self.expressions = {}
 
-    def render(self, obj=None, condition=None, atomic=False, update=False, filter=None, projection=None, key=None):
+    def render(self, obj=None, condition=None, atomic=False, update=False, filter=None, projection=None, key=None,
+               diff=False, actions=None):
         """Main entry point for rendering multiple expressions.  All parameters are optional, except obj when
         atomic or update are True.
 
@@ -315,10 +500,73 @@ class ConditionRenderer:
         :type projection: set :class:`~bloop.models.Column`
         :param key: *(Optional)* A key condition for queries, rendered as a "KeyConditionExpression".  Default is None.
         :type key: :class:`~bloop.conditions.BaseCondition`
+        :param bool diff: *(Optional)* True if the "UpdateExpression" should only include columns whose values changed
+            since the object was last loaded or saved.  Default is False.
+        :param actions: *(Optional)* A list of :class:`~bloop.conditions.Action` rendered as an "UpdateExpression"
+            for ``obj``.  Can't be used with update.  Default is None.
+        :raises bloop.exceptions.InvalidCondition: if both update and actions are given.
         """
-        if (atomic or update) and not obj:
+        if (atomic or update or actions) and not obj:
             raise InvalidCondition("An object is required to render atomic conditions or updates without an object.")
+        if update and actions:
+            raise InvalidCondition("Render either the object's update or actions, not both.")
+
+        # Condition requires a bit of work, because either one can be empty/false
+        condition = (condition or Condition()) & (get_snapshot(obj) if atomic else Condition())
+        self.render_structure(filter=filter, projection=projection, key=key, condition=condition)
+
+        if update:
+            self.render_update_expression(obj, diff=diff, atomic=atomic)
+        elif actions:
+            self.render_update_actions(obj, actions, atomic=atomic)
+
+    def render_structure(self, filter=None, projection=None, key=None, condition=None):
+        """Render the filter, projection, key, and condition expressions.
 
+        The expressions and names only depend on the structure of the conditions: their operations, the columns
+        and paths they use, and which values are empty.  The first render of a structure is cached, and later
+        renders of the same structure only dump the new values into the cached value refs.  When a structure isn't
+        cached, it's rendered with the values that were dumped to find its structure.
+        """
+        if self.expressions or self.refs.counts:
+            # Cached refs start from an empty renderer
+            self._render_structure(filter, projection, key, condition)
+            return
+        values, dumped = [], {}
+        structure = (
+            self._structure_of(filter, values, dumped),
+            tuple(proxied(column).dynamo_name for column in projection or ()),
+            self._structure_of(key, values, dumped),
+            self._structure_of(condition, values, dumped))
+        cached = _render_cache.get(structure, None)
+        if cached is None:
+            self.refs._dumped = dumped
+            try:
+                self._render_structure(filter, projection, key, condition)
+            finally:
+                self.refs._dumped = None
+            # Value refs are numbered in the order they're rendered, which is the order of the values above
+            value_refs = sorted(self.refs.attr_values, key=lambda ref: int(ref[2:]))
+            _render_cache[structure] = RenderedStructure(
+                expressions=dict(self.expressions), refs=self.refs._save(), value_refs=value_refs)
+            while len(_render_cache) > _RENDER_CACHE_SIZE:
+                try:
+                    _render_cache.popitem(last=False)
+                except KeyError:  # pragma: no cover
+                    # Another thread emptied the cache
+                    break
+            return
+        try:
+            _render_cache.move_to_end(structure)
+        except KeyError:  # pragma: no cover
+            # Another thread evicted it
+            pass
+        self.expressions.update(cached.expressions)
+        self.refs._restore(cached.refs)
+        for ref, value in zip(cached.value_refs, values):
+            self.refs.attr_values[ref] = value
+
+    def _render_structure(self, filter, projection, key, condition):
         if filter:
             self.render_filter_expression(filter)
 
@@ -328,13 +576,35 @@ class ConditionRenderer:
         if key:
             self.render_key_expression(key)
 
-        # Condition requires a bit of work, because either one can be empty/false
-        condition = (condition or Condition()) & (get_snapshot(obj) if atomic else Condition())
         if condition:
             self.render_condition_expression(condition)
 
-        if update:
-            self.render_update_expression(obj)
+    def _structure_of(self, condition, values, dumped):
+        """Returns the structure of a condition, and appends its non-empty dumped values in the order they render.
+
+        Each dumped value is also kept in ``dumped`` by the column and value it was dumped from."""
+        if not condition:
+            return None
+        operation = condition.operation
+        if operation in ("and", "or", "not"):
+            return (operation, tuple(self._structure_of(value, values, dumped) for value in condition.values))
+        column = condition.column
+        value_structures = []
+        for value in condition.values:
+            if isinstance(value, ComparisonMixin):
+                value_structures.append((proxied(value).dynamo_name, tuple(path_of(value))))
+                continue
+            inner = operation == "contains"
+            dumped_value = self.refs._dump(column, value, dumped=condition.dumped, inner=inner)
+            if not condition.dumped:
+                dumped[(id(column), id(value), inner)] = dumped_value
+            value = dumped_value
+            if value is None:
+                value_structures.append(None)
+            else:
+                values.append(value)
+                value_structures.append(True)
+        return (operation, proxied(column).dynamo_name, tuple(path_of(column)), tuple(value_structures))
 
     def render_condition_expression(self, condition):
         self.expressions["ConditionExpression"] = condition.render(self)
@@ -356,29 +626,80 @@ class ConditionRenderer:
             ref_names.append(ref.name)
         self.expressions["ProjectionExpression"] = ", ".join(ref_names)
 
-    def render_update_expression(self, obj):
+    def render_update_expression(self, obj, diff=False, atomic=False):
+        """Render an "UpdateExpression" that sets or removes each marked column.
+
+        With ``atomic``, the model's version column is set to one more than the object's version.  Otherwise it's
+        sent like any other column.
+        """
         updates = {
             "set": [],
-            "remove": []}
+            "remove": [],
+            "add": []}
+        # Without a diff, every marked column is sent.  Columns that weren't part of
+        # the last sync are always sent, since their value in DynamoDB isn't known.
+        synced = (get_synced(obj) or {}) if diff else {}
+        # Atomic saves increment the version column, below
+        version_column = obj.Meta.version_column if atomic else None
         for column in sorted(
                 # Don't include key columns in an UpdateExpression
-                filter(lambda c: c not in obj.Meta.keys, get_marked(obj)),
+                filter(lambda c: c not in obj.Meta.keys and c is not version_column, get_marked(obj)),
                 key=lambda c: c.dynamo_name):
-            name_ref = self.refs.any_ref(column=column)
-            value_ref = self.refs.any_ref(column=column, value=getattr(obj, column.model_name, None))
-            # Can't set to an empty value
-            if is_empty(value_ref):
-                self.refs.pop_refs(value_ref)
-                updates["remove"].append(name_ref.name)
-            # Setting this column to a value, or to another column's value
+            value = getattr(obj, column.model_name, None)
+            if column in synced and not isinstance(value, ComparisonMixin):
+                value = self.engine._dump_value(column, value)
+                # Only the changed parts of a Map or List are sent, by path
+                for path, changed in diff_paths(synced[column], value):
+                    self._render_update(updates, Proxy(column, path) if path else column, changed, dumped=True)
             else:
-                updates["set"].append("{}={}".format(name_ref.name, value_ref.name))
+                self._render_update(updates, column, value, dumped=False)
+
+        # A diff without any changes doesn't write, so the version stays the same
+        if version_column is not None and (updates["set"] or updates["remove"] or not diff):
+            updates["set"].append(self._version_update(obj, version_column))
+        self._render_updates(updates)
+
+    def _render_update(self, updates, column, value, dumped):
+        name_ref = self.refs.any_ref(column=column)
+        value_ref = self.refs.any_ref(column=column, value=value, dumped=dumped)
+        # Can't set to an empty value
+        if is_empty(value_ref):
+            self.refs.pop_refs(value_ref)
+            updates["remove"].append(name_ref.name)
+        # Setting this column to a value, or to another column's value
+        else:
+            updates["set"].append("{}={}".format(name_ref.name, value_ref.name))
 
+    def render_update_actions(self, obj, actions, atomic=False):
+        """Render an "UpdateExpression" that applies each :class:`~bloop.conditions.Action` in DynamoDB.
+
+        With ``atomic``, the model's version column is also set to one more than the object's synced version.
+        """
+        updates = {
+            "set": [],
+            "add": [],
+            "delete": []}
+        for action in actions:
+            clause, expression = action.render(self)
+            updates[clause].append(expression)
+        version_column = obj.Meta.version_column
+        if atomic and version_column is not None and all(action.column is not version_column for action in actions):
+            updates["set"].append(self._version_update(obj, version_column))
+        self._render_updates(updates)
+
+    def _version_update(self, obj, version_column):
+        # SET instead of ADD, so a new object's first version matches the object after it's saved.  The atomic
+        # condition expects the last synced version, so this increments that version and not the local one.
+        version = get_synced_version(obj, self.engine)
+        name_ref = self.refs.any_ref(column=version_column)
+        value_ref = self.refs.any_ref(column=version_column, value=version + 1)
+        return "{}={}".format(name_ref.name, value_ref.name)
+
+    def _render_updates(self, updates):
         expression = ""
-        if updates["set"]:
-            expression += "SET " + ", ".join(updates["set"])
-        if updates["remove"]:
-            expression += " REMOVE " + ", ".join(updates["remove"])
+        for clause in ("set", "remove", "add", "delete"):
+            if updates.get(clause):
+                expression += " {} {}".format(clause.upper(), ", ".join(updates[clause]))
         if expression:
             self.expressions["UpdateExpression"] = expression.strip()
 
@@ -796,13 +1117,56 @@ class InCondition(BaseCondition):
 # END CONDITIONS ====================================================================================== END CONDITIONS
 
 
+# UPDATE ACTIONS ====================================================================================== UPDATE ACTIONS
+
+
+class Action:
+    """An update applied in DynamoDB without loading the item first.  Created from a column:
+
+    .. code-block:: python
+
+        Post.views.add(1)           # ADD #n0 :v1
+        Post.tags.add({"new"})      # ADD #n0 :v1
+        Post.tags.discard({"old"})  # DELETE #n0 :v1
+        Post.history.append([1])    # SET #n0=list_append(if_not_exists(#n0, :v2), :v1)
+
+    See :func:`Engine.update <bloop.engine.Engine.update>`.
+    """
+    def __init__(self, operation, column, value):
+        self.operation = operation
+        self.column = column
+        self.value = value
+
+    def __repr__(self):
+        return "<Action[{}.{}.{}({!r})]>".format(
+            self.column.model.__name__, self.column.model_name, self.operation, self.value)
+
+    def render(self, renderer):
+        """Returns the (clause, expression) for this action, where clause is one of "set", "add", "delete" """
+        name_ref = renderer.refs.any_ref(column=self.column)
+        value_ref = renderer.refs.any_ref(column=self.column, value=self.value)
+        if is_empty(value_ref):
+            renderer.refs.pop_refs(name_ref, value_ref)
+            raise InvalidCondition("Action <{!r}> has no value to apply.".format(self))
+        if self.operation == "append":
+            # list_append fails when the attribute doesn't exist yet, so start from an empty list
+            empty_ref = renderer.refs.any_ref(column=self.column, value={"L": []}, dumped=True)
+            return "set", "{0}=list_append(if_not_exists({0}, {2}), {1})".format(
+                name_ref.name, value_ref.name, empty_ref.name)
+        clause = "add" if self.operation == "add" else "delete"
+        return clause, "{} {}".format(name_ref.name, value_ref.name)
+
+
+# END UPDATE ACTIONS ============================================================================== END UPDATE ACTIONS
+
+
 def check_support(column, operation):
     # TODO parametrize tests for (all condition types) X (all backing types)
     typedef = column.typedef
     for segment in path_of(column):
         typedef = typedef[segment]
     if not supports_operation(operation, typedef):
-        tpl = "Backing type {!r} for {}.{} does not support condition {!r}."
+        tpl = "Backing type {!r} for {}.{} does not support {!r}."
         raise InvalidCondition(tpl.format(
             column.typedef.backing_type,
             column.model.__name__,
@@ -1,16 +1,20 @@
+import collections
+
 import declare
 
-from .conditions import render
+from .conditions import Action, get_synced, get_synced_version, mark, merge_synced, render
 from .exceptions import (
+    InvalidCondition,
     InvalidModel,
     InvalidStream,
     MissingKey,
     MissingObjects,
     UnboundModel,
     UnknownType,
+    UnprocessedObjects,
 )
-from .models import Index, ModelMetaclass
-from .search import Search
+from .models import Column, Index, ModelMetaclass
+from .search import PreparedQuery, Search
 from .session import SessionWrapper
 from .signals import (
     before_create_table,
@@ -18,10 +22,13 @@ from .signals import (
     model_validated,
     object_deleted,
     object_loaded,
+    object_modified,
     object_saved,
 )
 from .stream import Stream
-from .util import missing, unpack_from_dynamodb, walk_subclasses
+from .stream.checkpoint import Checkpoint, CheckpointStore
+from .stream.lease import ConsumerGroup
+from .util import missing, walk_subclasses
 
 
 __all__ = ["Engine"]
@@ -42,12 +49,39 @@ def extract_key(key_shape, item):
     return {field: item[field] for field in key_shape}
 
 
+def find_unprocessed(engine, objs, unprocessed):
+    """Returns the objects whose requests are in the "UnprocessedItems" of :func:`SessionWrapper.write_items`"""
+    if not unprocessed:
+        return set()
+    table_index, object_index = {}, {}
+    for obj in objs:
+        table_name = obj.Meta.table_name
+        key = dump_key(engine, obj)
+        table_index.setdefault(table_name, list(sorted(key.keys())))
+        object_index.setdefault(table_name, {}).setdefault(index_for(key), set()).add(obj)
+
+    not_processed = set()
+    for table_name, table_requests in unprocessed.items():
+        key_shape = table_index[table_name]
+        for write_request in table_requests:
+            if "PutRequest" in write_request:
+                attrs = write_request["PutRequest"]["Item"]
+            else:
+                attrs = write_request["DeleteRequest"]["Key"]
+            index = index_for(extract_key(key_shape, attrs))
+            not_processed.update(object_index[table_name].get(index, ()))
+    return not_processed
+
+
 def dump_key(engine, obj):
     """dump the hash (and range, if there is one) key(s) of an object into
     a dynamo-friendly format.
 
     returns {dynamo_name: {type: value} for dynamo_name in hash/range keys}
     """
+    dumper = engine._dumpers.get(obj.__class__, None)
+    if dumper is not None:
+        return dumper.key(obj)
     key = {}
     for key_column in obj.Meta.keys:
         key_value = getattr(obj, key_column.model_name, missing)
@@ -61,6 +95,107 @@ def dump_key(engine, obj):
     return key
 
 
+def compile_loader(engine, model, expected):
+    """Build a function that loads an attr dict into an object of the model, for just the expected columns.
+
+    Each column's type is resolved once, and values are set without going through
+    :data:`~bloop.signals.object_modified` unless something is connected to it.  ``load.as_dict`` uses the same
+    types to load the values into a dict keyed by model name, without creating an object.
+
+    .. code-block:: python
+
+        load = compile_loader(engine, User, User.Meta.columns)
+        user = load(attrs)
+        load(attrs, obj=user)
+        values = load.as_dict(attrs)
+    """
+    context = {"engine": engine}
+    # (column, dynamo_name, load, set) for each column
+    plan = []
+    for column in sorted(expected, key=lambda c: c.dynamo_name):
+        # Columns that override set still get it called, along with the signal
+        if type(column).set is Column.set:
+            set_value = declare.Field.set
+        else:
+            set_value = type(column).set
+        plan.append((column, column.dynamo_name, column.typedef._load, set_value))
+    columns = frozenset(expected)
+    # Columns that override set send object_modified themselves through Column.set
+    signaled = [column for column, *_, set_value in plan if set_value is declare.Field.set]
+
+    def load(attrs, obj=None):
+        if obj is None:
+            obj = model.Meta.init()
+        for column, dynamo_name, load_value, set_value in plan:
+            set_value(column, obj, load_value(attrs.get(dynamo_name, None), context=context))
+        mark(obj, columns)
+        if object_modified.receivers:
+            for column in signaled:
+                object_modified.send(column, obj=obj, column=column, value=getattr(obj, column.model_name))
+        return obj
+
+    def as_dict(attrs):
+        return {
+            column.model_name: load_value(attrs.get(dynamo_name, None), context=context)
+            for column, dynamo_name, load_value, _ in plan}
+    load.as_dict = as_dict
+    return load
+
+
+Dumper = collections.namedtuple("Dumper", ["item", "key", "values"])
+Dumper.__doc__ = """The compiled dump functions for a model.  See :func:`~bloop.engine.compile_dumper`."""
+
+
+def compile_dumper(engine, model):
+    """Build the functions that dump an object of the model, its key, and its column values.
+
+    Each column's type is resolved once, and every call shares one context instead of
+    building a new one and dispatching through the engine's type engine.
+
+    .. code-block:: python
+
+        dumper = compile_dumper(engine, User)
+        item = dumper.item(user)
+        key = dumper.key(user)
+        value = dumper.values[User.email]("user@domain.com")
+    """
+    context = {"engine": engine}
+
+    def dump_value(typedef):
+        typedef_dump = typedef._dump
+
+        def dump(value):
+            return typedef_dump(value, context=context)
+        return dump
+
+    values = {column: dump_value(column.typedef) for column in model.Meta.columns}
+    # (model_name, dynamo_name, dump) for each column
+    item_plan = [(column.model_name, column.dynamo_name, values[column]) for column in model.Meta.columns]
+    key_plan = [(column, column.model_name, column.dynamo_name, values[column]) for column in model.Meta.keys]
+
+    def dump_item(obj):
+        if obj is None:
+            return None
+        item = {}
+        for model_name, dynamo_name, dump in item_plan:
+            value = dump(getattr(obj, model_name, None))
+            if value is not None:
+                item[dynamo_name] = value
+        return item or None
+
+    def dump_key(obj):
+        key = {}
+        for key_column, model_name, dynamo_name, dump in key_plan:
+            key_value = getattr(obj, model_name, missing)
+            if key_value is missing:
+                raise MissingKey("{!r} is missing {}: {!r}".format(
+                    obj, "hash_key" if key_column.hash_key else "range_key", model_name
+                ))
+            key[dynamo_name] = dump(key_value)
+        return key
+    return Dumper(item=dump_item, key=dump_key, values=values)
+
+
 def validate_not_abstract(*objs):
     for obj in objs:
         if obj.Meta.abstract:
@@ -68,6 +203,11 @@ def validate_not_abstract(*objs):
             raise InvalidModel("{!r} is abstract.".format(cls.__name__))
 
 
+def validate_unconditional(condition, atomic):
+    if condition or atomic:
+        raise InvalidCondition("Batched operations can't use a condition or atomic.")
+
+
 def validate_is_model(model):
     if not isinstance(model, ModelMetaclass):
         cls = model if isinstance(model, type) else model.__class__
@@ -96,6 +236,10 @@ class Engine:
         # won't have the same TypeDefinitions
         self.type_engine = declare.TypeEngine.unique()
         self.session = SessionWrapper(dynamodb=dynamodb, dynamodbstreams=dynamodbstreams)
+        # (model, frozenset of columns) -> compiled loader
+        self._loaders = {}
+        # model -> compiled dumper
+        self._dumpers = {}
 
     def _dump(self, model, obj, context=None, **kwargs):
         context = context or {"engine": self}
@@ -111,6 +255,22 @@ class Engine:
         except declare.DeclareException as from_declare:
             fail_unknown(model, from_declare)
 
+    def _dump_value(self, column, value):
+        """Dump a value for a column, using the model's compiled dumper when it's bound."""
+        dumper = self._dumpers.get(column.model, None)
+        dump = dumper.values.get(column, None) if dumper is not None else None
+        if dump is None:
+            return self._dump(column.typedef, value)
+        return dump(value)
+
+    def _loader(self, model, expected):
+        """Returns the compiled loader for the columns of a model.  See :func:`~bloop.engine.compile_loader`."""
+        key = (model, frozenset(expected))
+        loader = self._loaders.get(key, None)
+        if loader is None:
+            loader = self._loaders[key] = compile_loader(self, model, expected)
+        return loader
+
     def bind(self, model, *, skip_table_setup=False):
         """Create backing tables for a model and its non-abstract subclasses.
 
@@ -138,18 +298,48 @@ class Engine:
 
             self.type_engine.register(model)
             self.type_engine.bind(context={"engine": self})
+            # Loaders for full objects, keys, and each index's projection
+            self._loader(model, model.Meta.columns)
+            self._loader(model, model.Meta.keys)
+            for index in getattr(model.Meta, "indexes", ()):
+                self._loader(model, index.projection["included"])
+            self._dumpers[model] = compile_dumper(self, model)
             model_bound.send(self, engine=self, model=model)
 
-    def delete(self, *objs, condition=None, atomic=False):
+    def delete(self, *objs, condition=None, atomic=False, batch=False):
         """Delete one or more objects.
 
         :param objs: objects to delete.
         :param condition: only perform each delete if this condition holds.
         :param bool atomic: only perform each delete if the local and DynamoDB versions of the object match.
+        :param bool batch: Delete the objects with `BatchWriteItem`__, 25 objects per request.
+            Can't be used with a condition or atomic.  Default is False.
         :raises bloop.exceptions.ConstraintViolation: if the condition (or atomic) is not met.
+        :raises bloop.exceptions.InvalidCondition: if ``batch`` is True and a condition (or atomic) is given.
+        :raises bloop.exceptions.UnprocessedObjects: if ``batch`` is True and some objects weren't deleted.
+
+        __ http://docs.aws.amazon.com/amazondynamodb/latest/APIReference/API_BatchWriteItem.html
         """
         objs = set(objs)
         validate_not_abstract(*objs)
+        if batch:
+            validate_unconditional(condition, atomic)
+            items, indexes = {}, set()
+            for obj in objs:
+                table_name = obj.Meta.table_name
+                key = dump_key(self, obj)
+                # BatchWriteItem rejects duplicate keys; objects with the same key are deleted together
+                index = (table_name, index_for(key))
+                if index in indexes:
+                    continue
+                indexes.add(index)
+                items.setdefault(table_name, []).append({"DeleteRequest": {"Key": key}})
+            not_deleted = find_unprocessed(self, objs, self.session.write_items(items))
+            for obj in objs - not_deleted:
+                object_deleted.send(self, engine=self, obj=obj)
+            if not_deleted:
+                raise UnprocessedObjects("Failed to delete some objects.", objects=not_deleted)
+            return
         for obj in objs:
             item = {
                 "TableName": obj.Meta.table_name,
@@ -159,12 +349,18 @@ class Engine:
             self.session.delete_item(item)
             object_deleted.send(self, engine=self, obj=obj)
 
-    def load(self, *objs, consistent=False):
+    def load(self, *objs, consistent=False, max_workers=None):
         """Populate objects from DynamoDB.
 
         :param objs: objects to delete.
         :param bool consistent: Use `strongly consistent reads`__ if True.  Default is False.
+        :param int max_workers: *(Optional)* Send up to this many BatchGetItem requests at once
+            from a thread pool.  Must be None or a positive int.  Default is None (one request at a time).
+        :raises ValueError: if ``max_workers`` isn't None or a positive int.
         :raises bloop.exceptions.MissingKey: if any object doesn't provide a value for a key column.
+        :raises bloop.exceptions.UnprocessedObjects: if DynamoDB didn't process some objects before the session's
+            retry policy gave up.  The other objects are still loaded, and any objects that don't exist are on the
+            exception's ``missing`` attribute.
         :raises bloop.exceptions.MissingObjects: if one or more objects aren't loaded.
 
         __ http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/HowItWorks.ReadConsistency.html
@@ -189,7 +385,8 @@ class Engine:
                 object_index[table_name][index] = set()
             object_index[table_name][index].add(obj)
 
-        response = self.session.load_items(request)
+        unprocessed = {}
+        response = self.session.load_items(request, max_workers=max_workers, unprocessed=unprocessed)
 
         for table_name, list_of_attrs in response.items():
             for attrs in list_of_attrs:
@@ -198,20 +395,31 @@ class Engine:
                 index = index_for(key)
 
                 for obj in object_index[table_name].pop(index):
-                    unpack_from_dynamodb(
-                        attrs=attrs, expected=obj.Meta.columns, engine=self, obj=obj)
-                    object_loaded.send(self, engine=self, obj=obj)
+                    self._loader(obj.__class__, obj.Meta.columns)(attrs, obj)
+                    object_loaded.send(self, engine=self, obj=obj, attrs=attrs)
                 if not object_index[table_name]:
                     object_index.pop(table_name)
 
-        if object_index:
-            not_loaded = set()
-            for index in object_index.values():
-                for index_set in index.values():
-                    not_loaded.update(index_set)
+        # Throttled keys may exist; don't report them as missing
+        not_processed = set()
+        for table_name, table_request in unprocessed.items():
+            table_objects = object_index.get(table_name, {})
+            for key in table_request["Keys"]:
+                not_processed.update(table_objects.pop(index_for(key), ()))
+
+        not_loaded = set()
+        for index in object_index.values():
+            for index_set in index.values():
+                not_loaded.update(index_set)
+
+        if not_processed:
+            raise UnprocessedObjects("Failed to load some objects.", objects=not_processed, missing=not_loaded)
+        if not_loaded:
             raise MissingObjects("Failed to load some objects.", objects=not_loaded)
 
-    def query(self, model_or_index, key, filter=None, projection="all", consistent=False, forward=True):
+    def query(
+            self, model_or_index, key, filter=None, projection="all", consistent=False, forward=True, prefetch=0,
+            limit=None, page_size=None, cursor=None, as_="model"):
         """Create a reusable :class:`~bloop.search.QueryIterator`.
 
         :param model_or_index: A model or index to query.  For example, ``User`` or ``User.by_email``.
@@ -224,9 +432,20 @@ class Engine:
             "count", you must advance the iterator to retrieve the count.
         :param bool consistent: Use `strongly consistent reads`__ if True.  Default is False.
         :param bool forward:  Query in ascending or descending order.  Default is True (ascending).
+        :param int prefetch: Fetch up to this many pages on a background thread while results are
+            consumed.  Default is 0 (no background fetching).
+        :param int limit: Stop after this many results.  Default is None (no limit).
+        :param int page_size: Maximum number of items DynamoDB evaluates in each call, before any filter is
+            applied.  Default is None (up to 1MB per call).
+        :param str cursor: Continue from the :attr:`~bloop.search.QueryIterator.cursor` of an earlier
+            iterator for the same query.  Default is None (start from the first result).
+        :param str as_: "model" to return model instances, or "dict" to return a dict of column values for each
+            result, keyed by model name.  Dicts aren't tracked and don't send signals.  Default is "model".
 
         :return: A reusable query iterator with helper methods.
         :rtype: :class:`~bloop.search.QueryIterator`
+        :raises bloop.exceptions.InvalidSearch: if ``limit`` or ``page_size`` is not a positive integer, if
+            ``prefetch`` is not a non-negative integer, or if the cursor was created by a different query.
 
         __ http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/HowItWorks.ReadConsistency.html
         """
@@ -237,29 +456,107 @@ class Engine:
         validate_not_abstract(model)
         q = Search(
             mode="query", engine=self, model=model, index=index, key=key, filter=filter,
-            projection=projection, consistent=consistent, forward=forward)
-        return iter(q.prepare())
+            projection=projection, consistent=consistent, forward=forward, prefetch=prefetch,
+            limit=limit, page_size=page_size, as_=as_)
+        iterator = iter(q.prepare())
+        if cursor is not None:
+            iterator.move_to(cursor)
+        return iterator
+
+    def prepare_query(
+            self, model_or_index, key, filter=None, projection="all", consistent=False, forward=True, prefetch=0,
+            limit=None, page_size=None, as_="model"):
+        """Validate and render a query once, to execute many times with different values.
+
+        Use :func:`bloop.param <bloop.conditions.param>` in place of any values in the key or filter condition
+        that change between executions.  Each execution only dumps those values into a copy of the request.
+
+        .. code-block:: python
+
+            >>> by_email = engine.prepare_query(User.by_email, key=User.email == param("email"))
+            >>> by_email.execute(email="user@domain.com").one()
+
+        Takes the same parameters as :func:`~bloop.engine.Engine.query`, except ``cursor``, which is passed to
+        :func:`PreparedQuery.execute <bloop.search.PreparedQuery.execute>` instead.
+
+        :return: A query that creates a :class:`~bloop.search.QueryIterator` each time it's executed.
+        :rtype: :class:`~bloop.search.PreparedQuery`
+        :raises bloop.exceptions.InvalidSearch: if ``limit`` or ``page_size`` is not a positive integer, or if
+            ``prefetch`` is not a non-negative integer.
+        """
+        if isinstance(model_or_index, Index):
+            model, index = model_or_index.model, model_or_index
+        else:
+            model, index = model_or_index, None
+        validate_not_abstract(model)
+        q = Search(
+            mode="query", engine=self, model=model, index=index, key=key, filter=filter,
+            projection=projection, consistent=consistent, forward=forward, prefetch=prefetch,
+            limit=limit, page_size=page_size, as_=as_)
+        return PreparedQuery(q.prepare())
 
-    def save(self, *objs, condition=None, atomic=False):
+    def save(self, *objs, condition=None, atomic=False, batch=False, diff=False):
         """Save one or more objects.
 
         :param objs: objects to save.
         :param condition: only perform each save if this condition holds.
         :param bool atomic: only perform each save if the local and DynamoDB versions of the object match.
+        :param bool batch: Overwrite each object's item with `BatchWriteItem`__, 25 objects per request.
+            Unlike the default partial save, columns that are missing locally are removed from the item.
+            When objects share a key only the last one is saved.  Can't be used with a condition or atomic.
+            Default is False.
+        :param bool diff: Only update columns whose values changed since each object was last loaded or saved, and
+            skip objects that haven't changed at all.  A skipped object's condition isn't checked, and
+            :data:`~bloop.signals.object_saved` isn't sent for it.  Can't be used with batch.  Default is False.
         :raises bloop.exceptions.ConstraintViolation: if the condition (or atomic) is not met.
+        :raises bloop.exceptions.InvalidCondition: if ``batch`` is True and a condition, atomic, or diff is given.
+        :raises bloop.exceptions.UnprocessedObjects: if ``batch`` is True and some objects weren't saved.
+
+        __ http://docs.aws.amazon.com/amazondynamodb/latest/APIReference/API_BatchWriteItem.html
         """
-        objs = set(objs)
+        given, objs = objs, set(objs)
         validate_not_abstract(*objs)
+        if batch:
+            validate_unconditional(condition, atomic)
+            if diff:
+                raise InvalidCondition("Batched saves overwrite each item and can't use diff.")
+            # BatchWriteItem rejects duplicate keys; the last object with each key is saved
+            puts = {}
+            for obj in given:
+                # Fail on a missing key before anything is sent
+                index = (obj.Meta.table_name, index_for(dump_key(self, obj)))
+                puts[index] = obj
+            items = {}
+            for obj in puts.values():
+                item = self._dump(obj.__class__, obj)
+                items.setdefault(obj.Meta.table_name, []).append({"PutRequest": {"Item": item}})
+            saved = set(puts.values())
+            not_saved = find_unprocessed(self, saved, self.session.write_items(items))
+            for obj in saved - not_saved:
+                object_saved.send(self, engine=self, obj=obj)
+            if not_saved:
+                raise UnprocessedObjects("Failed to save some objects.", objects=not_saved)
+            return
         for obj in objs:
             item = {
                 "TableName": obj.Meta.table_name,
                 "Key": dump_key(self, obj),
             }
-            item.update(render(self, obj=obj, atomic=atomic, condition=condition, update=True))
+            item.update(render(self, obj=obj, atomic=atomic, condition=condition, update=True, diff=diff))
+            # Nothing changed since the last load or save
+            if diff and "UpdateExpression" not in item and get_synced(obj) is not None:
+                continue
+            version_column = obj.Meta.version_column
+            # The UpdateExpression sets the next version in DynamoDB
+            next_version = get_synced_version(obj, self) + 1 if atomic and version_column is not None else None
             self.session.save_item(item)
+            if next_version is not None:
+                setattr(obj, version_column.model_name, next_version)
             object_saved.send(self, engine=self, obj=obj)
 
-    def scan(self, model_or_index, filter=None, projection="all", consistent=False, parallel=None):
+    def scan(
+            self, model_or_index, filter=None, projection="all", consistent=False, parallel=None, prefetch=0,
+            segments=None, max_workers=None, limit=None, page_size=None, cursor=None, as_="model"):
         """Create a reusable :class:`~bloop.search.ScanIterator`.
 
         :param model_or_index: A model or index to scan.  For example, ``User`` or ``User.by_email``.
@@ -270,8 +567,25 @@ class Engine:
         :param bool consistent: Use `strongly consistent reads`__ if True.  Default is False.
         :param tuple parallel: Perform a `parallel scan`__.  A tuple of (Segment, TotalSegments)
             for this portion the scan. Default is None.
+        :param int prefetch: Fetch up to this many pages on a background thread while results are
+            consumed.  Default is 0 (no background fetching).
+        :param int segments: Scan every segment of a parallel scan with this many segments, and yield
+            the results from all of them.  Can't be used with ``parallel``.  Default is None.
+        :param int max_workers: Number of threads to scan ``segments`` with.  Must be None or a positive int.
+            Default is one per segment.
+        :param int limit: Stop after this many results.  Default is None (no limit).
+        :param int page_size: Maximum number of items DynamoDB evaluates in each call, before any filter is
+            applied.  Default is None (up to 1MB per call).
+        :param str cursor: Continue from the :attr:`~bloop.search.ScanIterator.cursor` of an earlier
+            iterator for the same scan.  Can't be used with ``segments``.  Default is None.
+        :param str as_: "model" to return model instances, or "dict" to return a dict of column values for each
+            result, keyed by model name.  Dicts aren't tracked and don't send signals.  Default is "model".
         :return: A reusable scan iterator with helper methods.
-        :rtype: :class:`~bloop.search.ScanIterator`
+        :rtype: :class:`~bloop.search.ScanIterator` or :class:`~bloop.search.ParallelScanIterator`
+        :raises bloop.exceptions.InvalidSearch: if both ``parallel`` and ``segments`` are given, if ``limit``
+            or ``page_size`` is not a positive integer, if ``prefetch`` is not a non-negative integer, or if the
+            cursor was created by a different scan.
+        :raises ValueError: if ``segments`` is given and ``max_workers`` isn't None or a positive int.
 
         __ http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/HowItWorks.ReadConsistency.html
         __ http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/QueryAndScan.html#QueryAndScanParallelScan
@@ -283,10 +597,56 @@ class Engine:
         validate_not_abstract(model)
         s = Search(
             mode="scan", engine=self, model=model, index=index, filter=filter,
-            projection=projection, consistent=consistent, parallel=parallel)
-        return iter(s.prepare())
+            projection=projection, consistent=consistent, parallel=parallel, prefetch=prefetch,
+            segments=segments, max_workers=max_workers, limit=limit, page_size=page_size, as_=as_)
+        iterator = iter(s.prepare())
+        if cursor is not None:
+            iterator.move_to(cursor)
+        return iterator
+
+    def update(self, obj, *actions, condition=None, atomic=False):
+        """Apply actions to an object's item in DynamoDB without loading it first, such as incrementing a counter.
+
+        The new values of the updated columns are loaded into the object.  Other columns are not changed.
 
-    def stream(self, model, position):
+        .. code-block:: python
+
+            engine.update(post, Post.views.add(1), Post.tags.discard({"draft"}))
+
+        :param obj: the object to update.
+        :param actions: one or more :class:`~bloop.conditions.Action` for columns of the object's model.
+        :param condition: only perform the update if this condition holds.
+        :param bool atomic: only perform the update if the local and DynamoDB versions of the object match.
+        :raises bloop.exceptions.ConstraintViolation: if the condition (or atomic) is not met.
+        :raises bloop.exceptions.InvalidCondition: if there are no actions, an argument isn't an action, or an
+            action is for another model.
+        """
+        validate_not_abstract(obj)
+        if not actions:
+            raise InvalidCondition("Update needs at least one action.")
+        for action in actions:
+            # Values to set belong on the object, and are sent with save
+            if not isinstance(action, Action):
+                raise InvalidCondition("Update takes actions like Column.add(value), not {!r}.".format(action))
+        columns = {action.column for action in actions}
+        if not columns <= obj.Meta.columns or columns & obj.Meta.keys:
+            raise InvalidCondition("Update actions must be for non-key columns of {!r}.".format(
+                obj.__class__.__name__))
+        item = {
+            "TableName": obj.Meta.table_name,
+            "Key": dump_key(self, obj),
+            "ReturnValues": "UPDATED_NEW",
+        }
+        item.update(render(self, obj=obj, atomic=atomic, condition=condition, actions=actions))
+        response = self.session.save_item(item)
+        if atomic and obj.Meta.version_column is not None:
+            columns.add(obj.Meta.version_column)
+        # Only the updated attributes are returned; a set with all its values removed isn't included
+        attrs = response.get("Attributes", {})
+        self._loader(obj.__class__, columns)(attrs, obj)
+        merge_synced(obj, columns, attrs)
+
+    def stream(self, model, position, as_="model", max_workers=None, checkpoint=None, group=None):
         """Create a :class:`~bloop.stream.Stream` that provides approximate chronological ordering.
 
         .. code-block:: pycon
@@ -315,13 +675,43 @@ class Engine:
 
         :param model: The model to stream records from.
         :param position: "trim_horizon", "latest", a stream token, or a :class:`datetime.datetime`.
+        :param str as_: "model" to unpack each record's "new", "old", and "key" into model instances, or "dict"
+            to unpack them into dicts of column values keyed by model name.  Default is "model".
+        :param int max_workers: *(Optional)* Poll up to this many shards at once from a thread pool each time the
+            stream runs out of buffered records.  Default is None (one shard at a time).
+        :param checkpoint: *(Optional)* A :class:`~bloop.stream.checkpoint.Checkpoint` or
+            :class:`~bloop.stream.checkpoint.CheckpointStore` that periodically saves the stream's position.  If the
+            store has a position for this stream, the stream resumes from it instead of ``position``.  A store is
+            flushed with the default :class:`~bloop.stream.checkpoint.Checkpoint` settings.  Default is None.
+        :param group: *(Optional)* A :class:`~bloop.stream.lease.ConsumerGroup` to share the stream with other
+            workers.  The stream only reads the shards this worker leases, and ``position`` must be "trim_horizon"
+            or "latest".  Can't be used with ``checkpoint``, since each lease saves its shard's position.
+            Default is None.
         :return: An iterator for records in all shards.
         :rtype: :class:`~bloop.stream.Stream`
-        :raises bloop.exceptions.InvalidStream: if the model does not have a stream.
+        :raises bloop.exceptions.InvalidStream: if the model does not have a stream, ``as_`` is not
+            "model" or "dict", ``checkpoint`` is not a checkpoint or checkpoint store, or ``group`` is not a
+            consumer group.
         """
         validate_not_abstract(model)
         if not model.Meta.stream or not model.Meta.stream.get("arn"):
             raise InvalidStream("{!r} does not have a stream arn".format(model))
-        stream = Stream(model=model, engine=self)
+        if as_ not in {"model", "dict"}:
+            raise InvalidStream("as_ must be 'model' or 'dict', not {!r}.".format(as_))
+        if isinstance(checkpoint, CheckpointStore):
+            checkpoint = Checkpoint(checkpoint)
+        elif checkpoint is not None and not isinstance(checkpoint, Checkpoint):
+            raise InvalidStream("checkpoint must be a Checkpoint or CheckpointStore, not {!r}.".format(checkpoint))
+        if group is not None:
+            if not isinstance(group, ConsumerGroup):
+                raise InvalidStream("group must be a ConsumerGroup, not {!r}.".format(group))
+            if checkpoint is not None:
+                raise InvalidStream("Use either checkpoint or group, not both.")
+        stream = Stream(
+            model=model, engine=self, as_=as_, max_workers=max_workers, checkpoint=checkpoint, group=group)
+        if checkpoint is not None:
+            token = checkpoint.load(model.Meta.stream["arn"])
+            if token is not None:
+                position = token
         stream.move_to(position=position)
         return stream
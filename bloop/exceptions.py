@@ -13,6 +13,17 @@ class MissingObjects(BloopException):
         self.objects = list(objects) if objects else []
 
 
+class UnprocessedObjects(BloopException):
+    """DynamoDB did not process some objects in a batch.
+
+    When loading, :data:`missing` holds any objects that DynamoDB did process but reported don't exist.
+    """
+    def __init__(self, *args, objects=None, missing=None):
+        super().__init__(*args)
+        self.objects = list(objects) if objects else []
+        self.missing = list(missing) if missing else []
+
+
 class TableMismatch(BloopException):
     """The expected and actual tables for this Model do not match."""
 
@@ -77,5 +88,9 @@ class InvalidProjection(BloopException, ValueError):
     """This is not a valid projection option for the Model and Index."""
 
 
+class InvalidSearch(BloopException, ValueError):
+    """This is not a valid combination of search options."""
+
+
 class InvalidPosition(BloopException, ValueError):
     """This is not a valid position for a Stream."""
@@ -2,7 +2,7 @@ import collections.abc
 
 import declare
 
-from .conditions import ComparisonMixin
+from .conditions import Action, ComparisonMixin, check_support, mark
 from .exceptions import InvalidIndex, InvalidModel, InvalidStream
 from .signals import model_created, object_modified
 from .util import missing, unpack_from_dynamodb
@@ -110,6 +110,7 @@ class ModelMetaclass(declare.ModelMetaclass):
 
         setup_columns(meta)
         setup_indexes(meta)
+        setup_version_column(meta)
 
         # Entry point for model population. By default this is the
         # class's __init__ function. Custom models can specify the
@@ -181,6 +182,22 @@ def setup_columns(meta):
     }
 
 
+def setup_version_column(meta):
+    """Resolve the optional version column by model name, and make sure it's a non-key number"""
+    version_column = getattr(meta, "version_column", None)
+    if isinstance(version_column, str):
+        columns = declare.index(meta.columns, "model_name")
+        version_column = columns.get(version_column, version_column)
+    if version_column is not None:
+        cls_name = meta.model.__name__
+        if not isinstance(version_column, Column) or version_column not in meta.columns:
+            raise InvalidModel("{!r} version_column must be one of its Columns or a Column's model name.".format(
+                cls_name))
+        if version_column in meta.keys or version_column.typedef.backing_type != "N":
+            raise InvalidModel("{!r} version_column must be a number, and can't be a key.".format(cls_name))
+    meta.version_column = version_column
+
+
 def setup_indexes(meta):
     """Filter indexes from fields, compute projection for each index"""
     # Don't put these in the metadata until they bind successfully.
@@ -241,6 +258,9 @@ class BaseModel(metaclass=ModelMetaclass):
         """ obj -> dict """
         if obj is None:
             return None
+        dumper = context["engine"]._dumpers.get(cls, None)
+        if dumper is not None and not kwargs:
+            return dumper.item(obj)
         dump = context["engine"]._dump
         filtered = filter(
             lambda item: item[1] is not None,
@@ -492,10 +512,32 @@ class Column(declare.Field, ComparisonMixin):
             return self.model_name
         return self._dynamo_name
 
+    def add(self, value):
+        """An :class:`~bloop.conditions.Action` that adds to a number, or adds values to a set.
+
+        .. code-block:: python
+
+            engine.update(post, Post.views.add(1), Post.tags.add({"new"}))
+        """
+        check_support(self, "add")
+        return Action("add", self, value)
+
+    def discard(self, values):
+        """An :class:`~bloop.conditions.Action` that removes values from a set."""
+        check_support(self, "discard")
+        return Action("discard", self, values)
+
+    def append(self, values):
+        """An :class:`~bloop.conditions.Action` that appends values to the end of a list."""
+        check_support(self, "append")
+        return Action("append", self, values)
+
     def set(self, obj, value):
         super().set(obj, value)
-        # Notify the tracking engine that this value was intentionally mutated
-        object_modified.send(self, obj=obj, column=self, value=value)
+        # Mark the column for the tracking engine, and only dispatch the signal when someone is listening
+        mark(obj, (self,))
+        if object_modified.receivers:
+            object_modified.send(self, obj=obj, column=self, value=value)
 
     def delete(self, obj):
         try:
@@ -503,4 +545,6 @@ class Column(declare.Field, ComparisonMixin):
         finally:
             # Unlike set, we always want to mark on delete.  If we didn't, and the column wasn't loaded
             # (say from a query) then the intention "ensure this doesn't have a value" wouldn't be captured.
-            object_modified.send(self, obj=obj, column=self, value=None)
+            mark(obj, (self,))
+            if object_modified.receivers:
+                object_modified.send(self, obj=obj, column=self, value=None)
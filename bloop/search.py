@@ -1,21 +1,44 @@
+import base64
 import collections
+import copy
+import hashlib
+import json
+import queue
+import re
+import threading
+import weakref
 
 import declare
 
-from .conditions import BaseCondition, iter_columns, render
+from .conditions import BaseCondition, Param, iter_columns, render
 from .exceptions import (
     ConstraintViolation,
     InvalidFilterCondition,
     InvalidKeyCondition,
     InvalidProjection,
+    InvalidSearch,
     InvalidSearchMode,
 )
 from .models import Column, GlobalSecondaryIndex
+from .session import validate_max_workers
 from .signals import object_loaded
-from .util import printable_query, unpack_from_dynamodb
+from .util import printable_query
 
 
-__all__ = ["ScanIterator", "QueryIterator"]
+__all__ = ["Page", "ParallelScanIterator", "PreparedQuery", "ScanIterator", "QueryIterator"]
+
+
+# Name and value refs from a ReferenceTracker, such as "#n0" or ":v12"
+EXPRESSION_REF = re.compile(r"#n\d+|:v\d+")
+
+Page = collections.namedtuple("Page", ["items", "count", "scanned", "last_evaluated_key"])
+Page.__doc__ = """One page of results from :func:`SearchIterator.pages <bloop.search.SearchIterator.pages>`.
+
+:param list items: The results in this page.
+:param int count: The response's ``Count``.
+:param int scanned: The response's ``ScannedCount``.
+:param dict last_evaluated_key: The response's ``LastEvaluatedKey``, or None for the last page.
+"""
 
 
 def search_repr(cls, model, index):
@@ -31,11 +54,130 @@ def search_repr(cls, model, index):
             return "<{}[None]>".format(cls.__name__)
 
 
+def search_fingerprint(mode, request):
+    """Short digest of everything in a search request that determines its pages.
+
+    Expression refs are replaced by the names and values they stand for.  Ref numbers depend on the order columns
+    were rendered in, which can change between processes, so the same search always has the same fingerprint.
+    """
+    names = request.get("ExpressionAttributeNames", {})
+    values = request.get("ExpressionAttributeValues", {})
+
+    def resolve(match):
+        ref = match.group(0)
+        if ref in names:
+            return json.dumps(names[ref])
+        return json.dumps(canonical_value(values[ref]), sort_keys=True, default=repr)
+
+    shape = {}
+    for key, value in request.items():
+        if key in {"ExclusiveStartKey", "ExpressionAttributeNames", "ExpressionAttributeValues"}:
+            continue
+        if key == "ProjectionExpression":
+            value = sorted(EXPRESSION_REF.sub(resolve, path) for path in value.split(", "))
+        elif key.endswith("Expression"):
+            value = EXPRESSION_REF.sub(resolve, value)
+        shape[key] = value
+    blob = json.dumps([mode, shape], sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def canonical_value(value):
+    """Sort the members of dumped sets, which are built in an arbitrary order"""
+    if isinstance(value, dict):
+        return {
+            typedef: sorted(inner, key=repr) if typedef in {"SS", "NS", "BS"} else canonical_value(inner)
+            for (typedef, inner) in value.items()}
+    if isinstance(value, list):
+        return [canonical_value(inner) for inner in value]
+    return value
+
+
+def dump_cursor(fingerprint, key, offset, exhausted):
+    """Pack a search position into a compact, url-safe string.
+
+    :param str fingerprint: :func:`search_fingerprint` of the search.
+    :param dict key: ExclusiveStartKey of the page to resume from, or None for the first page.
+    :param int offset: Number of results to skip in that page.
+    :param bool exhausted: True if the search has no more results.
+    """
+    position = {"s": fingerprint}
+    if exhausted:
+        position["x"] = True
+    else:
+        if key:
+            # Key attributes are S, N, or B.  Binary values are bytes, which JSON can't hold.
+            position["k"] = {
+                name: {
+                    typedef: base64.b64encode(value).decode("utf-8") if typedef == "B" else value
+                    for (typedef, value) in attr.items()}
+                for (name, attr) in key.items()}
+        if offset:
+            position["o"] = offset
+    blob = json.dumps(position, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(blob).decode("utf-8").rstrip("=")
+
+
+def load_cursor(cursor, fingerprint):
+    """Unpack a cursor from :func:`dump_cursor` into (key, offset, exhausted).
+
+    :raises bloop.exceptions.InvalidSearch: if the cursor is malformed or was created by a different search.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(cursor + padding).decode("utf-8"))
+        if position["s"] != fingerprint:
+            raise InvalidSearch("The cursor {!r} was created by a different search.".format(cursor))
+        key = position.get("k", None)
+        if key is not None:
+            key = {
+                name: {
+                    typedef: base64.b64decode(value) if typedef == "B" else value
+                    for (typedef, value) in attr.items()}
+                for (name, attr) in key.items()}
+        return key, position.get("o", 0), position.get("x", False)
+    except InvalidSearch:
+        raise
+    except Exception as error:
+        raise InvalidSearch("{!r} is not a valid cursor.".format(cursor)) from error
+
+
 def validate_search_mode(mode):
     if mode not in {"query", "scan"}:
         raise InvalidSearchMode("{!r} is not a valid search mode.".format(mode))
 
 
+def validate_limits(limit, page_size):
+    for name, value in [("limit", limit), ("page_size", page_size)]:
+        if value is None:
+            continue
+        # bool is an int, but a limit of True is almost certainly a mistake
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise InvalidSearch("{} must be a positive integer, not {!r}.".format(name, value))
+
+
+def validate_prefetch(prefetch):
+    # bool is an int, but prefetching True pages is almost certainly a mistake
+    if not isinstance(prefetch, int) or isinstance(prefetch, bool) or prefetch < 0:
+        raise InvalidSearch("prefetch must be a non-negative integer, not {!r}.".format(prefetch))
+
+
+def validate_result_type(as_):
+    if as_ not in {"model", "dict"}:
+        raise InvalidSearch("as_ must be 'model' or 'dict', not {!r}.".format(as_))
+
+
+def validate_segments(mode, parallel, segments):
+    if segments is None:
+        return
+    if mode != "scan":
+        raise InvalidSearch("Only a scan can be split into segments.")
+    if parallel:
+        raise InvalidSearch("Use either parallel or segments, not both.")
+    if not isinstance(segments, int) or segments < 1:
+        raise InvalidSearch("segments must be a positive integer, not {!r}.".format(segments))
+
+
 def validate_key_condition(model, index, key):
     # Model will always be provided, but Index has priority
     query_on = index or model.Meta
@@ -176,6 +318,17 @@ class Search:
     :param bool forward: *(Query only)* Use ascending or descending order.  Default is True (ascending).
     :param tuple parallel: *(Scan only)* A tuple of (Segment, TotalSegments) for this portion of a `parallel scan`__.
             Default is None.
+    :param int prefetch: Number of pages to fetch in the background while results are consumed.
+        Default is 0 (fetch each page when the previous one is exhausted).
+    :param int segments: *(Scan only)* Split the scan into this many segments, and scan all of them
+        from a pool of threads.  Can't be used with ``parallel``.  Default is None.
+    :param int max_workers: *(Scan only)* Number of threads to scan ``segments`` with.
+        Default is one thread per segment.
+    :param int limit: Stop after this many results.  Default is None (no limit).
+    :param int page_size: Maximum number of items DynamoDB evaluates per call, sent as ``Limit``.
+        Default is None (up to 1MB per call).
+    :param str as_: "model" to return model instances, or "dict" to return dicts of column values keyed by
+        model name, without tracking or signals.  Default is "model".
 
     __ http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/HowItWorks.ReadConsistency.html
     __ http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/QueryAndScan.html#QueryAndScanParallelScan
@@ -183,7 +336,8 @@ class Search:
 
     def __init__(
             self, mode=None, engine=None, model=None, index=None, key=None, filter=None,
-            projection=None, consistent=False, forward=True, parallel=None):
+            projection=None, consistent=False, forward=True, parallel=None, prefetch=0,
+            segments=None, max_workers=None, limit=None, page_size=None, as_="model"):
         self.mode = mode
         self.engine = engine
         self.model = model
@@ -194,6 +348,12 @@ class Search:
         self.consistent = consistent
         self.forward = forward
         self.parallel = parallel
+        self.prefetch = prefetch
+        self.segments = segments
+        self.max_workers = max_workers
+        self.limit = limit
+        self.page_size = page_size
+        self.as_ = as_
 
     def __repr__(self):
         return search_repr(self.__class__, self.model, self.index)
@@ -211,7 +371,13 @@ class Search:
             projection=self.projection,
             consistent=self.consistent,
             forward=self.forward,
-            parallel=self.parallel
+            parallel=self.parallel,
+            prefetch=self.prefetch,
+            segments=self.segments,
+            max_workers=self.max_workers,
+            limit=self.limit,
+            page_size=self.page_size,
+            as_=self.as_
         )
         return p
 
@@ -240,12 +406,19 @@ class PreparedSearch:
 
         self.forward = None
         self.parallel = None
+        self.prefetch = None
+        self.segments = None
+        self.max_workers = None
+        self.limit = None
+        self.page_size = None
+        self.as_ = None
 
         self._request = None
 
     def prepare(
             self, engine=None, mode=None, model=None, index=None, key=None,
-            filter=None, projection=None, consistent=None, forward=None, parallel=None):
+            filter=None, projection=None, consistent=None, forward=None, parallel=None, prefetch=0,
+            segments=None, max_workers=None, limit=None, page_size=None, as_="model"):
         """Validates the search parameters and builds the base request dict for each Query/Scan call."""
 
         self.prepare_iterator_cls(engine, mode)
@@ -253,7 +426,7 @@ class PreparedSearch:
         self.prepare_key(key)
         self.prepare_projection(projection)
         self.prepare_filter(filter)
-        self.prepare_constraints(forward, parallel)
+        self.prepare_constraints(forward, parallel, prefetch, segments, max_workers, limit, page_size, as_)
 
         self.prepare_request()
 
@@ -295,9 +468,21 @@ class PreparedSearch:
         available_columns = (self.index or self.model.Meta).projection["available"]
         validate_filter_condition(self.filter, available_columns, column_blacklist)
 
-    def prepare_constraints(self, forward, parallel):
+    def prepare_constraints(
+            self, forward, parallel, prefetch=0, segments=None, max_workers=None, limit=None, page_size=None,
+            as_="model"):
         self.forward = forward
         self.parallel = parallel
+        validate_prefetch(prefetch)
+        self.prefetch = prefetch
+        validate_segments(self.mode, parallel, segments)
+        self.segments = segments
+        self.max_workers = max_workers
+        validate_limits(limit, page_size)
+        self.limit = limit
+        self.page_size = page_size
+        validate_result_type(as_)
+        self.as_ = as_
 
     def prepare_request(self):
         request = self._request = {}
@@ -306,9 +491,11 @@ class PreparedSearch:
 
         if self.mode == "scan":
             if self.parallel:
-                request["Segments"], request["TotalSegments"] = self.parallel
+                request["Segment"], request["TotalSegments"] = self.parallel
         else:
             request["ScanIndexForward"] = self.forward
+        if self.page_size:
+            request["Limit"] = self.page_size
 
         if self.index:
             request["IndexName"] = self.index.dynamo_name
@@ -323,21 +510,171 @@ class PreparedSearch:
             request["Select"] = "SPECIFIC_ATTRIBUTES"
             projected = self._projected_columns
 
-        request.update(render(self.engine, filter=self.filter, projection=projected, key=self.key))
+        # Placeholders are allowed here, but only a PreparedQuery can iterate a request that has them
+        request.update(render(self.engine, filter=self.filter, projection=projected, key=self.key, params=True))
 
     def __repr__(self):
         return search_repr(self.__class__, self.model, self.index)
 
     def __iter__(self):
+        values = self._request.get("ExpressionAttributeValues", {})
+        if any(isinstance(value, Param) for value in values.values()):
+            raise InvalidSearch(
+                "{!r} has parameters.  Use Engine.prepare_query and execute it with their values.".format(self))
+        if self.segments:
+            return ParallelScanIterator(
+                engine=self.engine,
+                model=self.model,
+                index=self.index,
+                request=self._request,
+                projected=self._projected_columns,
+                segments=self.segments,
+                max_workers=self.max_workers,
+                prefetch=self.prefetch,
+                limit=self.limit,
+                as_=self.as_
+            )
         return self._iterator_cls(
             engine=self.engine,
             model=self.model,
             index=self.index,
             request=self._request,
-            projected=self._projected_columns
+            projected=self._projected_columns,
+            prefetch=self.prefetch,
+            limit=self.limit,
+            as_=self.as_
         )
 
 
+class PreparedQuery:
+    """A query that's validated and rendered once, and executed with new parameter values each time.
+
+    Only the values of each :class:`~bloop.conditions.Param` are dumped and substituted into a copy of the
+    rendered request; the conditions aren't validated or rendered again.  Created by
+    :func:`Engine.prepare_query <bloop.engine.Engine.prepare_query>`.
+
+    :param search: A prepared search, whose conditions may include placeholders.
+    :type search: :class:`~bloop.search.PreparedSearch`
+    """
+    def __init__(self, search):
+        self._search = search
+        values = search._request.get("ExpressionAttributeValues", {})
+        self._params = {ref: value for ref, value in values.items() if isinstance(value, Param)}
+        # The names of the values that must be passed to execute
+        self.params = frozenset(value.name for value in self._params.values())
+
+    def __repr__(self):
+        return search_repr(self.__class__, self._search.model, self._search.index)
+
+    def execute(self, *, cursor=None, **values):
+        """Create a :class:`~bloop.search.QueryIterator` using these parameter values.
+
+        :param str cursor: Continue from the :attr:`~bloop.search.QueryIterator.cursor` of an earlier
+            iterator with the same parameter values.  Default is None (start from the first result).
+        :param values: A value for each of the query's :attr:`params`, by name.
+        :return: A reusable query iterator with helper methods.
+        :rtype: :class:`~bloop.search.QueryIterator`
+        :raises bloop.exceptions.InvalidSearch: if a parameter is missing, unexpected, or dumps to None.
+        """
+        given = set(values)
+        if given != self.params:
+            missing_params = sorted(self.params - given)
+            unexpected = sorted(given - self.params)
+            raise InvalidSearch("Missing parameters {!r} and unexpected parameters {!r}.".format(
+                missing_params, unexpected))
+
+        request = dict(self._search._request)
+        attr_values = request["ExpressionAttributeValues"] = dict(request.get("ExpressionAttributeValues", {}))
+        for ref, placeholder in self._params.items():
+            value = placeholder.dump(self._search.engine, values[placeholder.name])
+            if value is None:
+                raise InvalidSearch("Parameter {!r} can't be empty.".format(placeholder.name))
+            attr_values[ref] = value
+
+        search = copy.copy(self._search)
+        search._request = request
+        iterator = iter(search)
+        if cursor is not None:
+            iterator.move_to(cursor)
+        return iterator
+
+
+class PagePrefetcher:
+    """Fetches the pages of one or more searches on background threads.
+
+    Each request is followed until it runs out of pages.  The threads run at most ``size`` pages ahead
+    of the consumer, and errors raised while fetching are re-raised from :func:`get` in the consuming thread.
+    After an error the prefetcher stops, and every later :func:`get` raises the same error.
+
+    :param session: :class:`~bloop.session.SessionWrapper` to make Query, Scan calls.
+    :param str mode: Search type, either "query" or "scan".
+    :param list requests: The request dict for the first page of each search.  Copies are made.
+    :param int size: Maximum number of pages held in the queue.
+    :param int workers: Number of threads to fetch with.  Default is 1.
+    """
+    def __init__(self, *, session, mode, requests, size, workers=1):
+        self.session = session
+        self.mode = mode
+        self.pages = queue.Queue(maxsize=size)
+        self.stopped = threading.Event()
+        # First error returned from get.  The request that raised won't put any more pages.
+        self.error = None
+
+        self.requests = queue.Queue()
+        for request in requests:
+            self.requests.put(dict(request))
+        self.threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(max(1, min(workers, self.requests.qsize())))]
+        for thread in self.threads:
+            thread.start()
+
+    def get(self):
+        """Block until the next page is available and return its response."""
+        if self.error is not None:
+            raise self.error
+        response, error = self.pages.get()
+        if error is not None:
+            self.error = error
+            self.stop()
+            raise error
+        return response
+
+    def stop(self):
+        """Stop fetching.  Calls already in flight finish, but their pages are discarded."""
+        self.stopped.set()
+
+    def _work(self):
+        while not self.stopped.is_set():
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            if not self._fetch(request):
+                return
+
+    def _fetch(self, request):
+        try:
+            while not self.stopped.is_set():
+                response = self.session.search_items(self.mode, request)
+                continuation_token = request["ExclusiveStartKey"] = response.get("LastEvaluatedKey", None)
+                self._put((response, None))
+                if not continuation_token:
+                    return True
+        except Exception as error:
+            self._put((None, error))
+        return False
+
+    def _put(self, page):
+        # Poll so that a full queue can't block the thread after the consumer goes away
+        while not self.stopped.is_set():
+            try:
+                self.pages.put(page, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
 class SearchIterator:
     """Reusable search iterator.
 
@@ -346,12 +683,30 @@ class SearchIterator:
     :param index: :class:`~bloop.models.Index` to search, or None.
     :param dict request: The base request dict for each search.
     :param set projected: Set of :class:`~bloop.models.Column` that should be included in each result.
+    :param int prefetch: Number of pages to fetch in the background.  Default is 0.
+    :param int limit: Maximum number of results to return.  Default is None (no limit).
     """
     mode = "<mode-placeholder>"
 
-    def __init__(self, *, session, model, index, request, projected):
+    def __init__(self, *, session, model, index, request, projected, prefetch=0, limit=None):
         self.session = session
-        self.request = request
+        # Each iterator follows its own continuation tokens
+        self.request = dict(request)
+        self.prefetch = prefetch
+        self._prefetcher = None
+        self._finalizer = None
+        self.limit = limit
+        self._yielded = 0
+
+        # (ExclusiveStartKey, offset, exhausted) that reset returns to
+        self._start = (None, 0, False)
+        # Resuming in the middle of a page re-reads the page and drops the first _skip results
+        self._skip = 0
+        # The ExclusiveStartKey of the buffered page, and how many of its results were consumed
+        self._page_start = None
+        self._page_offset = 0
+        # Count, ScannedCount, LastEvaluatedKey of the buffered page
+        self._page_info = (0, 0, None)
 
         self.model = model
         self.index = index
@@ -393,16 +748,55 @@ class SearchIterator:
         return first
 
     def reset(self):
-        """Reset to the initial state, clearing the buffer and zeroing count and scanned."""
+        """Reset to the initial state, clearing the buffer and zeroing count and scanned.
+
+        If the iterator was moved to a cursor, it returns to that cursor.
+        """
         self.buffer.clear()
         self.count = 0
         self.scanned = 0
-        self._exhausted = False
+        self._yielded = 0
+        self._stop_prefetcher()
+
+        key, self._skip, self._exhausted = self._start
+        if key is None:
+            self.request.pop("ExclusiveStartKey", None)
+        else:
+            self.request["ExclusiveStartKey"] = key
+        self._page_start, self._page_offset = None, 0
+        self._page_info = (0, 0, None)
+
+    @property
+    def cursor(self):
+        """An opaque, url-safe string for the current position.
+
+        Pass it to :func:`move_to` (or to :func:`Engine.query <bloop.engine.Engine.query>` and
+        :func:`Engine.scan <bloop.engine.Engine.scan>`) to continue from the next result.  The cursor
+        can only be used with the same search: the same model, index, conditions, projection, and page size.
+        """
+        if self.buffer:
+            key, offset, exhausted = self._page_start, self._page_offset, False
+        else:
+            key, offset, exhausted = self.request.get("ExclusiveStartKey", None), self._skip, self._exhausted
+        return dump_cursor(search_fingerprint(self.mode, self.request), key, offset, exhausted)
+
+    def move_to(self, cursor):
+        """Move to the position of a cursor from this search, and reset.
+
+        :param str cursor: A :attr:`cursor` from an iterator for the same search.
+        :raises bloop.exceptions.InvalidSearch: if the cursor was created by a different search.
+        """
+        self._start = load_cursor(cursor, search_fingerprint(self.mode, self.request))
+        self.reset()
 
     @property
     def exhausted(self):
         """True if there are no more results."""
-        return self._exhausted and len(self.buffer) == 0
+        return self._limit_reached or (self._exhausted and len(self.buffer) == 0)
+
+    @property
+    def _limit_reached(self):
+        return self.limit is not None and self._yielded >= self.limit
 
     def __repr__(self):
         return search_repr(self.__class__, self.model, self.index)
@@ -410,20 +804,98 @@ class SearchIterator:
     def __iter__(self):
         return self
 
-    def __next__(self):
-        while (not self._exhausted) and len(self.buffer) == 0:
-            response = self.session.search_items(self.mode, self.request)
-            continuation_token = self.request["ExclusiveStartKey"] = response.get("LastEvaluatedKey", None)
-            self._exhausted = not continuation_token
+    def _next_page(self):
+        if not self.prefetch:
+            return self.session.search_items(self.mode, self.request)
+        if self._prefetcher is None:
+            self._start_prefetcher(PagePrefetcher(
+                session=self.session, mode=self.mode, requests=[self.request], size=self.prefetch))
+        try:
+            return self._prefetcher.get()
+        except Exception:
+            # The prefetcher's thread exits after an error.  self.request only follows pages that were returned,
+            # so the next call starts a new prefetcher from the page that failed.
+            self._stop_prefetcher()
+            raise
+
+    def _follow(self, response):
+        """Track the page's continuation token.  Returns True if there are more pages to load."""
+        continuation_token = self.request["ExclusiveStartKey"] = response.get("LastEvaluatedKey", None)
+        return bool(continuation_token)
+
+    def _start_prefetcher(self, prefetcher):
+        self._prefetcher = prefetcher
+        # Don't leave the thread waiting on a full queue when the iterator is dropped.
+        # Only the current prefetcher has a finalizer; _stop_prefetcher detaches it.
+        self._finalizer = weakref.finalize(self, prefetcher.stop)
+
+    def _stop_prefetcher(self):
+        if self._prefetcher is not None:
+            self._finalizer.detach()
+            self._prefetcher.stop()
+            self._prefetcher = self._finalizer = None
+
+    def _load_page(self):
+        """Load the next page and track its position.  Returns the page's items."""
+        page_start = self.request.get("ExclusiveStartKey", None)
+        response = self._next_page()
+        self._exhausted = not self._follow(response)
+
+        self.count += response["Count"]
+        self.scanned += response["ScannedCount"]
+        self._page_info = response["Count"], response["ScannedCount"], response.get("LastEvaluatedKey", None)
+
+        # Each item is a dict of attributes
+        items = response["Items"]
+        self._page_start, self._page_offset = page_start, 0
+        if self._skip:
+            items = items[self._skip:]
+            self._page_offset, self._skip = self._skip, 0
+        return items
+
+    def _unpack(self, attrs):
+        """Turn a result dict into the value that is returned to the caller."""
+        return attrs
+
+    def pages(self):
+        """Iterate the remaining results one page at a time.
+
+        Yields a :class:`~bloop.search.Page` for each response from DynamoDB, including pages with no results.
+        If some results from a page were already returned by ``next``, the rest of that page is yielded first.
+        Shares position, ``count``, ``scanned``, and ``limit`` with the iterator.
+
+        :return: A generator of :class:`~bloop.search.Page`.
+        """
+        while not self.exhausted:
+            if self.buffer:
+                items = list(self.buffer)
+                self.buffer.clear()
+            else:
+                items = self._load_page()
+            if self.limit is not None:
+                # Keep the rest buffered so the cursor still points at the next result
+                items, rest = items[:self.limit - self._yielded], items[self.limit - self._yielded:]
+                self.buffer.extend(rest)
+            self._yielded += len(items)
+            self._page_offset += len(items)
+            count, scanned, last_evaluated_key = self._page_info
+            yield Page([self._unpack(attrs) for attrs in items], count, scanned, last_evaluated_key)
+        if self._limit_reached:
+            self._stop_prefetcher()
 
-            self.count += response["Count"]
-            self.scanned += response["ScannedCount"]
+    def __next__(self):
+        if self._limit_reached:
+            # Don't keep fetching pages that will never be returned
+            self._stop_prefetcher()
+            raise StopIteration
 
-            # Each item is a dict of attributes
-            self.buffer.extend(response["Items"])
+        while (not self._exhausted) and len(self.buffer) == 0:
+            self.buffer.extend(self._load_page())
 
         if self.buffer:
-            return self.buffer.popleft()
+            self._yielded += 1
+            self._page_offset += 1
+            return self._unpack(self.buffer.popleft())
 
         # Buffer must be empty (if _buffer)
         # No more continue tokens (while not _exhausted)
@@ -433,29 +905,37 @@ class SearchIterator:
 class SearchModelIterator(SearchIterator):
     """Reusable search iterator that unpacks result dicts into model instances.
 
+    With ``as_="dict"``, results are dicts of loaded values keyed by each column's model name.  No objects
+    are created, so nothing is tracked and :data:`~bloop.signals.object_loaded` is not sent.
+
     :param engine: :class:`~bloop.engine.Engine` to unpack models with.
     :param model: :class:`~bloop.models.BaseModel` being searched.
     :param index: :class:`~bloop.models.Index` to search, or None.
     :param dict request: The base request dict for each search call.
     :param set projected: Set of :class:`~bloop.models.Column` that should be included in each result.
+    :param int prefetch: Number of pages to fetch in the background.  Default is 0.
+    :param int limit: Maximum number of results to return.  Default is None (no limit).
+    :param str as_: "model" or "dict".  Default is "model".
     """
-    def __init__(self, *, engine, model, index, request, projected):
+    def __init__(self, *, engine, model, index, request, projected, prefetch=0, limit=None, as_="model"):
         self.engine = engine
 
         self.model = model
+        self.as_ = as_
+        # Compiled loader for the projected columns, created on first use
+        self._load = None
 
         super().__init__(
             session=engine.session, model=model, index=index,
-            request=request, projected=projected)
-
-    def __next__(self):
-        attrs = super().__next__()
-        obj = unpack_from_dynamodb(
-            attrs=attrs,
-            expected=self.projected,
-            model=self.model,
-            engine=self.engine)
-        object_loaded.send(self.engine, engine=self.engine, obj=obj)
+            request=request, projected=projected, prefetch=prefetch, limit=limit)
+
+    def _unpack(self, attrs):
+        if self._load is None:
+            self._load = self.engine._loader(self.model, self.projected)
+        if self.as_ == "dict":
+            return self._load.as_dict(attrs)
+        obj = self._load(attrs)
+        object_loaded.send(self.engine, engine=self.engine, obj=obj, attrs=attrs)
         return obj
 
 
@@ -485,3 +965,76 @@ class QueryIterator(SearchModelIterator):
     :param set projected: Set of :class:`~bloop.models.Column` that should be included in each result.
     """
     mode = "query"
+
+
+class ParallelScanIterator(ScanIterator):
+    """Reusable scan iterator that runs every segment of a `parallel scan`__ on a pool of threads.
+
+    Results from all segments are yielded in the order their pages arrive.  ``count`` and ``scanned`` are the
+    totals across every segment.
+
+    Returned from :func:`Engine.scan <bloop.engine.Engine.scan>` when ``segments`` is given.
+
+    :param engine: :class:`~bloop.engine.Engine` to unpack models with.
+    :param model: :class:`~bloop.models.BaseModel` being scanned.
+    :param index: :class:`~bloop.models.Index` to scan, or None.
+    :param dict request: The base request dict for each Scan call.
+    :param set projected: Set of :class:`~bloop.models.Column` that should be included in each result.
+    :param int segments: Total number of segments to split the scan into.
+    :param int max_workers: Number of threads to scan with.  Must be None or a positive int.  Default is one thread
+        per segment.
+    :param int prefetch: Number of pages to hold while results are consumed.  Default is one page per thread.
+    :param int limit: Maximum number of results to return across all segments.  Default is None (no limit).
+    :param str as_: "model" or "dict".  Default is "model".
+    :raises ValueError: if ``max_workers`` isn't None or a positive int.
+
+    __ http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/QueryAndScan.html#QueryAndScanParallelScan
+    """
+    def __init__(
+            self, *, engine, model, index, request, projected, segments, max_workers=None, prefetch=0, limit=None,
+            as_="model"):
+        validate_max_workers(max_workers)
+        self.segments = segments
+        self.max_workers = max_workers or segments
+        self._remaining = segments
+        super().__init__(
+            engine=engine, model=model, index=index,
+            request=request, projected=projected, prefetch=prefetch or self.max_workers, limit=limit, as_=as_)
+
+    def reset(self):
+        """Reset to the initial state, clearing the buffer and zeroing count and scanned."""
+        super().reset()
+        self._remaining = self.segments
+
+    @property
+    def cursor(self):
+        """Not supported.  Each segment has its own position.
+
+        :raises bloop.exceptions.InvalidSearch: always.
+        """
+        raise InvalidSearch("Cursors can't be used with a scan over every segment.")
+
+    def move_to(self, cursor):
+        """Not supported.  Each segment has its own position.
+
+        :raises bloop.exceptions.InvalidSearch: always.
+        """
+        raise InvalidSearch("Cursors can't be used with a scan over every segment.")
+
+    def _next_page(self):
+        if self._prefetcher is None:
+            requests = [
+                dict(self.request, Segment=segment, TotalSegments=self.segments)
+                for segment in range(self.segments)]
+            self._start_prefetcher(PagePrefetcher(
+                session=self.session, mode=self.mode, requests=requests,
+                size=self.prefetch, workers=self.max_workers))
+        # A segment that raised never finishes, so the prefetcher raises its error again instead of
+        # waiting for the segment's last page.  Call reset to start the scan over.
+        return self._prefetcher.get()
+
+    def _follow(self, response):
+        # Each segment's last page has no continuation token
+        if not response.get("LastEvaluatedKey", None):
+            self._remaining -= 1
+        return self._remaining > 0
@@ -1,4 +1,9 @@
 import collections
+import concurrent.futures
+import random
+import threading
+import time
+import weakref
 
 import boto3
 import botocore.exceptions
@@ -19,9 +24,20 @@ from .util import Sentinel, ordered
 missing = Sentinel("missing")
 ready = Sentinel("ready")
 
-__all__ = ["SessionWrapper"]
+__all__ = ["RetryPolicy", "SessionWrapper"]
 # https://boto3.readthedocs.io/en/latest/reference/services/dynamodb.html#DynamoDB.Client.batch_get_item
 BATCH_GET_ITEM_CHUNK_SIZE = 100
+# https://boto3.readthedocs.io/en/latest/reference/services/dynamodb.html#DynamoDB.Client.batch_write_item
+BATCH_WRITE_ITEM_CHUNK_SIZE = 25
+
+# Error codes for calls that can succeed if they're sent again after a short wait
+# http://docs.aws.amazon.com/amazondynamodb/latest/developerguide/Programming.Errors.html
+THROTTLING_ERRORS = {
+    "LimitExceededException",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "ThrottlingException",
+}
 
 SHARD_ITERATOR_TYPES = {
     "at_sequence": "AT_SEQUENCE_NUMBER",
@@ -31,29 +47,101 @@ SHARD_ITERATOR_TYPES = {
 }
 
 
+class RetryPolicy:
+    """Exponential backoff with jitter for throttled calls and unprocessed batch items.
+
+    The wait before each retry doubles, starting from ``base_delay`` and capped at ``max_delay``.  With ``jitter``
+    the actual wait is a random amount up to that value, so many clients throttled at once don't retry in lockstep.
+
+    .. code-block:: python
+
+        engine = Engine()
+        engine.session.retry_policy = RetryPolicy(max_attempts=5, deadline=2)
+
+    :param int max_attempts: Total calls for a single request, including the first.  Default is 10.
+    :param float base_delay: Seconds to wait before the first retry.  Default is 0.05.
+    :param float max_delay: Most seconds to wait before any one retry.  Default is 5.
+    :param bool jitter: Wait a random amount up to the computed delay.  Default is True.
+    :param float deadline: *(Optional)* Stop retrying a request this many seconds after its first call,
+        even if there are attempts left.  For batch loads and writes the deadline covers the whole batch: throttled
+        calls and unprocessed items share it.  Default is None.
+    """
+    def __init__(self, *, max_attempts=10, base_delay=0.05, max_delay=5.0, jitter=True, deadline=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+
+    def __repr__(self):
+        return "<{}[max_attempts={}, base_delay={}, deadline={}]>".format(
+            self.__class__.__name__, self.max_attempts, self.base_delay, self.deadline)
+
+    def delay(self, attempt):
+        """Seconds to wait after the given number of calls.
+
+        :param int attempt: Number of calls made so far.
+        :rtype: float
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def backoff(self, attempt, started):
+        """Wait before the next call.  Returns False without waiting if the request should be abandoned.
+
+        :param int attempt: Number of calls made so far.
+        :param float started: :func:`time.monotonic` just before the first call.
+        :return: True if the request should be sent again.
+        :rtype: bool
+        """
+        if attempt >= self.max_attempts:
+            return False
+        delay = self.delay(attempt)
+        if self.deadline is not None and (time.monotonic() - started + delay) > self.deadline:
+            return False
+        time.sleep(delay)
+        return True
+
+
 class SessionWrapper:
     """Provides a consistent interface to DynamoDb and DynamoDbStreams clients.
 
     If either client is None, that client is built using :func:`boto3.client`.
 
+    Calls that DynamoDB throttles, and unprocessed items from batch calls, are sent again according to
+    :attr:`~bloop.session.SessionWrapper.retry_policy`.
+
     :param dynamodb: A boto3 client for DynamoDB.  Defaults to ``boto3.client("dynamodb")``.
     :param dynamodbstreams: A boto3 client for DynamoDbStreams.  Defaults to ``boto3.client("dynamodbstreams")``.
+    :param retry_policy: *(Optional)* When and how often to retry.  Defaults to ``RetryPolicy()``.
+    :type retry_policy: :class:`~bloop.session.RetryPolicy`
     """
-    def __init__(self, dynamodb=None, dynamodbstreams=None):
+    def __init__(self, dynamodb=None, dynamodbstreams=None, retry_policy=None):
         dynamodb = dynamodb or boto3.client("dynamodb")
         dynamodbstreams = dynamodbstreams or boto3.client("dynamodbstreams")
 
         self.dynamodb_client = dynamodb
         self.stream_client = dynamodbstreams
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        # Thread pool for loading chunks concurrently, created on the first concurrent load and sized for the
+        # largest max_workers so far.  Shut down by close(), or when the session is collected.
+        self._executor = None
+        self._executor_workers = 0
+        self._executor_finalizer = None
+        self._executor_lock = threading.Lock()
 
     def save_item(self, item):
         """Save an object to DynamoDB.
 
         :param item: Unpacked into kwargs for :func:`boto3.DynamoDB.Client.update_item`.
+        :returns: The UpdateItem response.
         :raises bloop.exceptions.ConstraintViolation: if the condition (or atomic) is not met.
         """
         try:
-            self.dynamodb_client.update_item(**item)
+            return call_with_retries(self.retry_policy, self.dynamodb_client.update_item, item)
         except botocore.exceptions.ClientError as error:
             handle_constraint_violation(error)
 
@@ -64,33 +152,141 @@ class SessionWrapper:
         :raises bloop.exceptions.ConstraintViolation: if the condition (or atomic) is not met.
         """
         try:
-            self.dynamodb_client.delete_item(**item)
+            call_with_retries(self.retry_policy, self.dynamodb_client.delete_item, item)
         except botocore.exceptions.ClientError as error:
             handle_constraint_violation(error)
 
-    def load_items(self, items):
+    def load_items(self, items, *, max_workers=None, unprocessed=None):
         """Loads any number of items in chunks, handling continuation tokens.
 
+        Unprocessed keys are requested again according to the retry policy.  Keys that are still unprocessed
+        when the policy gives up are added to ``unprocessed``, or raise if it isn't given.
+
         :param items: Unpacked in chunks into "RequestItems" for :func:`boto3.DynamoDB.Client.batch_get_item`.
+        :param int max_workers: *(Optional)* Send up to this many chunks at once from the session's thread pool.
+            Responses are merged as each chunk completes.  A single chunk is always sent from the calling thread.
+            The pool is shared by every load and grows to the largest ``max_workers``; call :func:`close` to stop
+            its threads.  Must be None or a positive int.  Default is None (one chunk at a time).
+        :param dict unprocessed: *(Optional)* Collects the keys that were still unprocessed when the retry policy
+            gave up, in the same format as ``items``.  Default is None.
+        :raises ValueError: if ``max_workers`` isn't None or a positive int.
+        :raises bloop.exceptions.BloopException: if some keys weren't processed and ``unprocessed`` is None.
+        """
+        validate_max_workers(max_workers)
+        loaded_items, unprocessed_keys = {}, {}
+        # One deadline for the whole batch, across throttled calls and unprocessed keys
+        started = time.monotonic()
+        chunks = list(create_batch_get_chunks(items))
+        if max_workers is not None and max_workers > 1 and len(chunks) > 1:
+            # The pool may be larger than max_workers, so only keep max_workers chunks in flight
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= max_workers:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    merge_loaded_chunks(loaded_items, unprocessed_keys, done)
+                pending.add(self._submit(max_workers, self._load_chunk, chunk, started))
+            merge_loaded_chunks(loaded_items, unprocessed_keys, concurrent.futures.as_completed(pending))
+        else:
+            for chunk in chunks:
+                chunk_items, chunk_unprocessed = self._load_chunk(chunk, started)
+                merge_loaded_items(loaded_items, chunk_items)
+                merge_unprocessed_keys(unprocessed_keys, chunk_unprocessed)
+        if unprocessed_keys:
+            if unprocessed is None:
+                raise BloopException("Some keys were still unprocessed when the retry policy gave up.")
+            merge_unprocessed_keys(unprocessed, unprocessed_keys)
+        return loaded_items
+
+    def _submit(self, max_workers, fn, *args):
+        """Submit a call to the session's thread pool, growing the pool if it has fewer than max_workers threads.
+
+        Calls already submitted to a smaller pool still finish."""
+        with self._executor_lock:
+            if self._executor_workers < max_workers:
+                self._stop_executor(wait=False)
+                executor = self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+                self._executor_workers = max_workers
+                # Don't leave idle threads behind when the session is dropped without calling close()
+                self._executor_finalizer = weakref.finalize(self, executor.shutdown, wait=False)
+            return self._executor.submit(fn, *args)
+
+    def _stop_executor(self, wait):
+        executor, self._executor, self._executor_workers = self._executor, None, 0
+        if executor is not None:
+            self._executor_finalizer.detach()
+            self._executor_finalizer = None
+            executor.shutdown(wait=wait)
+
+    def close(self):
+        """Shut down the thread pool used to load chunks concurrently, if there is one.
+
+        Call this when you're done with the session; otherwise the pool's threads are only stopped when the session
+        is garbage collected.  Loading again starts a new pool.
+        """
+        with self._executor_lock:
+            self._stop_executor(wait=True)
+
+    def _load_chunk(self, request, started):
+        """Load a single chunk, including any unprocessed keys.  Safe to call from multiple threads.
+
+        Returns the loaded items, and the keys that were still unprocessed when the retry policy gave up.
         """
         loaded_items = {}
-        requests = collections.deque(create_batch_get_chunks(items))
-        while requests:
-            request = requests.pop()
+        attempt = 1
+        while request:
             try:
-                response = self.dynamodb_client.batch_get_item(RequestItems=request)
+                response = call_with_retries(
+                    self.retry_policy, self.dynamodb_client.batch_get_item, {"RequestItems": request},
+                    started=started)
             except botocore.exceptions.ClientError as error:
                 raise BloopException("Unexpected error while loading items.") from error
 
             # Accumulate results
-            for table_name, table_items in response.get("Responses", {}).items():
-                loaded_items.setdefault(table_name, []).extend(table_items)
+            merge_loaded_items(loaded_items, response.get("Responses", {}))
 
-            # Push additional request onto the deque.
             # "UnprocessedKeys" is {} if this request is done
-            if response["UnprocessedKeys"]:
-                requests.append(response["UnprocessedKeys"])
-        return loaded_items
+            request = response["UnprocessedKeys"]
+            if request and not self.retry_policy.backoff(attempt, started):
+                return loaded_items, request
+            attempt += 1
+        return loaded_items, {}
+
+    def write_items(self, items):
+        """Puts or deletes any number of items in chunks, re-sending unprocessed items.
+
+        Unprocessed items are sent again according to the retry policy.
+
+        :param items: Dict of table name to a list of "PutRequest" or "DeleteRequest" dicts.
+            Unpacked in chunks into "RequestItems" for :func:`boto3.DynamoDB.Client.batch_write_item`.
+        :return: Requests that were still unprocessed when the retry policy gave up, in the same format as ``items``.
+        :rtype: dict
+        """
+        unprocessed_items = {}
+        # One deadline for the whole batch, across throttled calls and unprocessed items
+        started = time.monotonic()
+        requests = collections.deque((chunk, 1) for chunk in create_batch_write_chunks(items))
+        while requests:
+            request, attempt = requests.pop()
+            try:
+                response = call_with_retries(
+                    self.retry_policy, self.dynamodb_client.batch_write_item, {"RequestItems": request},
+                    started=started)
+            except botocore.exceptions.ClientError as error:
+                raise BloopException("Unexpected error while writing items.") from error
+
+            # "UnprocessedItems" is {} if this request is done
+            unprocessed = response.get("UnprocessedItems")
+            if not unprocessed:
+                continue
+            # Push additional request onto the deque.
+            if self.retry_policy.backoff(attempt, started):
+                requests.append((unprocessed, attempt + 1))
+            # Out of attempts, let the caller decide what to do
+            else:
+                for table_name, table_requests in unprocessed.items():
+                    unprocessed_items.setdefault(table_name, []).extend(table_requests)
+        return unprocessed_items
 
     def query_items(self, request):
         """Wraps :func:`boto3.DynamoDB.Client.query`.
@@ -122,7 +318,7 @@ class SessionWrapper:
         validate_search_mode(mode)
         method = getattr(self.dynamodb_client, mode)
         try:
-            response = method(**request)
+            response = call_with_retries(self.retry_policy, method, request)
         except botocore.exceptions.ClientError as error:
             raise BloopException("Unexpected error during {}.".format(mode)) from error
         standardize_query_response(response)
@@ -182,7 +378,8 @@ class SessionWrapper:
 
         while request.get("ExclusiveStartShardId") is not missing:
             try:
-                response = self.stream_client.describe_stream(**request)["StreamDescription"]
+                response = call_with_retries(
+                    self.retry_policy, self.stream_client.describe_stream, request)["StreamDescription"]
             except botocore.exceptions.ClientError as error:
                 if error.response["Error"]["Code"] == "ResourceNotFoundException":
                     raise InvalidStream("The stream arn {!r} does not exist.".format(stream_arn)) from error
@@ -217,7 +414,8 @@ class SessionWrapper:
         if sequence_number is None:
             request.pop("SequenceNumber")
         try:
-            return self.stream_client.get_shard_iterator(**request)["ShardIterator"]
+            return call_with_retries(
+                self.retry_policy, self.stream_client.get_shard_iterator, request)["ShardIterator"]
         except botocore.exceptions.ClientError as error:
             if error.response["Error"]["Code"] == "TrimmedDataAccessException":
                 raise RecordsExpired from error
@@ -233,7 +431,8 @@ class SessionWrapper:
         :raises bloop.exceptions.ShardIteratorExpired: The iterator was created more than 15 minutes ago.
         """
         try:
-            return self.stream_client.get_records(ShardIterator=iterator_id)
+            return call_with_retries(
+                self.retry_policy, self.stream_client.get_records, {"ShardIterator": iterator_id})
         except botocore.exceptions.ClientError as error:
             if error.response["Error"]["Code"] == "TrimmedDataAccessException":
                 raise RecordsExpired from error
@@ -242,6 +441,32 @@ class SessionWrapper:
             raise BloopException("Unexpected error while getting records.") from error
 
 
+def call_with_retries(retry_policy, method, request, *, started=None):
+    """Invoke a client method, sending the request again while it's throttled and the policy allows.
+
+    ``started`` is the :func:`time.monotonic` the policy's deadline is measured from.  Defaults to now.
+    """
+    attempt = 0
+    if started is None:
+        started = time.monotonic()
+    while True:
+        attempt += 1
+        try:
+            return method(**request)
+        except botocore.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                raise
+            if not retry_policy.backoff(attempt, started):
+                raise
+
+
+def validate_max_workers(max_workers):
+    # bool is an int, but True workers is almost certainly a mistake
+    if max_workers is not None and (
+            not isinstance(max_workers, int) or isinstance(max_workers, bool) or max_workers < 1):
+        raise ValueError("max_workers must be None or a positive int, not {!r}.".format(max_workers))
+
+
 def validate_search_mode(mode):
     if mode not in {"query", "scan"}:
         raise InvalidSearchMode("{!r} is not a valid search mode.".format(mode))
@@ -277,6 +502,27 @@ def standardize_query_response(response):
     response["ScannedCount"] = response.get("ScannedCount", count)
 
 
+def merge_loaded_items(loaded_items, response):
+    for table_name, table_items in response.items():
+        loaded_items.setdefault(table_name, []).extend(table_items)
+
+
+def merge_unprocessed_keys(unprocessed_keys, request):
+    for table_name, table_request in request.items():
+        table = unprocessed_keys.get(table_name, None)
+        if table is None:
+            table = unprocessed_keys[table_name] = dict(table_request, Keys=[])
+        table["Keys"].extend(table_request["Keys"])
+
+
+def merge_loaded_chunks(loaded_items, unprocessed_keys, futures):
+    """Merge the (loaded items, unprocessed keys) of each completed :func:`SessionWrapper._load_chunk` future"""
+    for future in futures:
+        chunk_items, chunk_unprocessed = future.result()
+        merge_loaded_items(loaded_items, chunk_items)
+        merge_unprocessed_keys(unprocessed_keys, chunk_unprocessed)
+
+
 def create_batch_get_chunks(items):
     buffer, count = {}, 0
     for table_name, table_attrs in items.items():
@@ -299,6 +545,26 @@ def create_batch_get_chunks(items):
     if buffer:
         yield buffer
 
+
+def create_batch_write_chunks(items):
+    buffer, count = {}, 0
+    for table_name, table_requests in items.items():
+        for write_request in table_requests:
+            # New table name?
+            table = buffer.get(table_name, None)
+            if table is None:
+                table = buffer[table_name] = []
+
+            table.append(write_request)
+            count += 1
+            if count >= BATCH_WRITE_ITEM_CHUNK_SIZE:
+                yield buffer
+                buffer, count = {}, 0
+
+    # Last chunk, less than batch_size items
+    if buffer:
+        yield buffer
+
 # TABLE HELPERS ======================================================================================== TABLE HELPERS
 
 
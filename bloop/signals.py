@@ -35,6 +35,7 @@ object_loaded.__doc__ = """Sent by ``engine`` after an object is loaded from Dyn
 
 :param engine: The :class:`~bloop.engine.Engine` that loaded the object.
 :param obj: The :class:`~bloop.models.BaseModel` loaded from DynamoDB.
+:param attrs: The item's attributes, in DynamoDB's wire format.  Don't modify these.
 """
 
 object_saved = signal("object_saved")
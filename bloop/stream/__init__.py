@@ -1,4 +1,9 @@
+from .checkpoint import Checkpoint, CheckpointStore, FileCheckpointStore, SQLiteCheckpointStore
+from .lease import ConsumerGroup, LeaseStore, MemoryLeaseStore, SQLiteLeaseStore
 from .stream import Stream
 
 
-__all__ = ["Stream"]
+__all__ = [
+    "Checkpoint", "CheckpointStore", "ConsumerGroup", "FileCheckpointStore", "LeaseStore", "MemoryLeaseStore",
+    "SQLiteCheckpointStore", "SQLiteLeaseStore", "Stream"
+]
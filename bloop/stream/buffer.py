@@ -1,3 +1,4 @@
+import collections
 import heapq
 import random
 
@@ -27,48 +28,70 @@ def heap_item(clock, record, shard):
 class RecordBuffer:
     """Maintains a total ordering for records across any number of shards.
 
-    Methods are thin wrappers around :mod:`heapq`.  Buffer entries have the form:
+    Records within a shard are already ordered, so each shard's records are kept in a FIFO and only the oldest
+    record from each shard is in the heap.  Heap entries have the form:
 
     .. code-block: python
 
         (total_ordering, record, shard)
 
     where ``total_ordering`` is a tuple of ``(created_at, sequence_number, monotomic_clock)`` created from each
-    record as it is inserted.
+    record as it becomes the oldest buffered record for its shard.  Merging costs depend on the number of shards,
+    not the number of buffered records.
     """
     def __init__(self):
+        # The oldest buffered record from each shard
         self.heap = []
 
+        # Records after the head of each shard, by id(shard).  Shards aren't hashable.
+        # A shard has a FIFO here exactly when it has an entry in the heap.
+        self._queues = {}
+        self._size = 0
+
         # Used by the total ordering clock
         self.__monotonic_integer = 0
 
     def push(self, record, shard):
-        """Push a new record into the buffer
+        """Push a new record into the buffer.  Records from the same shard must be pushed in order.
 
         :param dict record: new record
         :param shard: Shard the record came from
         :type shard: :class:`~bloop.stream.shard.Shard`
         """
-        heapq.heappush(self.heap, heap_item(self.clock, record, shard))
+        if self._enqueue(record, shard):
+            heapq.heappush(self.heap, heap_item(self.clock, record, shard))
 
     def push_all(self, record_shard_pairs):
-        """Push multiple (record, shard) pairs at once, with only one :meth:`heapq.heapify` call to maintain order.
+        """Push multiple (record, shard) pairs at once, with at most one :meth:`heapq.heapify` call to maintain order.
 
         :param record_shard_pairs: list of ``(record, shard)`` tuples
             (see :func:`~bloop.stream.buffer.RecordBuffer.push`).
         """
-        # Faster than inserting one at a time; the heap is sorted once after all inserts.
+        # Only records that start a new shard FIFO enter the heap, and it's sorted once after all inserts.
+        new_heads = False
         for record, shard in record_shard_pairs:
-            item = heap_item(self.clock, record, shard)
-            self.heap.append(item)
-        heapq.heapify(self.heap)
+            if self._enqueue(record, shard):
+                self.heap.append(heap_item(self.clock, record, shard))
+                new_heads = True
+        if new_heads:
+            heapq.heapify(self.heap)
 
     def pop(self):
         """Pop the oldest (lowest total ordering) record and the shard it came from.
 
         :return: Oldest ``(record, shard)`` tuple.
         """
-        return heapq.heappop(self.heap)[1:]
+        item = self.heap[0]
+        shard = item[2]
+        queue = self._queues[id(shard)]
+        if queue:
+            # The shard's next record takes its place
+            heapq.heapreplace(self.heap, heap_item(self.clock, queue.popleft(), shard))
+        else:
+            heapq.heappop(self.heap)
+            del self._queues[id(shard)]
+        self._size -= 1
+        return item[1:]
 
     def peek(self):
         """A :func:`~bloop.stream.buffer.RecordBuffer.pop` without removing the (record, shard) from the buffer.
@@ -77,12 +100,39 @@ class RecordBuffer:
         """
         return self.heap[0][1:]
 
+    def drop_shard(self, shard):
+        """Drop every buffered record from a shard.
+
+        Only the shard's entry in the heap is searched for; the rest of its records are dropped with its FIFO.
+
+        :param shard: Shard whose records should be dropped
+        :type shard: :class:`~bloop.stream.shard.Shard`
+        """
+        queue = self._queues.pop(id(shard), None)
+        if queue is None:
+            return
+        self._size -= len(queue) + 1
+        self.heap[:] = [item for item in self.heap if item[2] is not shard]
+        heapq.heapify(self.heap)
+
     def clear(self):
         """Drop the entire buffer."""
         self.heap.clear()
+        self._queues.clear()
+        self._size = 0
 
     def __len__(self):
-        return len(self.heap)
+        return self._size
+
+    def _enqueue(self, record, shard):
+        """Append the record to its shard's FIFO.  True if it's the shard's only record, and needs a heap entry."""
+        self._size += 1
+        queue = self._queues.get(id(shard))
+        if queue is None:
+            self._queues[id(shard)] = collections.deque()
+            return True
+        queue.append(record)
+        return False
 
     def clock(self):
         """Returns a monotonically increasing integer.
@@ -0,0 +1,269 @@
+import json
+import os
+import sqlite3
+import time
+
+
+__all__ = ["Checkpoint", "CheckpointStore", "FileCheckpointStore", "SQLiteCheckpointStore"]
+
+
+def build_token(stream_arn, active, shard_tokens):
+    """Build a :attr:`Stream.token <bloop.stream.Stream.token>` from stored shard tokens.
+
+    Parents that are no longer stored (exhausted and removed from the stream) are dropped from their children.
+
+    :param str stream_arn: Stream arn the shards belong to.
+    :param list active: Ids of the active shards.
+    :param dict shard_tokens: Shard tokens by shard id, without their "stream_arn".
+    :returns: Stream state as a json-friendly dict
+    :rtype: dict
+    """
+    shards = []
+    for shard_token in shard_tokens.values():
+        shard_token = dict(shard_token)
+        if shard_token.get("parent") not in shard_tokens:
+            shard_token.pop("parent", None)
+        shards.append(shard_token)
+    return {
+        "stream_arn": stream_arn,
+        "active": [shard_id for shard_id in active if shard_id in shard_tokens],
+        "shards": shards
+    }
+
+
+def in_stream(shard, roots):
+    """True if the shard is a root, or descends from one.
+
+    :param shard: The shard to check.
+    :param set roots: Ids of the coordinator's root shards.
+    """
+    while shard is not None:
+        if shard.shard_id in roots:
+            return True
+        shard = shard.parent
+    return False
+
+
+class CheckpointStore:
+    """Durable storage for the position of one or more streams.
+
+    A :class:`~bloop.stream.checkpoint.Checkpoint` only passes the shards that changed since its last flush to
+    :func:`save`.  How much is written depends on the store: :class:`SQLiteCheckpointStore` writes those rows,
+    while :class:`FileCheckpointStore` rewrites the whole file.
+    """
+    def load(self, stream_arn):
+        """The stored position of the stream, or None if nothing has been saved for the stream.
+
+        :param str stream_arn: Stream arn to load.
+        :returns: A :attr:`Stream.token <bloop.stream.Stream.token>`, or None.
+        """
+        raise NotImplementedError
+
+    def save(self, stream_arn, active, updated, removed):
+        """Atomically update the stored position of the stream.
+
+        :param str stream_arn: Stream arn to save.
+        :param list active: Ids of the active shards.
+        :param dict updated: Shard tokens by shard id for new or changed shards, without their "stream_arn".
+        :param removed: Ids of shards that are no longer part of the stream.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+        pass
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Stores stream positions in a json file.
+
+    Every save rewrites the whole file, including streams and shards that didn't change.  The file is written to
+    a temporary file and moved into place with :func:`os.replace`, so a crash never leaves it partially written.
+    Prefer :class:`SQLiteCheckpointStore` for streams with many shards or frequent flushes.
+
+    :param str path: Location of the json file.  Created on the first save.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._streams = None
+
+    def __repr__(self):
+        return "<{}[{!r}]>".format(self.__class__.__name__, self.path)
+
+    def _read(self):
+        if self._streams is None:
+            try:
+                with open(self.path, "r") as file:
+                    self._streams = json.load(file)
+            except FileNotFoundError:
+                self._streams = {}
+        return self._streams
+
+    def load(self, stream_arn):
+        stream = self._read().get(stream_arn)
+        if stream is None:
+            return None
+        return build_token(stream_arn, stream["active"], stream["shards"])
+
+    def save(self, stream_arn, active, updated, removed):
+        stream = self._read().setdefault(stream_arn, {"active": [], "shards": {}})
+        stream["active"] = list(active)
+        stream["shards"].update(updated)
+        for shard_id in removed:
+            stream["shards"].pop(shard_id, None)
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self._streams, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Stores stream positions in a SQLite database, with one row for each shard.
+
+    Saves only write the rows of shards that changed, in a single transaction.
+
+    :param str path: Location of the database, or ":memory:".  Tables are created if they don't exist.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS bloop_streams ("
+                "stream_arn TEXT PRIMARY KEY, active TEXT NOT NULL)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS bloop_shards ("
+                "stream_arn TEXT NOT NULL, shard_id TEXT NOT NULL, token TEXT NOT NULL, "
+                "PRIMARY KEY (stream_arn, shard_id))")
+
+    def __repr__(self):
+        return "<{}[{!r}]>".format(self.__class__.__name__, self.path)
+
+    def load(self, stream_arn):
+        row = self.connection.execute(
+            "SELECT active FROM bloop_streams WHERE stream_arn = ?", (stream_arn,)).fetchone()
+        if row is None:
+            return None
+        shard_tokens = {
+            shard_id: json.loads(token)
+            for shard_id, token in self.connection.execute(
+                "SELECT shard_id, token FROM bloop_shards WHERE stream_arn = ?", (stream_arn,))}
+        return build_token(stream_arn, json.loads(row[0]), shard_tokens)
+
+    def save(self, stream_arn, active, updated, removed):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO bloop_streams (stream_arn, active) VALUES (?, ?)",
+                (stream_arn, json.dumps(list(active))))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO bloop_shards (stream_arn, shard_id, token) VALUES (?, ?, ?)",
+                [(stream_arn, shard_id, json.dumps(token)) for shard_id, token in updated.items()])
+            self.connection.executemany(
+                "DELETE FROM bloop_shards WHERE stream_arn = ? AND shard_id = ?",
+                [(stream_arn, shard_id) for shard_id in removed])
+
+    def close(self):
+        self.connection.close()
+
+
+class Checkpoint:
+    """Periodically saves a stream's position to a :class:`~bloop.stream.checkpoint.CheckpointStore`.
+
+    The position is flushed after every ``records`` records or ``seconds`` seconds, whichever comes first.
+    Each flush only saves the shards whose position changed since the last flush, and forgets shards that
+    were removed from the stream.  The coordinator tracks which shards changed, so a flush doesn't walk the
+    whole shard tree unless the stream was moved.
+
+    A record counts as processed once the next record is requested, so at most ``records`` records (or
+    ``seconds`` seconds of records) are returned again after resuming from a crash.
+
+    :param store: Where the stream's position is saved.
+    :type store: :class:`~bloop.stream.checkpoint.CheckpointStore`
+    :param int records: *(Optional)* Flush after this many records.  Default is 1000.
+    :param float seconds: *(Optional)* Flush when this many seconds have passed since the last flush.
+        Default is 30.
+    """
+    def __init__(self, store, *, records=1000, seconds=30.0):
+        self.store = store
+        self.records = records
+        self.seconds = seconds
+
+        # shard_id -> (iterator_type, sequence_number, parent id) as of the last flush
+        self._flushed = {}
+        self._active = None
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def __repr__(self):
+        return "<{}[{!r}]>".format(self.__class__.__name__, self.store)
+
+    def load(self, stream_arn):
+        """The stored position of the stream, or None.  See :func:`CheckpointStore.load`.
+
+        The next flush compares against the stored shards, so unchanged shards aren't saved again and stored
+        shards that are no longer part of the stream are removed.
+        """
+        token = self.store.load(stream_arn)
+        self._flushed.clear()
+        self._active = None
+        if token is not None:
+            for shard_token in token["shards"]:
+                self._flushed[shard_token["shard_id"]] = (
+                    shard_token.get("iterator_type"), shard_token.get("sequence_number"), shard_token.get("parent"))
+            self._active = token["active"]
+        return token
+
+    def returned(self):
+        """Count a record returned from the stream.  It's processed once the next record is requested."""
+        self._pending += 1
+
+    def maybe_flush(self, coordinator):
+        """Flush the coordinator's position if enough records or time have passed since the last flush."""
+        if self._pending >= self.records or time.monotonic() - self._last_flush >= self.seconds:
+            self.flush(coordinator)
+
+    def flush(self, coordinator):
+        """Save the position of every shard that changed since the last flush.
+
+        :param coordinator: The coordinator of the stream being saved.
+        :type coordinator: :class:`~bloop.stream.coordinator.Coordinator`
+        """
+        roots = {root.shard_id for root in coordinator.roots}
+        changed = coordinator.changed
+        if changed is None:
+            # The stream was moved, so any shard may have changed
+            changed = {shard.shard_id: shard for root in coordinator.roots for shard in root.walk_tree()}
+            removed = [shard_id for shard_id in self._flushed if shard_id not in changed]
+        else:
+            removed = [
+                shard_id for shard_id, shard in changed.items()
+                if shard_id in self._flushed and not in_stream(shard, roots)]
+
+        states, updated = {}, {}
+        for shard_id, shard in changed.items():
+            if not in_stream(shard, roots):
+                continue
+            # Exhausted parents are removed from the stream, but their children still reference them
+            parent = shard.parent.shard_id if in_stream(shard.parent, roots) else None
+            state = (shard.iterator_type, shard.sequence_number, parent)
+            if self._flushed.get(shard_id) != state:
+                states[shard_id] = state
+                token = updated[shard_id] = shard.token
+                token.pop("stream_arn")
+                if parent is None:
+                    token.pop("parent", None)
+        active = [shard.shard_id for shard in coordinator.active]
+
+        if updated or removed or active != self._active:
+            self.store.save(coordinator.stream_arn, active, updated, removed)
+        # Only forget the changes once they're saved, so the next flush retries a failed save
+        self._flushed.update(states)
+        for shard_id in removed:
+            del self._flushed[shard_id]
+        self._active = active
+        coordinator.changed = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
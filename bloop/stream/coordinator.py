@@ -1,5 +1,6 @@
 import collections
 import collections.abc
+import concurrent.futures
 import datetime
 
 from ..exceptions import InvalidPosition, InvalidStream, RecordsExpired
@@ -13,14 +14,22 @@ class Coordinator:
     :param session: Used to make DynamoDBStreams calls.
     :type session: :class:`~bloop.session.SessionWrapper`
     :param str stream_arn: Stream arn, usually from the model's ``Meta.stream["arn"]``.
+    :param int max_workers: *(Optional)* Poll up to this many shards at once from a thread pool.
+        Default is None (one shard at a time).
     """
-    def __init__(self, *, session, stream_arn):
+    def __init__(self, *, session, stream_arn, max_workers=None):
 
         self.session = session
 
         # The stream that's being coordinated
         self.stream_arn = stream_arn
 
+        # Upper bound on threads used to poll active shards
+        self.max_workers = max_workers
+
+        # Thread pool for polling shards concurrently, created on the first concurrent poll.  See close()
+        self._executor = None
+
         # The oldest shards in each shard tree (no parents)
         self.roots = []
 
@@ -38,6 +47,10 @@ class Coordinator:
         # Shards aren't advanced again until the buffer drains completely.
         self.buffer = RecordBuffer()
 
+        # Shards whose position or place in the stream changed since the last checkpoint flush, by shard id.
+        # None until the first flush and after moving the stream, so the next flush checks every shard.
+        self.changed = None
+
     def __repr__(self):
         # <Coordinator[.../StreamCreation-travis-661.2/stream/2016-10-03T06:17:12.741]>
         return "<{}[{}]>".format(self.__class__.__name__, self.stream_arn)
@@ -51,15 +64,18 @@ class Coordinator:
 
         if self.buffer:
             record, shard = self.buffer.pop()
-
-            # Now that the record is "consumed", advance the shard's checkpoint
-            shard.sequence_number = record["meta"]["sequence_number"]
-            shard.iterator_type = "after_sequence"
+            self._consume(record, shard)
             return record
 
         # No records :(
         return None
 
+    def _consume(self, record, shard):
+        # Now that the record is "consumed", advance the shard's checkpoint
+        shard.sequence_number = record["meta"]["sequence_number"]
+        shard.iterator_type = "after_sequence"
+        self._mark_changed(shard)
+
     def advance_shards(self):
         """Poll active shards for records and insert them into the buffer.  Rotate exhausted shards.
 
@@ -69,28 +85,78 @@ class Coordinator:
         if self.buffer:
             return
 
-        # 0) Collect new records from all active shards.
+        # 0) Collect new records from all active shards.  Shards that were polled have already moved their
+        #    iterators, so their records are buffered even when another shard raises.
+        polled, error = self._poll(self.active)
         record_shard_pairs = []
-        for shard in self.active:
-            records = next(shard)
+        for shard, records in polled:
             if records:
+                # The first records give a shard without a sequence_number its position
+                self._mark_changed(shard)
                 record_shard_pairs.extend((record, shard) for record in records)
         self.buffer.push_all(record_shard_pairs)
+        if error is not None:
+            raise error
 
         self._handle_exhausted()
 
     def heartbeat(self):
         """Keep active shards with "trim_horizon", "latest" iterators alive by advancing their iterators."""
-        for shard in self.active:
-            if shard.sequence_number is None:
-                records = next(shard)
-                # Success!  This shard now has an ``at_sequence`` iterator
-                if records:
-                    self.buffer.push_all((record, shard) for record in records)
+        to_poll = [shard for shard in self.active if shard.sequence_number is None]
+        polled, error = self._poll(to_poll)
+        for shard, records in polled:
+            # Success!  This shard now has an ``at_sequence`` iterator
+            if records:
+                self._mark_changed(shard)
+                self.buffer.push_all((record, shard) for record in records)
+        if error is not None:
+            raise error
         self._handle_exhausted()
 
+    def _poll(self, shards):
+        """Returns ``(polled, error)``: a list of (shard, next(shard)) for each shard that was polled, in the same
+        order as shards, and the first error (in the order of shards) or None.
+
+        Each shard only updates its own iterator, so shards are polled concurrently when max_workers allows.
+        Every shard is polled even if one raises.  One at a time, polling stops at the first error so the
+        remaining shards keep their iterators.  Concurrent polls share one thread pool of up to max_workers threads.
+        """
+        shards = list(shards)
+        polled = []
+        workers = min(self.max_workers or 1, len(shards))
+        if workers <= 1:
+            for shard in shards:
+                try:
+                    polled.append((shard, next(shard)))
+                except Exception as error:
+                    return polled, error
+            return polled, None
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = [(shard, self._executor.submit(next, shard)) for shard in shards]
+        concurrent.futures.wait([future for _, future in futures])
+        error = None
+        for shard, future in futures:
+            if future.exception() is None:
+                polled.append((shard, future.result()))
+            elif error is None:
+                error = future.exception()
+        return polled, error
+
+    def close(self):
+        """Shut down the thread pool used to poll shards, if there is one.  Polling again starts a new pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _mark_changed(self, shard):
+        if self.changed is not None:
+            self.changed[shard.shard_id] = shard
+
     def _handle_exhausted(self):
         # 1) Clean up exhausted Shards.  Can't modify the active list while iterating it.
+        #    remove_shard marks the shard and its children changed for the next checkpoint flush.
         to_remove = [shard for shard in self.active if shard.exhausted]
         for shard in to_remove:
             shard.load_children()
@@ -144,12 +210,13 @@ class Coordinator:
         else:
             self.active.extend(shard.children)
 
-        # TODO can this be improved?  Gets expensive for high-volume streams with large buffers
-        heap = self.buffer.heap
-        # Clear buffered records from the shard.  Each record is (ordering, record, shard)
-        to_remove = [x for x in heap if x[2] is shard]
-        for x in to_remove:
-            heap.remove(x)
+        # Clear buffered records from the shard.
+        self.buffer.drop_shard(shard)
+
+        # The shard may have left the stream, and its children may have lost their parent
+        self._mark_changed(shard)
+        for child in shard.children:
+            self._mark_changed(child)
 
     def move_to(self, position):
         """Set the Coordinator to a specific endpoint or time, or load state from a token.
@@ -165,6 +232,7 @@ class Coordinator:
             move = _move_stream_endpoint
         else:
             raise InvalidPosition("Don't know how to move to position {!r}".format(position))
+        self.changed = None
         move(self, position)
 
 
@@ -0,0 +1,428 @@
+import collections
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from ..exceptions import InvalidPosition, RecordsExpired
+from .coordinator import Coordinator
+from .shard import unpack_shards
+
+
+__all__ = ["ConsumerGroup", "Lease", "LeaseStore", "MemoryLeaseStore", "SQLiteLeaseStore"]
+
+
+Lease = collections.namedtuple("Lease", ["shard_id", "owner", "expires", "token", "finished"])
+Lease.__doc__ = """A worker's claim on one shard of a stream.
+
+* ``owner`` is the id of the worker holding the lease, or None.
+* ``expires`` is the :func:`time.time` when the lease can be taken by another worker.
+* ``token`` is the shard's last saved position, ``{"iterator_type": ..., "sequence_number": ...}``, or None.
+* ``finished`` is True once every record in the shard has been processed.
+"""
+
+
+def lease_available(lease, owner, now):
+    """True if the owner can take the lease: it's unfinished and free, expired, or already held by the owner"""
+    return not lease.finished and (lease.owner is None or lease.owner == owner or lease.expires <= now)
+
+
+def shard_position(shard):
+    return {"iterator_type": shard.iterator_type, "sequence_number": shard.sequence_number}
+
+
+class LeaseStore:
+    """Shared table of shard leases, and the workers that hold them.
+
+    Every method must be atomic, since workers in other threads or processes use the same table.
+    Times are from :func:`time.time`, so workers on different hosts should keep their clocks in sync.
+    """
+    def leases(self, stream_arn):
+        """Every lease of the stream.
+
+        :param str stream_arn: Stream arn the shards belong to.
+        :returns: Leases by shard id
+        :rtype: Dict[str, :class:`~bloop.stream.lease.Lease`]
+        """
+        raise NotImplementedError
+
+    def acquire(self, stream_arn, shard_id, owner, *, now, expires):
+        """Take the lease for a shard if it's available, creating it if it doesn't exist.
+
+        :returns: The new lease, or None if the shard is finished or another worker holds the lease.
+        :rtype: :class:`~bloop.stream.lease.Lease`
+        """
+        raise NotImplementedError
+
+    def renew(self, stream_arn, shard_id, owner, *, expires, token):
+        """Extend a lease and save the shard's position.
+
+        :returns: False if the owner no longer holds the lease.
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    def release(self, stream_arn, shard_id, owner, *, token=None, finished=False):
+        """Give up a lease held by the owner, saving the shard's position (if provided) for the next owner.
+
+        Release a finished shard with ``finished=True`` so its children can be leased.
+        """
+        raise NotImplementedError
+
+    def finish(self, stream_arn, shard_id):
+        """Mark a shard that was never leased as finished, so the group skips it.  Does nothing if it was leased."""
+        raise NotImplementedError
+
+    def register(self, stream_arn, owner, *, expires):
+        """Record that the owner is consuming the stream until ``expires``."""
+        raise NotImplementedError
+
+    def owners(self, stream_arn, *, now):
+        """The ids of workers whose registration hasn't expired.
+
+        :rtype: set
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+        pass
+
+
+class MemoryLeaseStore(LeaseStore):
+    """Keeps leases in memory, for consumer groups whose workers are threads of one process."""
+    def __init__(self):
+        self._leases = {}
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def leases(self, stream_arn):
+        with self._lock:
+            return {shard_id: lease for (arn, shard_id), lease in self._leases.items() if arn == stream_arn}
+
+    def acquire(self, stream_arn, shard_id, owner, *, now, expires):
+        with self._lock:
+            lease = self._leases.get((stream_arn, shard_id), Lease(shard_id, None, 0, None, False))
+            if not lease_available(lease, owner, now):
+                return None
+            lease = self._leases[(stream_arn, shard_id)] = lease._replace(owner=owner, expires=expires)
+            return lease
+
+    def renew(self, stream_arn, shard_id, owner, *, expires, token):
+        with self._lock:
+            lease = self._leases.get((stream_arn, shard_id))
+            if lease is None or lease.owner != owner or lease.finished:
+                return False
+            self._leases[(stream_arn, shard_id)] = lease._replace(expires=expires, token=token)
+            return True
+
+    def release(self, stream_arn, shard_id, owner, *, token=None, finished=False):
+        with self._lock:
+            lease = self._leases.get((stream_arn, shard_id))
+            if lease is None or lease.owner != owner:
+                return
+            self._leases[(stream_arn, shard_id)] = lease._replace(
+                owner=None, expires=0, token=lease.token if token is None else token, finished=finished)
+
+    def finish(self, stream_arn, shard_id):
+        with self._lock:
+            self._leases.setdefault((stream_arn, shard_id), Lease(shard_id, None, 0, None, True))
+
+    def register(self, stream_arn, owner, *, expires):
+        with self._lock:
+            self._owners[(stream_arn, owner)] = expires
+
+    def owners(self, stream_arn, *, now):
+        with self._lock:
+            return {owner for (arn, owner), expires in self._owners.items() if arn == stream_arn and expires > now}
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """Keeps leases in a SQLite database, for consumer groups whose workers are processes on one host.
+
+    :param str path: Location of the database.  Tables are created if they don't exist.
+    :param float timeout: *(Optional)* Seconds to wait while another worker is writing.  Default is 5.
+    """
+    def __init__(self, path, *, timeout=5.0):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS bloop_leases ("
+                "stream_arn TEXT NOT NULL, shard_id TEXT NOT NULL, owner TEXT, expires REAL NOT NULL, "
+                "token TEXT, finished INTEGER NOT NULL, PRIMARY KEY (stream_arn, shard_id))")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS bloop_lease_owners ("
+                "stream_arn TEXT NOT NULL, owner TEXT NOT NULL, expires REAL NOT NULL, "
+                "PRIMARY KEY (stream_arn, owner))")
+
+    def __repr__(self):
+        return "<{}[{!r}]>".format(self.__class__.__name__, self.path)
+
+    def leases(self, stream_arn):
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT shard_id, owner, expires, token, finished FROM bloop_leases WHERE stream_arn = ?",
+                (stream_arn,)).fetchall()
+        return {row[0]: _lease_from_row(row) for row in rows}
+
+    def acquire(self, stream_arn, shard_id, owner, *, now, expires):
+        # The insert and update run in one transaction, which holds the database's write lock
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO bloop_leases (stream_arn, shard_id, owner, expires, token, finished) "
+                "VALUES (?, ?, NULL, 0, NULL, 0)", (stream_arn, shard_id))
+            cursor = self.connection.execute(
+                "UPDATE bloop_leases SET owner = ?, expires = ? "
+                "WHERE stream_arn = ? AND shard_id = ? AND finished = 0 "
+                "AND (owner IS NULL OR owner = ? OR expires <= ?)",
+                (owner, expires, stream_arn, shard_id, owner, now))
+            if cursor.rowcount != 1:
+                return None
+            row = self.connection.execute(
+                "SELECT shard_id, owner, expires, token, finished FROM bloop_leases "
+                "WHERE stream_arn = ? AND shard_id = ?", (stream_arn, shard_id)).fetchone()
+        return _lease_from_row(row)
+
+    def renew(self, stream_arn, shard_id, owner, *, expires, token):
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                "UPDATE bloop_leases SET expires = ?, token = ? "
+                "WHERE stream_arn = ? AND shard_id = ? AND owner = ? AND finished = 0",
+                (expires, json.dumps(token), stream_arn, shard_id, owner))
+        return cursor.rowcount == 1
+
+    def release(self, stream_arn, shard_id, owner, *, token=None, finished=False):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE bloop_leases SET owner = NULL, expires = 0, token = COALESCE(?, token), finished = ? "
+                "WHERE stream_arn = ? AND shard_id = ? AND owner = ?",
+                (None if token is None else json.dumps(token), int(finished), stream_arn, shard_id, owner))
+
+    def finish(self, stream_arn, shard_id):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO bloop_leases (stream_arn, shard_id, owner, expires, token, finished) "
+                "VALUES (?, ?, NULL, 0, NULL, 1)", (stream_arn, shard_id))
+
+    def register(self, stream_arn, owner, *, expires):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO bloop_lease_owners (stream_arn, owner, expires) VALUES (?, ?, ?)",
+                (stream_arn, owner, expires))
+
+    def owners(self, stream_arn, *, now):
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT owner FROM bloop_lease_owners WHERE stream_arn = ? AND expires > ?",
+                (stream_arn, now)).fetchall()
+        return {row[0] for row in rows}
+
+    def close(self):
+        self.connection.close()
+
+
+def _lease_from_row(row):
+    shard_id, owner, expires, token, finished = row
+    return Lease(shard_id, owner, expires, None if token is None else json.loads(token), bool(finished))
+
+
+class ConsumerGroup:
+    """Shares one stream between workers, by leasing each shard to one worker at a time.
+
+    Each worker creates a stream with its own ConsumerGroup over the same store.  Workers divide the shards evenly
+    every :func:`Stream.heartbeat <bloop.stream.Stream.heartbeat>`, and save each shard's position to its lease
+    so the next owner continues from there.  When a worker finishes a shard, it's the first to try leasing the
+    shard's children.
+
+    :param store: The lease table shared by every worker.
+    :type store: :class:`~bloop.stream.lease.LeaseStore`
+    :param str owner: *(Optional)* Unique id of this worker.  Default is a random id.
+    :param float lease_seconds: *(Optional)* How long a worker holds its leases after each heartbeat.  Workers
+        must heartbeat more often than this.  Default is 60.
+    """
+    def __init__(self, store, *, owner=None, lease_seconds=60.0):
+        self.store = store
+        self.owner = owner or uuid.uuid4().hex
+        self.lease_seconds = lease_seconds
+
+    def __repr__(self):
+        return "<{}[{}]>".format(self.__class__.__name__, self.owner)
+
+
+class LeasedCoordinator(Coordinator):
+    """A :class:`~bloop.stream.coordinator.Coordinator` that only reads the shards this worker has leased.
+
+    ``roots`` holds the stream's whole shard tree, while ``active`` only holds the leased shards.
+
+    :param session: Used to make DynamoDBStreams calls.
+    :type session: :class:`~bloop.session.SessionWrapper`
+    :param str stream_arn: Stream arn, usually from the model's ``Meta.stream["arn"]``.
+    :param group: The consumer group this worker belongs to.
+    :type group: :class:`~bloop.stream.lease.ConsumerGroup`
+    :param int max_workers: *(Optional)* Poll up to this many shards at once from a thread pool.
+        Default is None (one shard at a time).
+    """
+    def __init__(self, *, session, stream_arn, group, max_workers=None):
+        super().__init__(session=session, stream_arn=stream_arn, max_workers=max_workers)
+        self.group = group
+
+        # Shards that were open when the group moved to "latest".  Without a saved position, these
+        # start at "latest" instead of "trim_horizon".
+        self._latest = set()
+
+        # (shard, position before the record) for the last record returned.  It's processed once the next record
+        # is requested; until then, its shard's lease keeps the position before it.  See _processed_position
+        self._in_flight = None
+
+    def __repr__(self):
+        return "<{}[{}, owner={}]>".format(self.__class__.__name__, self.stream_arn, self.group.owner)
+
+    def __next__(self):
+        # The record returned by the last call has been processed once the next one is requested
+        self._in_flight = None
+        return super().__next__()
+
+    def heartbeat(self):
+        """Keep iterators alive, renew this worker's leases, and rebalance shards across the group."""
+        super().heartbeat()
+        self.rebalance()
+
+    def move_to(self, position):
+        """Rebuild the shard tree and lease this worker's share of the shards.
+
+        Shards with a saved position continue from it.  Other shards start at ``position``.  When the group is
+        already running (any shard has a lease), "latest" joins the group without skipping any shards.
+
+        :param str position: "trim_horizon" or "latest"
+        :raises bloop.exceptions.InvalidPosition: for any other position.
+        """
+        if not isinstance(position, str) or position.lower() not in ["latest", "trim_horizon"]:
+            raise InvalidPosition("Consumer groups can only move to 'trim_horizon' or 'latest', not {!r}".format(
+                position))
+        self.release()
+        self.roots.clear()
+        self._latest.clear()
+        self.changed = None
+
+        current_shards = self.session.describe_stream(stream_arn=self.stream_arn)["Shards"]
+        current_shards = unpack_shards(current_shards, self.stream_arn, self.session)
+        self.roots.extend(shard for shard in current_shards.values() if not shard.parent)
+
+        # Only the worker that starts the group skips closed shards.  Once any shard has a lease, the group is
+        # already reading and its lease table decides where each shard continues from.
+        if position.lower() == "latest" and not self.group.store.leases(self.stream_arn):
+            for shard in current_shards.values():
+                if shard.children:
+                    self.group.store.finish(self.stream_arn, shard.shard_id)
+                else:
+                    self._latest.add(shard.shard_id)
+        self.rebalance()
+
+    def rebalance(self):
+        """Renew this worker's leases, then take or give up shards so each worker holds about the same number.
+
+        A shard can be leased once its parent is finished.  Workers only take leases that are free or expired.
+        Like a :class:`~bloop.stream.checkpoint.Checkpoint`, the position saved with a lease only includes the
+        last record returned once the next record is requested.
+        """
+        group = self.group
+        store, owner = group.store, group.owner
+        now = time.time()
+        expires = now + group.lease_seconds
+        store.register(self.stream_arn, owner, expires=expires)
+
+        # 0) Renew held leases and save their positions.  Drop any lease another worker took after it expired.
+        for shard in list(self.active):
+            if not store.renew(
+                    self.stream_arn, shard.shard_id, owner, expires=expires, token=self._processed_position(shard)):
+                self._drop(shard)
+
+        # 1) Remove shards that other workers finished, after finding their children.
+        leases = store.leases(self.stream_arn)
+        finished = {shard_id for shard_id, lease in leases.items() if lease.finished}
+        for shard in [shard for root in self.roots for shard in root.walk_tree() if shard.shard_id in finished]:
+            shard.load_children()
+            self.remove_shard(shard)
+
+        # 2) Every unfinished shard whose parent is finished can be read.
+        available = [
+            shard for root in self.roots for shard in root.walk_tree()
+            if shard.shard_id not in finished and (shard.parent is None or shard.parent.shard_id in finished)]
+        workers = store.owners(self.stream_arn, now=now) | {owner}
+        share = -(-len(available) // len(workers))
+
+        # 3) Give up extra shards so new workers can take them, then take free shards up to this worker's share.
+        for shard in self.active[share:]:
+            store.release(self.stream_arn, shard.shard_id, owner, token=self._processed_position(shard))
+            self._drop(shard)
+        held = {shard.shard_id for shard in self.active}
+        for shard in available:
+            if len(self.active) >= share:
+                break
+            lease = leases.get(shard.shard_id)
+            if shard.shard_id in held or (lease is not None and not lease_available(lease, owner, now)):
+                continue
+            self._acquire(shard)
+
+    def release(self):
+        """Release every lease this worker holds, saving each shard's position for the next owner.
+
+        The last record returned counts as processed, so call this once it's been handled.
+        """
+        store, owner = self.group.store, self.group.owner
+        for shard in self.active:
+            store.release(self.stream_arn, shard.shard_id, owner, token=shard_position(shard))
+        self._in_flight = None
+        self.active.clear()
+        self.buffer.clear()
+        store.register(self.stream_arn, owner, expires=0)
+
+    def _handle_exhausted(self):
+        # Finished shards are released, and ownership passes to their children when they're free.
+        store, owner = self.group.store, self.group.owner
+        to_remove = [shard for shard in self.active if shard.exhausted]
+        for shard in to_remove:
+            shard.load_children()
+            store.release(self.stream_arn, shard.shard_id, owner, finished=True)
+            # Also promotes children to the shard's previous roles
+            self.remove_shard(shard)
+            for child in shard.children:
+                self.active.remove(child)
+                self._acquire(child)
+
+    def _consume(self, record, shard):
+        self._in_flight = (shard, shard_position(shard))
+        super()._consume(record, shard)
+
+    def _processed_position(self, shard):
+        """The shard's position, without the last record returned if it hasn't been processed yet."""
+        if self._in_flight is not None and self._in_flight[0] is shard:
+            return self._in_flight[1]
+        return shard_position(shard)
+
+    def _acquire(self, shard):
+        group = self.group
+        now = time.time()
+        lease = group.store.acquire(
+            self.stream_arn, shard.shard_id, group.owner, now=now, expires=now + group.lease_seconds)
+        if lease is None:
+            return False
+        position = lease.token or {}
+        iterator_type = position.get("iterator_type")
+        if iterator_type is None:
+            iterator_type = "latest" if shard.shard_id in self._latest else "trim_horizon"
+        try:
+            shard.jump_to(iterator_type=iterator_type, sequence_number=position.get("sequence_number"))
+        except RecordsExpired:
+            # The saved position is beyond the trim_horizon.  The next closest record is at trim_horizon.
+            shard.jump_to(iterator_type="trim_horizon")
+        self.active.append(shard)
+        self._mark_changed(shard)
+        return True
+
+    def _drop(self, shard):
+        self.active.remove(shard)
+        self.buffer.drop_shard(shard)
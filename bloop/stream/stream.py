@@ -1,6 +1,7 @@
+from ..exceptions import InvalidStream
 from ..signals import object_loaded
-from ..util import unpack_from_dynamodb
 from .coordinator import Coordinator
+from .lease import LeasedCoordinator
 
 
 class Stream:
@@ -9,14 +10,33 @@ class Stream:
     :param model: The model to stream records from.
     :param engine: The engine to load model objects through.
     :type engine: :class:`~bloop.engine.Engine`
+    :param str as_: "model" to unpack records into model instances, or "dict" to unpack them into dicts of
+        column values keyed by model name.  Dicts aren't tracked and don't send signals.  Default is "model".
+    :param int max_workers: *(Optional)* Poll up to this many shards at once from a thread pool.
+        Default is None (one shard at a time).
+    :param checkpoint: *(Optional)* Periodically saves the stream's position.  Default is None.
+    :type checkpoint: :class:`~bloop.stream.checkpoint.Checkpoint`
+    :param group: *(Optional)* Share the stream with other workers, reading only the shards this worker leases.
+        Default is None (read every shard).
+    :type group: :class:`~bloop.stream.lease.ConsumerGroup`
     """
-    def __init__(self, *, model, engine):
+    def __init__(self, *, model, engine, as_="model", max_workers=None, checkpoint=None, group=None):
 
         self.model = model
         self.engine = engine
-        self.coordinator = Coordinator(
-            session=engine.session,
-            stream_arn=model.Meta.stream["arn"])
+        self.as_ = as_
+        self.checkpoint = checkpoint
+        if group is None:
+            self.coordinator = Coordinator(
+                session=engine.session,
+                stream_arn=model.Meta.stream["arn"],
+                max_workers=max_workers)
+        else:
+            self.coordinator = LeasedCoordinator(
+                session=engine.session,
+                stream_arn=model.Meta.stream["arn"],
+                group=group,
+                max_workers=max_workers)
 
     def __repr__(self):
         # <Stream[User]>
@@ -26,8 +46,13 @@ class Stream:
         return self
 
     def __next__(self):
+        if self.checkpoint is not None:
+            # Records returned before this call have been processed
+            self.checkpoint.maybe_flush(self.coordinator)
         record = next(self.coordinator)
         if record:
+            if self.checkpoint is not None:
+                self.checkpoint.returned()
             meta = self.model.Meta
             for key, expected in [("new", meta.columns), ("old", meta.columns), ("key", meta.keys)]:
                 if key not in meta.stream["include"]:
@@ -36,10 +61,38 @@ class Stream:
                     self._unpack(record, key, expected)
         return record
 
+    def flush(self):
+        """Save the stream's position to its checkpoint now, including the last record returned.
+
+        Call this after processing the last record before stopping, so it isn't returned again when the stream
+        resumes from the checkpoint.
+
+        :raises bloop.exceptions.InvalidStream: if the stream doesn't have a checkpoint.
+        """
+        if self.checkpoint is None:
+            raise InvalidStream("{!r} doesn't have a checkpoint to flush.".format(self))
+        self.checkpoint.flush(self.coordinator)
+
+    def close(self):
+        """Stop reading the stream.
+
+        Saves the position to the stream's checkpoint, if it has one.  In a consumer group, every lease is released
+        with its shard's position so other workers can take over right away.  Threads used to poll shards are
+        shut down.
+        """
+        try:
+            if self.checkpoint is not None:
+                self.checkpoint.flush(self.coordinator)
+            if isinstance(self.coordinator, LeasedCoordinator):
+                self.coordinator.release()
+        finally:
+            self.coordinator.close()
+
     def heartbeat(self):
         """Refresh iterators without sequence numbers so they don't expire.
 
-        Call this at least every 14 minutes.
+        Call this at least every 14 minutes.  In a consumer group, this also renews the worker's leases and
+        rebalances shards across the group, so call it more often than the group's ``lease_seconds``.
         """
         self.coordinator.heartbeat()
 
@@ -81,11 +134,10 @@ class Stream:
         attrs = record.get(key)
         if attrs is None:
             return
-        obj = unpack_from_dynamodb(
-            attrs=attrs,
-            expected=expected,
-            model=self.model,
-            engine=self.engine
-        )
-        object_loaded.send(self.engine, engine=self.engine, obj=obj)
+        load = self.engine._loader(self.model, expected)
+        if self.as_ == "dict":
+            record[key] = load.as_dict(attrs)
+            return
+        obj = load(attrs)
+        object_loaded.send(self.engine, engine=self.engine, obj=obj, attrs=attrs)
         record[key] = obj
@@ -42,7 +42,11 @@ SUPPORTED_OPERATIONS = {
     "begins_with": [STRING, BINARY],
     "between": PRIMITIVES,
     "contains": SETS + [STRING, BINARY, LIST],
-    "in": ALL
+    "in": ALL,
+    # Update actions
+    "add": [NUMBER] + SETS,
+    "discard": SETS,
+    "append": [LIST],
 }
 
 
@@ -5,6 +5,7 @@ from bloop import (
     Column,
     GlobalSecondaryIndex,
     Integer,
+    List,
     MissingObjects,
 )
 
@@ -34,6 +35,25 @@ def test_crud(engine):
     assert [same_user] == excinfo.value.objects
 
 
+def test_append_absent(engine):
+    class AppendAbsent(BaseModel):
+        id = Column(Integer, hash_key=True)
+        history = Column(List(Integer))
+    engine.bind(AppendAbsent)
+
+    obj = AppendAbsent(id=1)
+    engine.save(obj)
+
+    # history was never set, so list_append starts from an empty list
+    engine.update(obj, AppendAbsent.history.append([1, 2]))
+    engine.update(obj, AppendAbsent.history.append([3]))
+    assert obj.history == [1, 2, 3]
+
+    same_obj = AppendAbsent(id=1)
+    engine.load(same_obj, consistent=True)
+    assert same_obj.history == [1, 2, 3]
+
+
 def test_projection_overlap(engine):
     class ProjectionOverlap(BaseModel):
         hash = Column(Integer, hash_key=True)
@@ -1,4 +1,7 @@
+import copy
 import operator
+import pickle
+from unittest.mock import Mock, patch
 
 import pytest
 from bloop.conditions import (
@@ -15,13 +18,17 @@ from bloop.conditions import (
     InvalidCondition,
     NotCondition,
     OrCondition,
+    Param,
     Proxy,
     Reference,
     ReferenceTracker,
+    _render_cache,
     get_marked,
     get_snapshot,
     iter_columns,
     iter_conditions,
+    mark,
+    param,
     printable_column_name,
     render,
 )
@@ -29,7 +36,7 @@ from bloop.models import BaseModel, Column
 from bloop.signals import object_deleted, object_loaded, object_saved
 from bloop.types import Binary, Boolean, Integer, List, Map, Set, String
 
-from ..helpers.models import Document, User
+from ..helpers.models import Document, User, VectorModel
 
 
 class MockColumn(Column):
@@ -178,6 +185,20 @@ def test_on_loaded_full(engine):
     )
 
 
+def test_on_loaded_attrs(engine):
+    """When the item's attrs are sent with the object, the snapshot uses them without dumping"""
+    user = User(age=3, name="foo")
+    attrs = {"age": {"N": "4"}, "email": {"S": "not marked"}}
+    engine._dump_value = Mock(wraps=engine._dump_value)
+    object_loaded.send(engine, engine=engine, obj=user, attrs=attrs)
+
+    engine._dump_value.assert_not_called()
+    assert get_snapshot(user) == (
+        User.age.is_({"N": "4"}) &
+        User.name.is_(None)
+    )
+
+
 def test_on_modified():
     """When an object's values are set or deleted, those columns are marked for tracking"""
 
@@ -199,6 +220,24 @@ def test_on_modified():
     assert get_marked(user) == {User.id, User.age}
 
 
+def test_tracking_not_on_instance(engine):
+    """Marks and snapshots are kept outside the instance, so copies and pickles start without them"""
+    user = User(id="foo", age=3)
+    object_saved.send(engine, engine=engine, obj=user)
+    assert set(vars(user)) == {"id", "age"}
+
+    for same in [copy.copy(user), copy.deepcopy(user), pickle.loads(pickle.dumps(user))]:
+        assert (same.id, same.age) == ("foo", 3)
+        assert get_marked(same) == set()
+        assert get_snapshot(same) == empty_user_condition
+
+        # Marks on the copy are the model's own columns, and don't change the original
+        same.name = "bar"
+        mark(same, {User.email})
+        assert get_marked(same) == {User.name, User.email}
+    assert get_marked(user) == {User.id, User.age}
+
+
 def test_on_saved(engine):
     """Saving is equivalent to loading w.r.t. tracking.
 
@@ -580,6 +619,75 @@ def test_render_atomic_and_condition(engine):
     }
 
 
+def test_render_structure_cached(engine):
+    """Conditions with the same structure reuse the rendered expressions and names, with new values"""
+    first = render(engine, filter=User.email.begins_with("a"), key=(User.id == "first") & (User.age > 3))
+    condition = (User.id == "second") & (User.age > 10)
+    with patch.object(ConditionRenderer, "render_key_expression") as render_key:
+        second = render(engine, filter=User.email.begins_with("b"), key=condition)
+    render_key.assert_not_called()
+
+    assert first["KeyConditionExpression"] == second["KeyConditionExpression"]
+    assert first["ExpressionAttributeNames"] == second["ExpressionAttributeNames"]
+    assert second["ExpressionAttributeValues"] == {":v1": {"S": "b"}, ":v3": {"S": "second"}, ":v5": {"N": "10"}}
+
+
+def test_render_structure_dumps_once(engine):
+    """Rendering a structure that isn't cached reuses the values dumped to find its structure"""
+    _render_cache.clear()
+    condition = (User.age == 3) & (User.email == "@")
+    with patch.object(engine, "_dump_value", wraps=engine._dump_value) as dump_value:
+        rendered = render(engine, condition=condition)
+    assert dump_value.call_count == 2
+    assert rendered["ExpressionAttributeValues"] == {":v1": {"N": "3"}, ":v3": {"S": "@"}}
+
+
+def test_render_structure_evicts_least_recent(engine):
+    """When the cache is full, the least recently used structure is evicted"""
+    _render_cache.clear()
+    first, second, third = User.age == 1, User.email == "@", User.name == "n"
+    with patch("bloop.conditions._RENDER_CACHE_SIZE", 2):
+        render(engine, condition=first)
+        render(engine, condition=second)
+        # first is used again, so second is the least recently used
+        render(engine, condition=first)
+        render(engine, condition=third)
+    assert len(_render_cache) == 2
+
+    with patch.object(ConditionRenderer, "render_condition_expression") as render_condition:
+        render(engine, condition=first)
+        render(engine, condition=third)
+    render_condition.assert_not_called()
+    with patch.object(ConditionRenderer, "render_condition_expression") as render_condition:
+        render(engine, condition=second)
+    render_condition.assert_called_once()
+
+
+def test_render_structure_empty_values(engine):
+    """An empty value changes the structure, since it renders a different expression"""
+    first = render(engine, condition=User.email == "@")
+    second = render(engine, condition=User.email.is_(None))
+    assert first["ConditionExpression"] == "(#n0 = :v1)"
+    assert second["ConditionExpression"] == "(attribute_not_exists(#n0))"
+    assert "ExpressionAttributeValues" not in second
+
+
+def test_render_params(engine):
+    """Placeholders are only rendered when allowed, and are bound to their column"""
+    condition = User.age == param("age")
+    with pytest.raises(InvalidCondition):
+        render(engine, condition=condition)
+
+    rendered = render(engine, condition=condition, params=True)
+    placeholder = rendered["ExpressionAttributeValues"][":v1"]
+    assert isinstance(placeholder, Param)
+    assert placeholder.column is User.age
+
+    # The cached structure still checks each value
+    with pytest.raises(InvalidCondition):
+        render(engine, condition=condition)
+
+
 def test_render_update_only(engine):
     user = User(email="@", age=3)
     rendered = render(engine, obj=user, update=True)
@@ -590,6 +698,13 @@ def test_render_update_only(engine):
     }
 
 
+def test_render_update_and_actions(engine):
+    """An object's update and actions can't be rendered together"""
+    user = User(email="@", age=3)
+    with pytest.raises(InvalidCondition):
+        render(engine, obj=user, update=True, actions=[User.age.add(1)])
+
+
 def test_render_complex(engine):
     """Render a filter condition, key condition, projection, condition, atomic and update"""
     user = User(id="uid", age=3, email=None)
@@ -718,6 +833,62 @@ def test_render_update_set_and_remove(renderer):
     }
 
 
+def test_render_update_diff(engine, renderer):
+    """With diff, only marked columns whose dumped value differs from the last sync are rendered"""
+    user = User(id="user_id", age=3, email="@")
+    object_saved.send(engine, engine=engine, obj=user)
+
+    # Same value, changed value, and a column that wasn't part of the last sync
+    user.age = 3
+    user.email = "@@"
+    user.name = "foo"
+    renderer.render_update_expression(user, diff=True)
+    assert renderer.rendered == {
+        "ExpressionAttributeNames": {"#n0": "email", "#n2": "name"},
+        "ExpressionAttributeValues": {":v1": {"S": "@@"}, ":v3": {"S": "foo"}},
+        "UpdateExpression": "SET #n0=:v1, #n2=:v3",
+    }
+
+
+def test_render_update_diff_paths(engine, renderer):
+    """With diff, only the changed paths of Maps and Lists are rendered"""
+    document = Document(id=3, data={"Rating": 1, "Description": {"Heading": "h", "Body": "b"}}, numbers=[1, 2, 3])
+    object_saved.send(engine, engine=engine, obj=document)
+
+    document.data["Description"]["Body"] = "new"
+    del document.data["Rating"]
+    document.numbers[1] = 5
+    renderer.render_update_expression(document, diff=True)
+    assert renderer.rendered == {
+        "ExpressionAttributeNames": {
+            "#n0": "data", "#n1": "Description", "#n2": "Body", "#n4": "Rating", "#n6": "numbers"},
+        "ExpressionAttributeValues": {":v3": {"S": "new"}, ":v7": {"N": "5"}},
+        "UpdateExpression": "SET #n0.#n1.#n2=:v3, #n6[1]=:v7 REMOVE #n0.#n4",
+    }
+
+
+def test_render_update_diff_list_length(engine, renderer):
+    """Lists that changed length are rendered whole"""
+    document = Document(id=3, numbers=[1, 2, 3])
+    object_saved.send(engine, engine=engine, obj=document)
+
+    document.numbers.append(4)
+    renderer.render_update_expression(document, diff=True)
+    assert renderer.rendered == {
+        "ExpressionAttributeNames": {"#n0": "numbers"},
+        "ExpressionAttributeValues": {":v1": {"L": [{"N": "1"}, {"N": "2"}, {"N": "3"}, {"N": "4"}]}},
+        "UpdateExpression": "SET #n0=:v1",
+    }
+
+
+def test_render_update_diff_unordered_set(engine, renderer):
+    """Dumped sets are compared without their order"""
+    obj = VectorModel(name="vector", set_str={"a", "b", "c"})
+    object_loaded.send(engine, engine=engine, obj=obj, attrs={"set_str": {"SS": ["c", "a", "b"]}})
+    renderer.render_update_expression(obj, diff=True)
+    assert not renderer.rendered
+
+
 # END RENDERER ========================================================================================== END RENDERER
 
 
@@ -2,22 +2,29 @@ import datetime
 from unittest.mock import Mock
 
 import pytest
-from bloop.engine import Engine, dump_key
+from bloop.conditions import get_marked, param
+from bloop.engine import Engine, compile_dumper, compile_loader, dump_key
 from bloop.exceptions import (
+    InvalidCondition,
     InvalidModel,
+    InvalidSearch,
     InvalidStream,
     MissingKey,
     MissingObjects,
     UnboundModel,
     UnknownType,
+    UnprocessedObjects,
 )
 from bloop.models import BaseModel, Column, GlobalSecondaryIndex
+from bloop.search import ParallelScanIterator, PreparedQuery
 from bloop.session import SessionWrapper
-from bloop.signals import object_saved
-from bloop.types import DateTime, Integer, String
+from bloop.stream.checkpoint import Checkpoint, SQLiteCheckpointStore
+from bloop.stream.lease import ConsumerGroup, LeasedCoordinator, MemoryLeaseStore
+from bloop.signals import object_deleted, object_modified, object_saved
+from bloop.types import DateTime, Integer, List, Set, String
 from bloop.util import ordered
 
-from ..helpers.models import ComplexModel, User, VectorModel
+from ..helpers.models import ComplexModel, SimpleModel, User, VectorModel
 
 
 def test_missing_objects(engine, session):
@@ -32,6 +39,37 @@ def test_missing_objects(engine, session):
     assert set(excinfo.value.objects) == set(users)
 
 
+def test_load_unprocessed_objects(engine, session):
+    """Objects whose keys were still unprocessed raise UnprocessedObjects instead of MissingObjects"""
+    loaded, throttled = User(id="loaded"), User(id="throttled")
+
+    def respond(RequestItems, max_workers, unprocessed):
+        unprocessed["User"] = {"Keys": [{"id": {"S": "throttled"}}], "ConsistentRead": False}
+        return {"User": [{"id": {"S": "loaded"}, "age": {"N": "3"}}]}
+    session.load_items.side_effect = respond
+
+    with pytest.raises(UnprocessedObjects) as excinfo:
+        engine.load(loaded, throttled)
+    assert excinfo.value.objects == [throttled]
+    assert loaded.age == 3
+
+
+def test_load_unprocessed_and_missing_objects(engine, session):
+    """Objects that don't exist are reported on UnprocessedObjects when other keys were unprocessed"""
+    loaded, throttled, missing = User(id="loaded"), User(id="throttled"), User(id="missing")
+
+    def respond(RequestItems, max_workers, unprocessed):
+        unprocessed["User"] = {"Keys": [{"id": {"S": "throttled"}}], "ConsistentRead": False}
+        return {"User": [{"id": {"S": "loaded"}, "age": {"N": "3"}}]}
+    session.load_items.side_effect = respond
+
+    with pytest.raises(UnprocessedObjects) as excinfo:
+        engine.load(loaded, throttled, missing)
+    assert excinfo.value.objects == [throttled]
+    assert excinfo.value.missing == [missing]
+    assert loaded.age == 3
+
+
 def test_dump_key(engine):
     class HashAndRange(BaseModel):
         foo = Column(Integer, hash_key=True)
@@ -59,7 +97,7 @@ def test_load_object(engine, session):
         "User": [{"age": {"N": 5}, "name": {"S": "foo"}, "id": {"S": "user_id"}}]
     }
 
-    def respond(RequestItems):
+    def respond(RequestItems, max_workers, unprocessed):
         assert RequestItems == expected
         return response
 
@@ -91,7 +129,7 @@ def test_load_objects(engine, session):
         ]
     }
 
-    def respond(RequestItems):
+    def respond(RequestItems, max_workers, unprocessed):
         assert ordered(RequestItems) == ordered(expected)
         return response
 
@@ -104,6 +142,17 @@ def test_load_objects(engine, session):
     assert user2.name == "bar"
 
 
+def test_load_max_workers(engine, session):
+    """max_workers is passed to the session to send chunks concurrently"""
+    user = User(id="user_id")
+    session.load_items.return_value = {"User": [{"age": {"N": 5}, "id": {"S": user.id}}]}
+    engine.load(user, max_workers=4)
+
+    session.load_items.assert_called_once_with(
+        {"User": {"Keys": [{"id": {"S": user.id}}], "ConsistentRead": False}}, max_workers=4, unprocessed={})
+    assert user.age == 5
+
+
 def test_load_repeated_objects(engine, session):
     """The same object is only loaded once"""
     user = User(id="user_id")
@@ -116,7 +165,7 @@ def test_load_repeated_objects(engine, session):
         "User": [{"age": {"N": 5}, "name": {"S": "foo"}, "id": {"S": user.id}}],
     }
 
-    def respond(RequestItems):
+    def respond(RequestItems, max_workers, unprocessed):
         assert ordered(RequestItems) == ordered(expected)
         return response
 
@@ -142,7 +191,7 @@ def test_load_equivalent_objects(engine, session):
         "User": [{"age": {"N": 5}, "name": {"S": "foo"}, "id": {"S": user.id}}]
     }
 
-    def respond(RequestItems):
+    def respond(RequestItems, max_workers, unprocessed):
         assert ordered(RequestItems) == ordered(expected)
         return response
 
@@ -223,6 +272,127 @@ def test_load_missing_attrs(engine, session):
     assert obj.name is None
 
 
+def test_compile_loader(engine):
+    """Compiled loaders set and mark only the expected columns"""
+    load = compile_loader(engine, User, {User.id, User.age, User.name})
+    user = load({"id": {"S": "user_id"}, "age": {"N": "3"}, "email": {"S": "not expected"}})
+
+    assert isinstance(user, User)
+    assert (user.id, user.age, user.name) == ("user_id", 3, None)
+    assert not hasattr(user, "email")
+    assert get_marked(user) == {User.id, User.age, User.name}
+
+    # Existing objects are loaded in place
+    same = load({"id": {"S": "other_id"}}, obj=user)
+    assert same is user
+    assert (user.id, user.age) == ("other_id", None)
+
+
+def test_compile_loader_as_dict(engine):
+    """Compiled loaders load the expected columns into a dict by model name, using each column's type once"""
+    load = compile_loader(engine, User, {User.id, User.age, User.name})
+    engine._load = Mock(wraps=engine._load)
+    values = load.as_dict({"id": {"S": "user_id"}, "age": {"N": "3"}, "email": {"S": "not expected"}})
+
+    assert values == {"id": "user_id", "age": 3, "name": None}
+    engine._load.assert_not_called()
+
+
+def test_compile_loader_signals(engine):
+    """object_modified is still sent when something besides bloop's tracking is listening"""
+    modified = []
+
+    @object_modified.connect
+    def on_modified(_, obj, column, value, **kwargs):
+        modified.append((column, value))
+
+    load = compile_loader(engine, User, {User.id, User.age})
+    load({"id": {"S": "user_id"}, "age": {"N": "3"}})
+    assert sorted(modified, key=lambda m: m[0].model_name) == [(User.age, 3), (User.id, "user_id")]
+
+
+def test_compile_loader_custom_set(engine):
+    """Columns that override set still have it called"""
+    calls = []
+
+    class CustomColumn(Column):
+        def set(self, obj, value):
+            calls.append(value)
+            super().set(obj, value)
+
+    class Model(BaseModel):
+        id = CustomColumn(Integer, hash_key=True)
+
+    load = compile_loader(engine, Model, Model.Meta.columns)
+    assert load({"id": {"N": "4"}}).id == 4
+    assert calls == [4]
+
+
+def test_compile_loader_custom_set_signal(engine):
+    """Columns that override set only send object_modified once, through Column.set"""
+    class CustomColumn(Column):
+        def set(self, obj, value):
+            super().set(obj, value)
+
+    class Model(BaseModel):
+        id = CustomColumn(Integer, hash_key=True)
+        data = Column(String)
+
+    signals = []
+
+    @object_modified.connect
+    def on_modified(_, *, column, value, **kwargs):
+        signals.append((column, value))
+
+    load = compile_loader(engine, Model, Model.Meta.columns)
+    load({"id": {"N": "4"}, "data": {"S": "foo"}})
+    assert sorted(signals, key=lambda signal: signal[0].model_name) == [(Model.data, "foo"), (Model.id, 4)]
+
+
+def test_bind_compiles_loaders(engine):
+    """Binding a model compiles loaders for all columns, the keys, and each index's projection"""
+    engine.bind(User)
+    for columns in [User.Meta.columns, User.Meta.keys, User.by_email.projection["included"]]:
+        assert (User, frozenset(columns)) in engine._loaders
+    assert engine._loader(User, User.Meta.columns) is engine._loader(User, set(User.Meta.columns))
+
+
+def test_bind_without_indexes(engine):
+    """Models whose Meta doesn't list indexes still bind"""
+    class Model(BaseModel):
+        id = Column(Integer, hash_key=True)
+    del Model.Meta.indexes
+    engine.bind(Model)
+    assert (Model, frozenset(Model.Meta.columns)) in engine._loaders
+
+
+def test_compile_dumper(engine):
+    """Compiled dumpers skip None values and fail on missing keys"""
+    dumper = compile_dumper(engine, User)
+    user = User(id="user_id", age=3, email=None)
+
+    assert dumper.item(user) == {"id": {"S": "user_id"}, "age": {"N": "3"}}
+    assert dumper.item(None) is None
+    assert dumper.item(User()) is None
+    assert dumper.key(user) == {"id": {"S": "user_id"}}
+    assert dumper.values[User.age](4) == {"N": "4"}
+
+    with pytest.raises(MissingKey):
+        dumper.key(User(age=3))
+
+
+def test_bind_compiles_dumpers(engine):
+    """Binding a model compiles its dumper, which the engine's dumps use"""
+    engine.bind(User)
+    dumper = engine._dumpers[User] = Mock(wraps=engine._dumpers[User])
+    user = User(id="user_id", age=3)
+
+    assert engine._dump(User, user) == {"id": {"S": "user_id"}, "age": {"N": "3"}}
+    dumper.item.assert_called_once_with(user)
+    assert dump_key(engine, user) == {"id": {"S": "user_id"}}
+    dumper.key.assert_called_once_with(user)
+
+
 def test_load_dump_unbound(engine):
     class Model(BaseModel):
         id = Column(Integer, hash_key=True)
@@ -421,6 +591,300 @@ def test_save_del_only(engine, session):
     session.save_item.assert_called_once_with(expected)
 
 
+def test_save_diff(engine, session):
+    """diff only sends changed columns, and skips objects that haven't changed"""
+    user = User(id="user_id", age=5, name="foo")
+    engine.save(user)
+    session.save_item.reset_mock()
+
+    user.age = 6
+    user.name = "foo"
+    engine.save(user, diff=True)
+    session.save_item.assert_called_once_with({
+        "Key": {"id": {"S": user.id}},
+        "TableName": "User",
+        "ExpressionAttributeNames": {"#n0": "age"},
+        "ExpressionAttributeValues": {":v1": {"N": "6"}},
+        "UpdateExpression": "SET #n0=:v1"})
+
+    session.save_item.reset_mock()
+    engine.save(user, diff=True)
+    session.save_item.assert_not_called()
+
+
+def test_save_diff_new(engine, session):
+    """An object that was never loaded or saved is still sent, even with only a key"""
+    user = User(id="user_id")
+    engine.save(user, diff=True)
+    session.save_item.assert_called_once_with({"Key": {"id": {"S": user.id}}, "TableName": "User"})
+
+
+def test_save_version_column(engine, session):
+    """With a version column, atomic saves only expect the version, and set the next version"""
+    class Versioned(BaseModel):
+        class Meta:
+            version_column = "version"
+
+        id = Column(String, hash_key=True)
+        data = Column(String)
+        version = Column(Integer)
+    engine.bind(Versioned)
+
+    # A new object's first version is one more than its local version
+    obj = Versioned(id="obj_id", data="foo", version=4)
+    engine.save(obj, atomic=True)
+    session.save_item.assert_called_once_with({
+        "Key": {"id": {"S": "obj_id"}},
+        "TableName": "Versioned",
+        "ConditionExpression": "(attribute_not_exists(#n0))",
+        "ExpressionAttributeNames": {"#n0": "version", "#n2": "data"},
+        "ExpressionAttributeValues": {":v3": {"S": "foo"}, ":v4": {"N": "5"}},
+        "UpdateExpression": "SET #n2=:v3, #n0=:v4"})
+    assert obj.version == 5
+
+    session.save_item.reset_mock()
+    engine.save(obj, atomic=True)
+    session.save_item.assert_called_once_with({
+        "Key": {"id": {"S": "obj_id"}},
+        "TableName": "Versioned",
+        "ConditionExpression": "(#n0 = :v1)",
+        "ExpressionAttributeNames": {"#n0": "version", "#n2": "data"},
+        "ExpressionAttributeValues": {":v1": {"N": "5"}, ":v3": {"S": "foo"}, ":v4": {"N": "6"}},
+        "UpdateExpression": "SET #n2=:v3, #n0=:v4"})
+    assert obj.version == 6
+
+    engine.delete(obj, atomic=True)
+    session.delete_item.assert_called_once_with({
+        "Key": {"id": {"S": "obj_id"}},
+        "TableName": "Versioned",
+        "ConditionExpression": "(#n0 = :v1)",
+        "ExpressionAttributeNames": {"#n0": "version"},
+        "ExpressionAttributeValues": {":v1": {"N": "6"}}})
+
+
+def test_save_version_column_changed_locally(engine, session):
+    """Atomic saves increment the synced version, not a version that was changed locally"""
+    class Versioned(BaseModel):
+        class Meta:
+            version_column = "version"
+
+        id = Column(String, hash_key=True)
+        version = Column(Integer)
+    engine.bind(Versioned)
+
+    obj = Versioned(id="obj_id")
+    session.load_items.return_value = {"Versioned": [{"id": {"S": "obj_id"}, "version": {"N": "3"}}]}
+    engine.load(obj)
+    obj.version = 10
+    engine.save(obj, atomic=True)
+    session.save_item.assert_called_once_with({
+        "Key": {"id": {"S": "obj_id"}},
+        "TableName": "Versioned",
+        "ConditionExpression": "(#n0 = :v1)",
+        "ExpressionAttributeNames": {"#n0": "version"},
+        "ExpressionAttributeValues": {":v1": {"N": "3"}, ":v2": {"N": "4"}},
+        "UpdateExpression": "SET #n0=:v2"})
+    assert obj.version == 4
+
+
+def test_save_version_column_not_loaded(engine, session):
+    """Atomic saves and deletes fail when the version column wasn't loaded"""
+    class Versioned(BaseModel):
+        class Meta:
+            version_column = "version"
+
+        id = Column(String, hash_key=True)
+        data = Column(String)
+        version = Column(Integer)
+    engine.bind(Versioned)
+
+    session.search_items.return_value = {"Count": 1, "ScannedCount": 1, "Items": [
+        {"id": {"S": "obj_id"}, "data": {"S": "foo"}}]}
+    obj = engine.query(Versioned, key=Versioned.id == "obj_id", projection=[Versioned.data]).one()
+    assert not hasattr(obj, "version")
+
+    with pytest.raises(InvalidCondition):
+        engine.save(obj, atomic=True)
+    with pytest.raises(InvalidCondition):
+        engine.delete(obj, atomic=True)
+    session.save_item.assert_not_called()
+    session.delete_item.assert_not_called()
+
+
+def test_save_version_column_not_atomic(engine, session):
+    """Without atomic, the version column is saved like any other column and isn't incremented"""
+    class Versioned(BaseModel):
+        class Meta:
+            version_column = "version"
+
+        id = Column(String, hash_key=True)
+        data = Column(String)
+        views = Column(Integer)
+        version = Column(Integer)
+    engine.bind(Versioned)
+
+    obj = Versioned(id="obj_id", data="foo", version=3)
+    engine.save(obj)
+    session.save_item.assert_called_once_with({
+        "Key": {"id": {"S": "obj_id"}},
+        "TableName": "Versioned",
+        "ExpressionAttributeNames": {"#n0": "data", "#n2": "version"},
+        "ExpressionAttributeValues": {":v1": {"S": "foo"}, ":v3": {"N": "3"}},
+        "UpdateExpression": "SET #n0=:v1, #n2=:v3"})
+    assert obj.version == 3
+
+    session.save_item.return_value = {"Attributes": {"views": {"N": "1"}}}
+    engine.update(obj, Versioned.views.add(1))
+    args = session.save_item.call_args[0][0]
+    assert args["UpdateExpression"] == "ADD #n0 :v1"
+    assert (obj.views, obj.version) == (1, 3)
+
+
+def test_update(engine, session):
+    """Actions are rendered in one UpdateItem, and the new values are loaded into the object"""
+    class Post(BaseModel):
+        id = Column(String, hash_key=True)
+        views = Column(Integer)
+        tags = Column(Set(String))
+        history = Column(List(Integer))
+    engine.bind(Post)
+
+    post = Post(id="post_id")
+    session.save_item.return_value = {"Attributes": {"views": {"N": "5"}, "tags": {"SS": ["a", "b"]}}}
+    engine.update(post, Post.views.add(1), Post.tags.add({"a"}))
+    session.save_item.assert_called_once_with({
+        "Key": {"id": {"S": "post_id"}},
+        "TableName": "Post",
+        "ReturnValues": "UPDATED_NEW",
+        "ExpressionAttributeNames": {"#n0": "views", "#n2": "tags"},
+        "ExpressionAttributeValues": {":v1": {"N": "1"}, ":v3": {"SS": ["a"]}},
+        "UpdateExpression": "ADD #n0 :v1, #n2 :v3"})
+    assert (post.views, post.tags) == (5, {"a", "b"})
+
+    # Removing the last value from a set doesn't return the column
+    session.save_item.reset_mock()
+    session.save_item.return_value = {"Attributes": {"history": {"L": [{"N": "3"}]}}}
+    engine.update(post, Post.history.append([3]), Post.tags.discard({"a", "b"}))
+    args = session.save_item.call_args[0][0]
+    assert args["UpdateExpression"] == "SET #n0=list_append(if_not_exists(#n0, :v2), :v1) DELETE #n3 :v4"
+    assert (post.history, post.tags) == ([3], set())
+
+
+def test_update_append_absent(engine, session):
+    """Appending to a list that was never set starts from an empty list"""
+    class Post(BaseModel):
+        id = Column(String, hash_key=True)
+        history = Column(List(Integer))
+    engine.bind(Post)
+
+    post = Post(id="post_id")
+    session.save_item.return_value = {"Attributes": {"history": {"L": [{"N": "1"}, {"N": "2"}]}}}
+    engine.update(post, Post.history.append([1, 2]))
+    session.save_item.assert_called_once_with({
+        "Key": {"id": {"S": "post_id"}},
+        "TableName": "Post",
+        "ReturnValues": "UPDATED_NEW",
+        "ExpressionAttributeNames": {"#n0": "history"},
+        "ExpressionAttributeValues": {":v1": {"L": [{"N": "1"}, {"N": "2"}]}, ":v2": {"L": []}},
+        "UpdateExpression": "SET #n0=list_append(if_not_exists(#n0, :v2), :v1)"})
+    assert post.history == [1, 2]
+
+
+def test_update_invalid(engine, session):
+    """Update needs actions for the object's non-key columns, which support the action"""
+    user = User(id="user_id")
+    with pytest.raises(InvalidCondition):
+        engine.update(user)
+    with pytest.raises(InvalidCondition):
+        engine.update(user, VectorModel.set_str.add({"foo"}))
+    with pytest.raises(InvalidCondition):
+        engine.update(user, {"name": "foo"})
+    with pytest.raises(InvalidCondition):
+        engine.update(user, User.age.add(1), {"name": "foo"})
+    with pytest.raises(InvalidCondition):
+        User.name.add(1)
+    with pytest.raises(InvalidCondition):
+        User.age.discard({1})
+    session.save_item.assert_not_called()
+
+
+def test_save_batch(engine, session):
+    """Batched saves overwrite each item, grouped by table"""
+    users = [User(id=str(i), age=i) for i in range(3)]
+    obj = SimpleModel(id="simple")
+    expected = {
+        "User": [{"PutRequest": {"Item": {"id": {"S": user.id}, "age": {"N": str(user.age)}}}} for user in users],
+        "Simple": [{"PutRequest": {"Item": {"id": {"S": "simple"}}}}]
+    }
+    session.write_items.return_value = {}
+    engine.save(*users, obj, batch=True)
+
+    session.save_item.assert_not_called()
+    assert ordered(session.write_items.call_args[0][0]) == ordered(expected)
+
+
+def test_save_batch_signals(engine, session):
+    """object_saved is sent for every object in a batched save"""
+    users = [User(id=str(i)) for i in range(3)]
+    saved = []
+    session.write_items.return_value = {}
+
+    @object_saved.connect
+    def on_saved(_, obj, **kwargs):
+        saved.append(obj)
+
+    engine.save(*users, batch=True)
+    assert set(saved) == set(users)
+
+
+@pytest.mark.parametrize("conditional", [{"atomic": True}, {"condition": User.id.is_(None)}, {"diff": True}])
+def test_save_batch_conditional(engine, session, conditional):
+    """Batched saves can't be conditional, or diffed"""
+    user = User(id="user_id")
+    with pytest.raises(InvalidCondition):
+        engine.save(user, batch=True, **conditional)
+    session.write_items.assert_not_called()
+
+
+def test_save_batch_unprocessed(engine, session):
+    """Objects that are still unprocessed aren't marked saved, and are reported"""
+    users = [User(id=str(i)) for i in range(3)]
+    session.write_items.return_value = {"User": [{"PutRequest": {"Item": {"id": {"S": "1"}}}}]}
+    saved = []
+
+    @object_saved.connect
+    def on_saved(_, obj, **kwargs):
+        saved.append(obj)
+
+    with pytest.raises(UnprocessedObjects) as excinfo:
+        engine.save(*users, batch=True)
+    assert excinfo.value.objects == [users[1]]
+    assert set(saved) == {users[0], users[2]}
+
+
+def test_save_batch_duplicate_keys(engine, session):
+    """Objects that share a key are sent once; the last one wins"""
+    first, last = User(id="user_id", age=1), User(id="user_id", age=2)
+    saved = []
+    session.write_items.return_value = {}
+
+    @object_saved.connect
+    def on_saved(_, obj, **kwargs):
+        saved.append(obj)
+
+    engine.save(first, last, batch=True)
+    session.write_items.assert_called_once_with(
+        {"User": [{"PutRequest": {"Item": {"id": {"S": "user_id"}, "age": {"N": "2"}}}}]})
+    assert saved == [last]
+
+
+def test_save_batch_missing_key(engine, session):
+    """Missing keys fail before any requests are sent"""
+    with pytest.raises(MissingKey):
+        engine.save(User(id="user_id"), User(age=3), batch=True)
+    session.write_items.assert_not_called()
+
+
 def test_delete_multiple_condition(engine, session):
     users = [User(id=str(i)) for i in range(3)]
     condition = User.id == "foo"
@@ -437,6 +901,50 @@ def test_delete_multiple_condition(engine, session):
     assert session.delete_item.call_count == 3
 
 
+def test_delete_batch(engine, session):
+    """Batched deletes send one DeleteRequest per key, grouped by table"""
+    users = [User(id=str(i)) for i in range(3)]
+    # Same key as users[0], only deleted once
+    duplicate = User(id="0")
+    obj = SimpleModel(id="simple")
+    expected = {
+        "User": [{"DeleteRequest": {"Key": {"id": {"S": user.id}}}} for user in users],
+        "Simple": [{"DeleteRequest": {"Key": {"id": {"S": "simple"}}}}]
+    }
+    deleted = []
+    session.write_items.return_value = {}
+
+    @object_deleted.connect
+    def on_deleted(_, obj, **kwargs):
+        deleted.append(obj)
+
+    engine.delete(*users, duplicate, obj, batch=True)
+
+    session.delete_item.assert_not_called()
+    assert ordered(session.write_items.call_args[0][0]) == ordered(expected)
+    assert set(deleted) == {*users, duplicate, obj}
+
+
+def test_delete_batch_unprocessed(engine, session):
+    """Objects that are still unprocessed aren't marked deleted, and are reported"""
+    users = [User(id=str(i)) for i in range(3)]
+    duplicate = User(id="1")
+    session.write_items.return_value = {"User": [{"DeleteRequest": {"Key": {"id": {"S": "1"}}}}]}
+
+    with pytest.raises(UnprocessedObjects) as excinfo:
+        engine.delete(*users, duplicate, batch=True)
+    assert set(excinfo.value.objects) == {users[1], duplicate}
+
+
+@pytest.mark.parametrize("conditional", [{"atomic": True}, {"condition": User.id.is_(None)}])
+def test_delete_batch_conditional(engine, session, conditional):
+    """Batched deletes can't be conditional"""
+    user = User(id="user_id")
+    with pytest.raises(InvalidCondition):
+        engine.delete(user, batch=True, **conditional)
+    session.write_items.assert_not_called()
+
+
 def test_delete_atomic(engine, session):
     user = User(id="user_id")
 
@@ -526,6 +1034,95 @@ def test_scan(engine):
     assert model_scan.index is None
 
 
+def test_search_prefetch(engine):
+    """Engine.query and Engine.scan pass prefetch to the iterator"""
+    query = engine.query(User, key=User.Meta.hash_key == "other", prefetch=2)
+    assert query.prefetch == 2
+
+    scan = engine.scan(User)
+    assert scan.prefetch == 0
+
+
+def test_scan_segments(engine):
+    """Engine.scan with segments builds a single iterator over every segment"""
+    scan = engine.scan(User, segments=8, max_workers=2)
+    assert isinstance(scan, ParallelScanIterator)
+    assert (scan.segments, scan.max_workers) == (8, 2)
+
+    with pytest.raises(InvalidSearch):
+        engine.scan(User, parallel=(0, 8), segments=8)
+
+
+def test_search_limits(engine):
+    """Engine.query and Engine.scan pass limit to the iterator and page_size to the request"""
+    query = engine.query(User, key=User.Meta.hash_key == "other", limit=3, page_size=10)
+    assert query.limit == 3
+    assert query.request["Limit"] == 10
+
+    scan = engine.scan(User, limit=4)
+    assert scan.limit == 4
+    assert "Limit" not in scan.request
+
+    with pytest.raises(InvalidSearch):
+        engine.scan(User, page_size=0)
+
+
+def test_search_cursor(engine):
+    """Engine.query and Engine.scan move the new iterator to the cursor"""
+    query = engine.query(User, key=User.Meta.hash_key == "other")
+    same = engine.query(User, key=User.Meta.hash_key == "other", cursor=query.cursor)
+    assert same.cursor == query.cursor
+
+    with pytest.raises(InvalidSearch):
+        engine.query(User, key=User.Meta.hash_key == "another", cursor=query.cursor)
+    with pytest.raises(InvalidSearch):
+        engine.scan(User, cursor=query.cursor)
+
+
+def test_prepare_query(engine):
+    """Engine.prepare_query renders once, and each execution only substitutes the parameter values"""
+    prepared = engine.prepare_query(
+        User.by_email, key=User.email == param("email"), filter=User.age >= param("age"), limit=2)
+    assert isinstance(prepared, PreparedQuery)
+    assert prepared.params == {"email", "age"}
+
+    first = prepared.execute(email="foo@domain.com", age=3)
+    second = prepared.execute(email="bar@domain.com", age=4)
+    assert first.index is User.by_email
+    assert first.limit == 2
+    assert first.request["KeyConditionExpression"] == second.request["KeyConditionExpression"]
+    assert sorted(first.request["ExpressionAttributeValues"].values(), key=str) == [
+        {"N": "3"}, {"S": "foo@domain.com"}]
+    assert sorted(second.request["ExpressionAttributeValues"].values(), key=str) == [
+        {"N": "4"}, {"S": "bar@domain.com"}]
+
+    # Same request as the query without placeholders, so cursors are interchangeable
+    query = engine.query(User.by_email, key=User.email == "foo@domain.com", filter=User.age >= 3, limit=2)
+    assert query.request == first.request
+    assert prepared.execute(email="foo@domain.com", age=3, cursor=query.cursor).cursor == query.cursor
+
+
+def test_params_outside_prepared_query(engine):
+    """Placeholders are never sent to DynamoDB"""
+    with pytest.raises(InvalidSearch):
+        engine.query(User.by_email, key=User.email == param("email"))
+    with pytest.raises(InvalidSearch):
+        engine.scan(User, filter=User.age >= param("age"))
+    with pytest.raises(InvalidCondition):
+        engine.save(User(id="user_id"), condition=User.age >= param("age"))
+    with pytest.raises(InvalidCondition):
+        engine.delete(User(id="user_id"), condition=User.age >= param("age"))
+
+
+def test_search_as_dict(engine):
+    query = engine.query(User, key=User.Meta.hash_key == "other", as_="dict")
+    assert query.as_ == "dict"
+    assert engine.scan(User).as_ == "model"
+
+    with pytest.raises(InvalidSearch):
+        engine.scan(User, as_="object")
+
+
 def test_stream(engine, session):
     class StreamModel(BaseModel):
         class Meta:
@@ -539,6 +1136,80 @@ def test_stream(engine, session):
 
     stream = engine.stream(StreamModel, "latest")
     assert stream.model is StreamModel
+    assert stream.as_ == "model"
+
+    stream = engine.stream(StreamModel, "latest", as_="dict")
+    assert stream.as_ == "dict"
+    assert stream.coordinator.max_workers is None
+
+    stream = engine.stream(StreamModel, "latest", max_workers=8)
+    assert stream.coordinator.max_workers == 8
+
+
+def test_stream_checkpoint(engine, session):
+    """A stream resumes from its checkpoint store, and falls back to position when nothing is stored"""
+    class StreamModel(BaseModel):
+        class Meta:
+            stream = {
+                "include": {"new"},
+                "arn": "test-arn-manually-set"
+            }
+        id = Column(String, hash_key=True)
+    engine.bind(StreamModel)
+    session.describe_stream.return_value = {"Shards": [{"ShardId": "shard-id"}]}
+
+    store = SQLiteCheckpointStore(":memory:")
+    stream = engine.stream(StreamModel, "trim_horizon", checkpoint=store)
+    assert isinstance(stream.checkpoint, Checkpoint)
+    assert stream.checkpoint.store is store
+    session.get_shard_iterator.assert_called_once_with(
+        stream_arn="test-arn-manually-set", shard_id="shard-id", iterator_type="trim_horizon", sequence_number=None)
+
+    stream.coordinator.active[0].iterator_type = "after_sequence"
+    stream.coordinator.active[0].sequence_number = "123"
+    stream.flush()
+
+    session.get_shard_iterator.reset_mock()
+    checkpoint = Checkpoint(store, records=10)
+    stream = engine.stream(StreamModel, "trim_horizon", checkpoint=checkpoint)
+    assert stream.checkpoint is checkpoint
+    session.get_shard_iterator.assert_called_once_with(
+        stream_arn="test-arn-manually-set", shard_id="shard-id", iterator_type="after_sequence",
+        sequence_number="123")
+
+    with pytest.raises(InvalidStream):
+        engine.stream(StreamModel, "latest", checkpoint="checkpoint.json")
+
+    with pytest.raises(InvalidStream):
+        engine.stream(StreamModel, "latest", as_="object")
+
+
+def test_stream_group(engine, session):
+    """A worker in a consumer group leases shards instead of reading every shard"""
+    class StreamModel(BaseModel):
+        class Meta:
+            stream = {
+                "include": {"new"},
+                "arn": "test-arn-manually-set"
+            }
+        id = Column(String, hash_key=True)
+    engine.bind(StreamModel)
+    session.describe_stream.return_value = {"Shards": [{"ShardId": "shard-id"}]}
+
+    store = MemoryLeaseStore()
+    stream = engine.stream(StreamModel, "trim_horizon", group=ConsumerGroup(store, owner="owner"))
+    assert isinstance(stream.coordinator, LeasedCoordinator)
+    assert store.leases("test-arn-manually-set")["shard-id"].owner == "owner"
+
+    # Another worker in the group can't take the leased shard
+    other = engine.stream(StreamModel, "trim_horizon", group=ConsumerGroup(store, owner="other"))
+    assert other.coordinator.active == []
+
+    with pytest.raises(InvalidStream):
+        engine.stream(StreamModel, "latest", group=store)
+
+    with pytest.raises(InvalidStream):
+        engine.stream(StreamModel, "latest", group=ConsumerGroup(store), checkpoint=SQLiteCheckpointStore(":memory:"))
 
 
 def test_invalid_stream(engine, session):
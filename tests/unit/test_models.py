@@ -272,6 +272,34 @@ def test_meta_default_stream():
     assert Other.Meta.stream is None
 
 
+def test_meta_version_column():
+    """version_column is resolved by model name, and defaults to None"""
+    class Model(BaseModel):
+        id = Column(UUID, hash_key=True)
+    assert Model.Meta.version_column is None
+
+    class Versioned(BaseModel):
+        class Meta:
+            version_column = "version"
+
+        id = Column(UUID, hash_key=True)
+        version = Column(Integer)
+    assert Versioned.Meta.version_column is Versioned.version
+
+
+@pytest.mark.parametrize("version_column", ["missing", "id", "name"])
+def test_invalid_version_column(version_column):
+    """version_column must be a non-key number column"""
+    with pytest.raises(InvalidModel):
+        class Model(BaseModel):
+            class Meta:
+                pass
+            Meta.version_column = version_column
+
+            id = Column(Integer, hash_key=True)
+            name = Column(String)
+
+
 def test_abstract_not_inherited():
     class Concrete(BaseModel):
         id = Column(UUID, hash_key=True)
@@ -13,12 +13,14 @@ from bloop.conditions import (
     NotCondition,
     OrCondition,
     comparison_aliases,
+    param,
 )
 from bloop.exceptions import (
     ConstraintViolation,
     InvalidFilterCondition,
     InvalidKeyCondition,
     InvalidProjection,
+    InvalidSearch,
     InvalidSearchMode,
 )
 from bloop.models import (
@@ -28,17 +30,28 @@ from bloop.models import (
     LocalSecondaryIndex,
 )
 from bloop.search import (
+    Page,
+    ParallelScanIterator,
+    PreparedQuery,
     PreparedSearch,
     QueryIterator,
     ScanIterator,
     Search,
     SearchIterator,
     SearchModelIterator,
+    dump_cursor,
+    load_cursor,
+    search_fingerprint,
     search_repr,
     validate_filter_condition,
     validate_key_condition,
+    validate_limits,
+    validate_prefetch,
+    validate_result_type,
     validate_search_projection,
+    validate_segments,
 )
+from bloop.signals import object_loaded
 from bloop.types import Integer
 from bloop.util import Sentinel
 
@@ -265,14 +278,16 @@ def build_responses(chain, items=None):
 
 @pytest.fixture
 def simple_iter(engine, session):
-    def _simple_iter(cls=SearchIterator, model=User, index=None):
+    def _simple_iter(cls=SearchIterator, model=User, index=None, prefetch=0, limit=None):
         kwargs = {
             "engine": engine,
             "session": session,
             "model": model,
             "index": index,
             "request": {},
-            "projected": set()
+            "projected": set(),
+            "prefetch": prefetch,
+            "limit": limit
         }
         if issubclass(cls, SearchModelIterator):
             kwargs.pop("session")
@@ -471,6 +486,56 @@ def test_validate_filter_success():
     )
     validate_filter_condition(condition, ComplexModel.Meta.columns, set())
 
+
+@pytest.mark.parametrize("segments", [None, 1, 16])
+def test_validate_segments_success(segments):
+    validate_segments("scan", None, segments)
+
+
+@pytest.mark.parametrize("mode, parallel, segments", [
+    ("query", None, 4),
+    ("scan", (0, 4), 4),
+    ("scan", None, 0),
+    ("scan", None, "4"),
+])
+def test_validate_segments_failure(mode, parallel, segments):
+    with pytest.raises(InvalidSearch):
+        validate_segments(mode, parallel, segments)
+
+
+@pytest.mark.parametrize("limit, page_size", [(None, None), (1, None), (None, 1), (10, 100)])
+def test_validate_limits_success(limit, page_size):
+    validate_limits(limit, page_size)
+
+
+@pytest.mark.parametrize("limit, page_size", [(0, None), (None, 0), (-1, 10), (10, "10"), (True, None), (None, True)])
+def test_validate_limits_failure(limit, page_size):
+    with pytest.raises(InvalidSearch):
+        validate_limits(limit, page_size)
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 10])
+def test_validate_prefetch_success(prefetch):
+    validate_prefetch(prefetch)
+
+
+@pytest.mark.parametrize("prefetch", [-1, None, 1.5, "2", True])
+def test_validate_prefetch_failure(prefetch):
+    with pytest.raises(InvalidSearch):
+        validate_prefetch(prefetch)
+
+
+@pytest.mark.parametrize("as_", ["model", "dict"])
+def test_validate_result_type_success(as_):
+    validate_result_type(as_)
+
+
+@pytest.mark.parametrize("as_", [None, "object", dict])
+def test_validate_result_type_failure(as_):
+    with pytest.raises(InvalidSearch):
+        validate_result_type(as_)
+
+
 # END VALIDATION TESTS =========================================================================== END VALIDATION TESTS
 
 
@@ -564,9 +629,17 @@ def test_prepare_invalid_filter(valid_search):
 def test_prepare_constraints(valid_search):
     valid_search.forward = False
     valid_search.parallel = (1, 5)
+    valid_search.prefetch = 3
+    valid_search.limit = 7
+    valid_search.page_size = 20
     prepared = valid_search.prepare()
     assert prepared.forward is False
     assert prepared.parallel == (1, 5)
+    assert prepared.prefetch == 3
+    assert prepared.limit == 7
+    assert prepared.page_size == 20
+    assert iter(prepared).prefetch == 3
+    assert iter(prepared).limit == 7
 
 
 @pytest.mark.parametrize("mode, cls", [("query", QueryIterator), ("scan", ScanIterator)])
@@ -577,6 +650,18 @@ def test_prepare_iter(valid_search, mode, cls):
     assert isinstance(it, cls)
 
 
+def test_prepare_iter_segments(valid_search):
+    valid_search.mode = "scan"
+    valid_search.key = None
+    valid_search.segments = 4
+    valid_search.max_workers = 2
+    prepared = valid_search.prepare()
+    it = iter(prepared)
+    assert isinstance(it, ParallelScanIterator)
+    assert it.segments == 4
+    assert it.max_workers == 2
+
+
 @pytest.mark.parametrize("mode, include", [("scan", False), ("query", True)])
 def test_prepare_request_forward(valid_search, mode, include):
     valid_search.mode = mode
@@ -613,6 +698,15 @@ def test_prepare_request_specific(valid_search, index):
     assert prepared._request["ProjectionExpression"] == "#n0"
 
 
+@pytest.mark.parametrize("mode", ["query", "scan"])
+@pytest.mark.parametrize("page_size", [None, 25])
+def test_prepare_request_page_size(valid_search, mode, page_size):
+    valid_search.mode = mode
+    valid_search.page_size = page_size
+    prepared = valid_search.prepare()
+    assert prepared._request.get("Limit") == page_size
+
+
 @pytest.mark.parametrize("mode", ["query", "scan"])
 @pytest.mark.parametrize("parallel", [False, (2, 5)])
 def test_prepare_request_parallel(valid_search, mode, parallel):
@@ -620,13 +714,45 @@ def test_prepare_request_parallel(valid_search, mode, parallel):
     valid_search.parallel = parallel
     prepared = valid_search.prepare()
     if parallel and (mode == "scan"):
-        actual = prepared._request["Segments"], prepared._request["TotalSegments"]
+        actual = prepared._request["Segment"], prepared._request["TotalSegments"]
         assert actual == parallel
     else:
-        assert "Segments" not in prepared._request
+        assert "Segment" not in prepared._request
         assert "TotalSegments" not in prepared._request
 
 
+def test_prepared_query_params(valid_search):
+    """Placeholders render as value refs bound to their column, and are dumped on execute"""
+    valid_search.key = ComplexModel.name == param("name")
+    prepared = PreparedQuery(valid_search.prepare())
+    assert prepared.params == {"name"}
+    assert repr(prepared) == "<PreparedQuery[ComplexModel]>"
+
+    (ref, placeholder), = prepared._params.items()
+    assert placeholder.column is ComplexModel.name
+
+    iterator = prepared.execute(name="foo")
+    assert iterator.request["ExpressionAttributeValues"] == {ref: {"S": "foo"}}
+    # The prepared request isn't modified
+    assert prepared._search._request["ExpressionAttributeValues"] == {ref: placeholder}
+
+
+@pytest.mark.parametrize("values", [{}, {"name": "foo", "other": "bar"}, {"other": "bar"}])
+def test_prepared_query_wrong_params(valid_search, values):
+    valid_search.key = ComplexModel.name == param("name")
+    prepared = PreparedQuery(valid_search.prepare())
+    with pytest.raises(InvalidSearch):
+        prepared.execute(**values)
+
+
+def test_prepared_query_empty_value(valid_search):
+    """A value can't be empty, since the expression was rendered for a non-empty value"""
+    valid_search.key = ComplexModel.name == param("name")
+    prepared = PreparedQuery(valid_search.prepare())
+    with pytest.raises(InvalidSearch):
+        prepared.execute(name=None)
+
+
 # END PREPARE TESTS ================================================================================= END PREPARE TESTS
 
 
@@ -792,6 +918,370 @@ def test_one_failure(simple_iter, session, chain):
     assert session.search_items.call_count == expected_calls
 
 
+@pytest.mark.parametrize("prefetch", [1, 2])
+@pytest.mark.parametrize("chain", [[0], [1], [0, 2, 1], [2, 0, 0, 3]])
+def test_prefetch_pages(simple_iter, session, chain, prefetch):
+    """Prefetched pages are returned in order, and the request follows each continuation token"""
+    iterator = simple_iter(prefetch=prefetch)
+    item_count = sum(chain)
+    session.search_items.side_effect = build_responses(chain, items=list(range(item_count)))
+
+    assert list(iterator) == list(range(item_count))
+    assert session.search_items.call_count == len(chain)
+    assert iterator.count == item_count
+    assert iterator.scanned == item_count * 3
+    assert iterator.exhausted
+    # The background thread works on a copy of the request
+    assert iterator.request["ExclusiveStartKey"] is None
+
+
+@pytest.mark.parametrize("limit, chain, expected_calls", [
+    (1, [2, 2], 1),
+    (2, [0, 1, 1, 5], 3),
+    (3, [2, 2], 2),
+    (5, [1, 1], 2),
+])
+def test_limit(simple_iter, session, limit, chain, expected_calls):
+    """The iterator stops after limit results, without loading any more pages"""
+    iterator = simple_iter(limit=limit)
+    item_count = sum(chain)
+    session.search_items.side_effect = build_responses(chain, items=list(range(item_count)))
+
+    assert list(iterator) == list(range(min(limit, item_count)))
+    assert session.search_items.call_count == expected_calls
+    assert iterator.exhausted
+
+    # reset allows another limit results
+    session.search_items.side_effect = build_responses(chain, items=list(range(item_count)))
+    iterator.reset()
+    assert not iterator.exhausted
+    assert next(iterator) == 0
+
+
+def test_prefetch_raises(simple_iter, session):
+    """An error on the background thread is raised from __next__"""
+    iterator = simple_iter(prefetch=1)
+    session.search_items.side_effect = [response(count=1), RuntimeError("unexpected")]
+
+    assert next(iterator) is not None
+    with pytest.raises(RuntimeError):
+        next(iterator)
+
+
+def test_prefetch_retry(simple_iter, session):
+    """After an error, the next call fetches the failed page again instead of waiting on the stopped thread"""
+    iterator = simple_iter(prefetch=1)
+    first, last = Sentinel("first"), Sentinel("last")
+    outcomes = [response(item=first), RuntimeError("unexpected"), response(item=last, terminate=True)]
+    requests = []
+
+    def search_items(mode, request):
+        requests.append(dict(request))
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    session.search_items.side_effect = search_items
+
+    assert next(iterator) is first
+    with pytest.raises(RuntimeError):
+        next(iterator)
+    assert iterator._prefetcher is None
+
+    assert next(iterator) is last
+    assert requests[2]["ExclusiveStartKey"] == requests[1]["ExclusiveStartKey"] == proceed
+    assert iterator.exhausted
+
+
+def test_prefetch_reset(simple_iter, session):
+    """reset stops the background thread, and the next page starts a new one"""
+    iterator = simple_iter(prefetch=1)
+    session.search_items.side_effect = build_responses([1]) + build_responses([1])
+
+    next(iterator)
+    prefetcher, finalizer = iterator._prefetcher, iterator._finalizer
+    iterator.reset()
+    assert prefetcher.stopped.is_set()
+    assert iterator._prefetcher is None
+    # The stopped prefetcher's finalizer doesn't stay registered
+    assert not finalizer.alive
+
+    next(iterator)
+    assert iterator._prefetcher is not prefetcher
+    assert iterator._finalizer.alive
+
+
+@pytest.mark.parametrize("max_workers", [None, 1, 2])
+def test_parallel_scan(engine, session, max_workers):
+    """Every segment is followed to its last page, and count/scanned are totals across segments"""
+    chains = {0: [1, 0, 2], 1: [0], 2: [3], 3: [1, 1]}
+    responses = {segment: build_responses(chain) for segment, chain in chains.items()}
+    requests = []
+
+    def search_items(mode, request):
+        assert mode == "scan"
+        requests.append(dict(request))
+        return responses[request["Segment"]].pop(0)
+    session.search_items.side_effect = search_items
+
+    iterator = ParallelScanIterator(
+        engine=engine, model=User, index=None, request={"TableName": "User"},
+        projected=set(), segments=4, max_workers=max_workers)
+    results = list(iterator)
+
+    total = sum(sum(chain) for chain in chains.values())
+    assert len(results) == total
+    assert iterator.count == total
+    assert iterator.scanned == total * 3
+    assert iterator.exhausted
+    assert session.search_items.call_count == sum(len(chain) for chain in chains.values())
+    assert all(request["TotalSegments"] == 4 for request in requests)
+    # The base request isn't modified by the segments
+    assert iterator.request == {"TableName": "User"}
+
+
+@pytest.mark.parametrize("max_workers", [0, -1, 1.5, "2", True])
+def test_parallel_scan_invalid_max_workers(engine, max_workers):
+    """max_workers must be None or a positive int"""
+    with pytest.raises(ValueError):
+        ParallelScanIterator(
+            engine=engine, model=User, index=None, request={}, projected=set(), segments=2, max_workers=max_workers)
+
+
+def test_parallel_scan_raises(engine, session):
+    """An error from any segment is raised from __next__"""
+    session.search_items.side_effect = RuntimeError("unexpected")
+    iterator = ParallelScanIterator(
+        engine=engine, model=User, index=None, request={}, projected=set(), segments=2)
+    with pytest.raises(RuntimeError):
+        next(iterator)
+
+
+def test_parallel_scan_raises_again(engine, session):
+    """A segment that raised never finishes, so later calls raise its error instead of waiting for it"""
+    error = RuntimeError("unexpected")
+
+    def search_items(mode, request):
+        if request["Segment"] == 0:
+            raise error
+        return response(terminate=True)
+    session.search_items.side_effect = search_items
+    iterator = ParallelScanIterator(
+        engine=engine, model=User, index=None, request={}, projected=set(), segments=2, max_workers=1)
+
+    with pytest.raises(RuntimeError):
+        list(iterator)
+    for _ in range(2):
+        with pytest.raises(RuntimeError) as excinfo:
+            next(iterator)
+        assert excinfo.value is error
+    assert iterator._prefetcher.stopped.is_set()
+
+
+@pytest.mark.parametrize("key", [None, {"id": {"S": "user"}, "age": {"N": "3"}}, {"data": {"B": b"\x00\xff"}}])
+@pytest.mark.parametrize("offset", [0, 4])
+def test_cursor_round_trip(key, offset):
+    cursor = dump_cursor("fingerprint", key, offset, False)
+    assert isinstance(cursor, str)
+    assert load_cursor(cursor, "fingerprint") == (key, offset, False)
+
+
+def test_cursor_exhausted():
+    cursor = dump_cursor("fingerprint", {"id": {"S": "user"}}, 3, True)
+    assert load_cursor(cursor, "fingerprint") == (None, 0, True)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", dump_cursor("other", None, 0, False)])
+def test_cursor_invalid(cursor):
+    with pytest.raises(InvalidSearch):
+        load_cursor(cursor, "fingerprint")
+
+
+def test_search_fingerprint():
+    """Everything except the continuation token is part of the fingerprint"""
+    request = {"TableName": "User", "Limit": 10}
+    fingerprint = search_fingerprint("query", request)
+    assert search_fingerprint("query", dict(request, ExclusiveStartKey={"id": {"S": "user"}})) == fingerprint
+    assert search_fingerprint("scan", request) != fingerprint
+    assert search_fingerprint("query", dict(request, Limit=20)) != fingerprint
+
+
+def test_search_fingerprint_ref_numbering():
+    """Ref numbers and set order can change between processes, but the fingerprint doesn't"""
+    request = {
+        "TableName": "User",
+        "ProjectionExpression": "#n0, #n1",
+        "KeyConditionExpression": "(#n2 = :v3)",
+        "FilterExpression": "(#n4 IN (:v5, :v6))",
+        "ExpressionAttributeNames": {"#n0": "id", "#n1": "email", "#n2": "id", "#n4": "tags"},
+        "ExpressionAttributeValues": {":v3": {"S": "user"}, ":v5": {"SS": ["a", "b"]}, ":v6": {"N": "1"}},
+    }
+    renumbered = {
+        "TableName": "User",
+        "ProjectionExpression": "#n1, #n0",
+        "KeyConditionExpression": "(#n0 = :v3)",
+        "FilterExpression": "(#n2 IN (:v4, :v5))",
+        "ExpressionAttributeNames": {"#n0": "id", "#n1": "email", "#n2": "tags"},
+        "ExpressionAttributeValues": {":v3": {"S": "user"}, ":v4": {"SS": ["b", "a"]}, ":v5": {"N": "1"}},
+    }
+    assert search_fingerprint("query", request) == search_fingerprint("query", renumbered)
+
+    # The values a ref stands for are still part of the fingerprint
+    swapped = dict(renumbered, ExpressionAttributeValues={
+        ":v3": {"S": "user"}, ":v4": {"N": "1"}, ":v5": {"SS": ["b", "a"]}})
+    assert search_fingerprint("query", request) != search_fingerprint("query", swapped)
+
+
+def keyed_search(chain):
+    """Like build_responses, but follows real continuation tokens.  Item values are their position."""
+    pages, n = {}, 0
+    for i, count in enumerate(chain):
+        last = i == len(chain) - 1
+        pages[str(i - 1)] = {
+            "Count": count,
+            "ScannedCount": count,
+            "Items": list(range(n, n + count)),
+            "LastEvaluatedKey": None if last else {"id": {"S": str(i)}}
+        }
+        n += count
+
+    def search_items(mode, request):
+        start = request.get("ExclusiveStartKey", None)
+        return pages[start["id"]["S"] if start else "-1"]
+    return search_items
+
+
+@pytest.mark.parametrize("steps", [0, 1, 2, 3, 4, 5])
+def test_cursor_resume(simple_iter, session, steps):
+    """A new iterator moved to a cursor returns exactly the remaining results"""
+    chain = [2, 0, 3]
+    session.search_items.side_effect = keyed_search(chain)
+    iterator = simple_iter()
+    consumed = [next(iterator) for _ in range(steps)]
+    cursor = iterator.cursor
+
+    resumed = simple_iter()
+    resumed.move_to(cursor)
+    assert consumed + list(resumed) == list(range(sum(chain)))
+
+    # reset returns to the cursor, not the first result
+    resumed.reset()
+    assert consumed + list(resumed) == list(range(sum(chain)))
+
+
+def test_cursor_exhausted_iterator(simple_iter, session):
+    session.search_items.side_effect = keyed_search([1])
+    iterator = simple_iter()
+    list(iterator)
+
+    resumed = simple_iter()
+    resumed.move_to(iterator.cursor)
+    assert resumed.exhausted
+    assert list(resumed) == []
+    assert session.search_items.call_count == 1
+
+
+def test_cursor_different_search(simple_iter):
+    cursor = simple_iter().cursor
+    other = simple_iter()
+    other.request["Limit"] = 5
+    with pytest.raises(InvalidSearch):
+        other.move_to(cursor)
+
+
+def test_reset_restarts_search(simple_iter, session):
+    """reset clears the continuation token so the next call starts from the first page"""
+    session.search_items.side_effect = keyed_search([1, 1])
+    iterator = simple_iter()
+    next(iterator)
+    assert iterator.request["ExclusiveStartKey"] == {"id": {"S": "0"}}
+    iterator.reset()
+    assert "ExclusiveStartKey" not in iterator.request
+
+
+def test_parallel_scan_cursor(engine):
+    iterator = ParallelScanIterator(
+        engine=engine, model=User, index=None, request={}, projected=set(), segments=2)
+    with pytest.raises(InvalidSearch):
+        iterator.cursor
+    with pytest.raises(InvalidSearch):
+        iterator.move_to("cursor")
+
+
+def test_pages(simple_iter, session):
+    """One page per response, including empty pages"""
+    session.search_items.side_effect = keyed_search([2, 0, 3])
+    iterator = simple_iter()
+
+    pages = list(iterator.pages())
+    assert pages == [
+        Page([0, 1], 2, 2, {"id": {"S": "0"}}),
+        Page([], 0, 0, {"id": {"S": "1"}}),
+        Page([2, 3, 4], 3, 3, None),
+    ]
+    assert iterator.exhausted
+    assert iterator.count == 5
+    assert list(iterator.pages()) == []
+
+
+def test_pages_after_next(simple_iter, session):
+    """The rest of a partially consumed page is yielded first"""
+    session.search_items.side_effect = keyed_search([3, 2])
+    iterator = simple_iter()
+    assert next(iterator) == 0
+
+    pages = iterator.pages()
+    assert next(pages) == Page([1, 2], 3, 3, {"id": {"S": "0"}})
+    assert next(pages) == Page([3, 4], 2, 2, None)
+    assert session.search_items.call_count == 2
+
+
+def test_pages_limit(simple_iter, session):
+    """pages stops at the limit, and the cursor points at the next result"""
+    session.search_items.side_effect = keyed_search([2, 3])
+    iterator = simple_iter(limit=3)
+
+    assert [page.items for page in iterator.pages()] == [[0, 1], [2]]
+    assert iterator.exhausted
+
+    resumed = simple_iter()
+    resumed.move_to(iterator.cursor)
+    assert list(resumed) == [3, 4]
+
+
+@pytest.mark.parametrize("cls", [ScanIterator, QueryIterator])
+def test_model_iterator_pages(simple_iter, session, cls):
+    iterator = simple_iter(cls=cls)
+    iterator.projected = {User.name}
+
+    items = [{"name": {"S": "first"}}, {"name": {"S": "second"}}]
+    session.search_items.return_value = response(terminate=True, items=items)
+
+    page, = iterator.pages()
+    assert [obj.name for obj in page.items] == ["first", "second"]
+    assert all(isinstance(obj, User) for obj in page.items)
+
+
+@pytest.mark.parametrize("cls", [ScanIterator, QueryIterator])
+def test_model_iterator_as_dict(simple_iter, session, cls):
+    """as_="dict" loads each projected column by model name, and doesn't send object_loaded"""
+    loaded = []
+
+    @object_loaded.connect
+    def on_loaded(_, obj, **kwargs):
+        loaded.append(obj)
+
+    iterator = simple_iter(cls=cls)
+    iterator.as_ = "dict"
+    iterator.projected = {User.name, User.age}
+
+    attrs = {"name": {"S": "numberoverzero"}, "age": {"N": "3"}, "email": {"S": "not projected"}}
+    session.search_items.return_value = response(terminate=True, count=1, item=attrs)
+
+    assert iterator.first() == {"name": "numberoverzero", "age": 3}
+    assert not loaded
+
+
 @pytest.mark.parametrize("cls", [ScanIterator, QueryIterator])
 def test_model_iterator_unpacks(simple_iter, session, cls):
     iterator = simple_iter(cls=cls)
@@ -1,3 +1,4 @@
+import time
 from unittest.mock import Mock
 
 import botocore.exceptions
@@ -15,6 +16,8 @@ from bloop.exceptions import (
 from bloop.models import BaseModel, Column
 from bloop.session import (
     BATCH_GET_ITEM_CHUNK_SIZE,
+    BATCH_WRITE_ITEM_CHUNK_SIZE,
+    RetryPolicy,
     SessionWrapper,
     create_table_request,
     expected_table_description,
@@ -46,8 +49,14 @@ def dynamodbstreams():
 
 
 @pytest.fixture
-def session(dynamodb, dynamodbstreams):
-    return SessionWrapper(dynamodb=dynamodb, dynamodbstreams=dynamodbstreams)
+def retry_policy():
+    # Don't wait between retries
+    return RetryPolicy(base_delay=0)
+
+
+@pytest.fixture
+def session(dynamodb, dynamodbstreams, retry_policy):
+    return SessionWrapper(dynamodb=dynamodb, dynamodbstreams=dynamodbstreams, retry_policy=retry_policy)
 
 
 def build_describe_stream_response(shards=missing, next_id=missing):
@@ -80,12 +89,56 @@ def client_error(code):
     return botocore.exceptions.ClientError(error_response, operation_name)
 
 
+# RETRY POLICY =========================================================================================== RETRY POLICY
+
+
+def test_retry_policy_delay():
+    """Without jitter, the delay doubles until it reaches max_delay"""
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+    assert [policy.delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+
+
+def test_retry_policy_jitter():
+    """With jitter, the delay is never more than the un-jittered delay"""
+    policy = RetryPolicy(base_delay=1, max_delay=5)
+    for attempt in range(1, 6):
+        assert 0 <= policy.delay(attempt) <= min(5, 2 ** (attempt - 1))
+
+
+def test_retry_policy_max_attempts(monkeypatch):
+    """backoff waits until the last attempt, then gives up without waiting"""
+    waits = []
+    monkeypatch.setattr("bloop.session.time.sleep", waits.append)
+    policy = RetryPolicy(max_attempts=3, base_delay=1, jitter=False)
+    started = time.monotonic()
+
+    assert policy.backoff(1, started)
+    assert policy.backoff(2, started)
+    assert not policy.backoff(3, started)
+    assert waits == [1, 2]
+
+
+def test_retry_policy_deadline(monkeypatch):
+    """backoff gives up when waiting would pass the deadline"""
+    waits = []
+    monkeypatch.setattr("bloop.session.time.sleep", waits.append)
+    policy = RetryPolicy(base_delay=1, jitter=False, deadline=10)
+
+    assert policy.backoff(1, time.monotonic())
+    assert not policy.backoff(1, time.monotonic() - 9.5)
+    assert waits == [1]
+
+
+# END RETRY POLICY =================================================================================== END RETRY POLICY
+
+
 # SAVE ITEM ================================================================================================= SAVE ITEM
 
 
 def test_save_item(session, dynamodb):
     request = {"foo": "bar"}
-    session.save_item(request)
+    dynamodb.update_item.return_value = {"Attributes": {}}
+    assert session.save_item(request) == {"Attributes": {}}
     dynamodb.update_item.assert_called_once_with(**request)
 
 
@@ -99,6 +152,18 @@ def test_save_item_unknown_error(session, dynamodb):
     dynamodb.update_item.assert_called_once_with(**request)
 
 
+def test_save_item_throttled(session, dynamodb):
+    """Throttled calls are retried until they succeed"""
+    request = {"foo": "bar"}
+    dynamodb.update_item.side_effect = [
+        client_error("ProvisionedThroughputExceededException"),
+        client_error("ThrottlingException"),
+        None
+    ]
+    session.save_item(request)
+    assert dynamodb.update_item.call_count == 3
+
+
 def test_save_item_condition_failed(session, dynamodb):
     request = {"foo": "bar"}
     dynamodb.update_item.side_effect = client_error("ConditionalCheckFailedException")
@@ -130,6 +195,17 @@ def test_delete_item_unknown_error(session, dynamodb):
     dynamodb.delete_item.assert_called_once_with(**request)
 
 
+def test_delete_item_throttled_gives_up(session, dynamodb, retry_policy):
+    """When the retry policy gives up, the last error is raised"""
+    request = {"foo": "bar"}
+    cause = dynamodb.delete_item.side_effect = client_error("ProvisionedThroughputExceededException")
+
+    with pytest.raises(BloopException) as excinfo:
+        session.delete_item(request)
+    assert excinfo.value.__cause__ is cause
+    assert dynamodb.delete_item.call_count == retry_policy.max_attempts
+
+
 def test_delete_item_condition_failed(session, dynamodb):
     request = {"foo": "bar"}
     dynamodb.delete_item.side_effect = client_error("ConditionalCheckFailedException")
@@ -316,9 +392,228 @@ def test_batch_get_unprocessed(session, dynamodb):
     assert response == expected_response
 
 
+@pytest.mark.parametrize("max_workers", [None, 1, 4])
+def test_batch_get_concurrent(session, dynamodb, max_workers):
+    """Chunks are loaded with or without a thread pool, and responses merged"""
+    users = [User(id=str(i)) for i in range(3 * BATCH_GET_ITEM_CHUNK_SIZE)]
+    keys = [{"id": {"S": user.id}} for user in users]
+    client_request = {"User": {"Keys": keys, "ConsistentRead": False}}
+
+    def handle(RequestItems):
+        return {
+            "Responses": {"User": [
+                {"id": key["id"], "age": {"N": "4"}}
+                for key in RequestItems["User"]["Keys"]]},
+            "UnprocessedKeys": {}
+        }
+    dynamodb.batch_get_item.side_effect = handle
+
+    response = session.load_items(client_request, max_workers=max_workers)
+
+    assert dynamodb.batch_get_item.call_count == 3
+    assert ordered(response) == ordered({"User": [
+        {"id": {"S": user.id}, "age": {"N": "4"}} for user in users]})
+
+
+def test_batch_get_reuses_executor(session, dynamodb):
+    """Concurrent loads share one thread pool until the session is closed, and a single chunk is loaded inline"""
+    dynamodb.batch_get_item.return_value = {"Responses": {}, "UnprocessedKeys": {}}
+    one_chunk = {"User": {"Keys": [{"id": {"S": "user_id"}}], "ConsistentRead": False}}
+    two_chunks = {"User": {"Keys": [{"id": {"S": str(i)}} for i in range(BATCH_GET_ITEM_CHUNK_SIZE + 1)],
+                           "ConsistentRead": False}}
+
+    session.load_items(one_chunk, max_workers=2)
+    assert session._executor is None
+
+    session.load_items(two_chunks, max_workers=3)
+    executor = session._executor
+    assert executor is not None
+    finalizer = session._executor_finalizer
+    assert finalizer.alive
+
+    # A smaller max_workers reuses the pool
+    session.load_items(two_chunks, max_workers=2)
+    assert session._executor is executor
+
+    # A larger max_workers grows it once; alternating doesn't rebuild it
+    session.load_items(two_chunks, max_workers=4)
+    grown = session._executor
+    assert grown is not executor
+    assert not finalizer.alive
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+    for max_workers in [2, 4, 3, 4]:
+        session.load_items(two_chunks, max_workers=max_workers)
+        assert session._executor is grown
+
+    finalizer = session._executor_finalizer
+    session.close()
+    assert session._executor is None
+    assert not finalizer.alive
+    with pytest.raises(RuntimeError):
+        grown.submit(print)
+
+    # Loading again starts a new pool
+    session.load_items(two_chunks, max_workers=2)
+    assert session._executor not in (None, executor)
+    session.close()
+
+
+def test_batch_get_concurrent_raises(session, dynamodb):
+    """Errors from a worker are raised from load_items"""
+    cause = dynamodb.batch_get_item.side_effect = client_error("FooError")
+    request = {"User": {"Keys": [{"id": {"S": str(i)}} for i in range(BATCH_GET_ITEM_CHUNK_SIZE + 1)],
+                        "ConsistentRead": False}}
+    with pytest.raises(BloopException) as excinfo:
+        session.load_items(request, max_workers=2)
+    assert excinfo.value.__cause__ is cause
+
+
+@pytest.mark.parametrize("max_workers", [0, -1, 2.5, "4", True])
+def test_batch_get_invalid_max_workers(session, dynamodb, max_workers):
+    """max_workers must be None or a positive int"""
+    request = {"User": {"Keys": [{"id": {"S": "user_id"}}], "ConsistentRead": False}}
+    with pytest.raises(ValueError):
+        session.load_items(request, max_workers=max_workers)
+    dynamodb.batch_get_item.assert_not_called()
+
+
+@pytest.mark.parametrize("collect", [True, False])
+def test_batch_get_unprocessed_gives_up(session, dynamodb, retry_policy, collect):
+    """Keys that are still unprocessed when the retry policy gives up are collected, or raise"""
+    request = {"User": {"Keys": [{"id": {"S": "first"}}, {"id": {"S": "second"}}], "ConsistentRead": False}}
+    dynamodb.batch_get_item.side_effect = [{
+        "Responses": {"User": [{"id": {"S": "first"}}]},
+        "UnprocessedKeys": {"User": {"Keys": [{"id": {"S": "second"}}], "ConsistentRead": False}}
+    }] + [{
+        "UnprocessedKeys": {"User": {"Keys": [{"id": {"S": "second"}}], "ConsistentRead": False}}
+    }] * (retry_policy.max_attempts - 1)
+
+    if collect:
+        unprocessed = {}
+        response = session.load_items(request, unprocessed=unprocessed)
+        assert response == {"User": [{"id": {"S": "first"}}]}
+        assert unprocessed == {"User": {"Keys": [{"id": {"S": "second"}}], "ConsistentRead": False}}
+    else:
+        with pytest.raises(BloopException):
+            session.load_items(request)
+    assert dynamodb.batch_get_item.call_count == retry_policy.max_attempts
+
+
+def test_batch_deadline_shared(monkeypatch, session, dynamodb):
+    """Throttled calls in a batch share the batch's deadline instead of starting their own"""
+    # The batch starts at 0, and every later reading of the clock is past the deadline
+    clock = iter([0])
+    monkeypatch.setattr("bloop.session.time.monotonic", lambda: next(clock, 100))
+    session.retry_policy = RetryPolicy(base_delay=0, deadline=10)
+    dynamodb.batch_get_item.side_effect = client_error("ProvisionedThroughputExceededException")
+    dynamodb.batch_write_item.side_effect = client_error("ProvisionedThroughputExceededException")
+
+    with pytest.raises(BloopException):
+        session.load_items({"User": {"Keys": [{"id": {"S": "user_id"}}], "ConsistentRead": False}})
+    assert dynamodb.batch_get_item.call_count == 1
+
+    clock = iter([0])
+    with pytest.raises(BloopException):
+        session.write_items({"User": [{"DeleteRequest": {"Key": {"id": {"S": "user_id"}}}}]})
+    assert dynamodb.batch_write_item.call_count == 1
+
+
+def test_batch_get_throttled(session, dynamodb):
+    """A throttled call is sent again"""
+    request = {"User": {"Keys": [{"id": {"S": "user_id"}}], "ConsistentRead": False}}
+    response = {"Responses": {"User": [{"id": {"S": "user_id"}}]}, "UnprocessedKeys": {}}
+    dynamodb.batch_get_item.side_effect = [client_error("ProvisionedThroughputExceededException"), response]
+
+    assert session.load_items(request) == {"User": [{"id": {"S": "user_id"}}]}
+    assert dynamodb.batch_get_item.call_count == 2
+
+
 # END LOAD ITEMS ======================================================================================= END LOAD ITEMS
 
 
+# WRITE ITEMS ============================================================================================= WRITE ITEMS
+
+
+def test_batch_write_raises(session, dynamodb):
+    cause = dynamodb.batch_write_item.side_effect = client_error("FooError")
+    request = {"User": [{"DeleteRequest": {"Key": {"id": {"S": "user_id"}}}}]}
+    with pytest.raises(BloopException) as excinfo:
+        session.write_items(request)
+    assert excinfo.value.__cause__ is cause
+
+
+def test_batch_write_one_batch(session, dynamodb):
+    """A single call when the number of items is <= batch size"""
+    users = [User(id=str(i)) for i in range(BATCH_WRITE_ITEM_CHUNK_SIZE)]
+    request = {"User": [{"PutRequest": {"Item": {"id": {"S": user.id}}}} for user in users]}
+    dynamodb.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    assert session.write_items(request) == {}
+    dynamodb.batch_write_item.assert_called_once_with(RequestItems=request)
+
+
+def test_batch_write_paginated(session, dynamodb):
+    """Paginate requests to fit within the max batch size, across tables"""
+    users = [User(id=str(i)) for i in range(BATCH_WRITE_ITEM_CHUNK_SIZE)]
+    user_requests = [{"PutRequest": {"Item": {"id": {"S": user.id}}}} for user in users]
+    simple_requests = [{"DeleteRequest": {"Key": {"id": {"S": "simple"}}}}]
+    request = {"User": user_requests, "Simple": simple_requests}
+
+    calls = []
+
+    def handle(RequestItems):
+        calls.append(RequestItems)
+        return {"UnprocessedItems": {}}
+    dynamodb.batch_write_item.side_effect = handle
+
+    session.write_items(request)
+
+    assert len(calls) == 2
+    assert [sum(len(table) for table in call.values()) for call in calls] in (
+        [BATCH_WRITE_ITEM_CHUNK_SIZE, 1], [1, BATCH_WRITE_ITEM_CHUNK_SIZE])
+    sent = {}
+    for call in calls:
+        for table_name, table_requests in call.items():
+            sent.setdefault(table_name, []).extend(table_requests)
+    assert ordered(sent) == ordered(request)
+
+
+def test_batch_write_unprocessed(session, dynamodb):
+    """Re-send unprocessed items"""
+    request = {"User": [
+        {"PutRequest": {"Item": {"id": {"S": "first"}}}},
+        {"PutRequest": {"Item": {"id": {"S": "second"}}}}
+    ]}
+    unprocessed = {"User": [{"PutRequest": {"Item": {"id": {"S": "second"}}}}]}
+    responses = [{"UnprocessedItems": unprocessed}, {"UnprocessedItems": {}}]
+    expected_requests = [request, unprocessed]
+    calls = 0
+
+    def handle(RequestItems):
+        nonlocal calls
+        assert RequestItems == expected_requests[calls]
+        response = responses[calls]
+        calls += 1
+        return response
+    dynamodb.batch_write_item = handle
+
+    assert session.write_items(request) == {}
+    assert calls == 2
+
+
+def test_batch_write_unprocessed_gives_up(session, dynamodb, retry_policy):
+    """Items that are still unprocessed when the retry policy gives up are returned"""
+    request = {"User": [{"DeleteRequest": {"Key": {"id": {"S": "user_id"}}}}]}
+    dynamodb.batch_write_item.return_value = {"UnprocessedItems": request}
+
+    assert session.write_items(request) == request
+    assert dynamodb.batch_write_item.call_count == retry_policy.max_attempts
+
+
+# END WRITE ITEMS ===================================================================================== END WRITE ITEMS
+
+
 # QUERY SCAN SEARCH ================================================================================= QUERY SCAN SEARCH
 
 
@@ -349,6 +644,16 @@ def test_query_scan_raise(session, dynamodb):
     assert excinfo.value.__cause__ is cause
 
 
+@pytest.mark.parametrize("mode", ["query", "scan"])
+def test_query_scan_throttled(session, dynamodb, mode):
+    """Throttled queries and scans are sent again"""
+    method = getattr(dynamodb, mode)
+    method.side_effect = [client_error("ProvisionedThroughputExceededException"), {"Count": 1}]
+    response = session.search_items(mode, {"foo": "bar"})
+    assert response == {"Count": 1, "ScannedCount": 1}
+    assert method.call_count == 2
+
+
 def test_search_unknown(session):
     with pytest.raises(InvalidSearchMode) as excinfo:
         session.search_items(mode="foo", request={})
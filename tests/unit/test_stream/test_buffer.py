@@ -90,14 +90,13 @@ def test_single_record():
 
 
 def test_sort_every_push():
-    """Push high to low, retrieve low to high"""
+    """Push high to low from different shards, retrieve low to high"""
     now_ = now()
     records = [local_record(now_, str(i)) for i in reversed(range(15))]
-    shard = new_shard()
     buffer = RecordBuffer()
 
     for record in records:
-        buffer.push(record, shard)
+        buffer.push(record, new_shard())
         # inserting high to low, every record should be at the front
         assert buffer.peek()[0] is record
 
@@ -113,10 +112,9 @@ def test_push_all():
     """Bulk push is slightly more efficient"""
     now_ = now()
     records = [local_record(now_, str(i)) for i in reversed(range(100))]
-    shard = new_shard()
     buffer = RecordBuffer()
 
-    pairs = [(record, shard) for record in records]
+    pairs = [(record, new_shard()) for record in records]
     buffer.push_all(pairs)
 
     same_records = [
@@ -127,6 +125,28 @@ def test_push_all():
     assert records == same_records
 
 
+def test_shard_fifo():
+    """Records from the same shard are returned in the order they were pushed, merged with other shards"""
+    now_ = now()
+    first, second = new_shard(), new_shard()
+    buffer = RecordBuffer()
+
+    # The shard's order wins over created_at and sequence_number
+    first_records = [local_record(now_, "30"), local_record(now_, "10"), local_record(now_, "50")]
+    second_records = [local_record(now_, "20"), local_record(now_, "40")]
+    buffer.push_all((record, first) for record in first_records)
+    buffer.push_all((record, second) for record in second_records)
+
+    # Only the oldest record from each shard is in the heap
+    assert len(buffer) == 5
+    assert len(buffer.heap) == 2
+
+    pairs = [buffer.pop() for _ in range(len(buffer))]
+    assert [record["meta"]["sequence_number"] for record, _ in pairs] == ["20", "30", "10", "40", "50"]
+    assert [shard for _, shard in pairs] == [second, first, first, second, first]
+    assert not buffer.heap
+
+
 def test_clear():
     record = local_record(now(), "1")
     shard = new_shard()
@@ -149,3 +169,43 @@ def test_buffer_heap():
 
     # [(sort, record, shard)]
     assert buffer.heap[0][2] is shard
+
+
+def test_drop_shard():
+    """Dropping a shard's records leaves the remaining records in order"""
+    now_ = now()
+    keep, drop = new_shard(), new_shard()
+    buffer = RecordBuffer()
+
+    records = [local_record(now_, str(i)) for i in range(20)]
+    buffer.push_all((record, keep if i % 4 else drop) for i, record in enumerate(records))
+    assert len(buffer) == 20
+
+    buffer.drop_shard(drop)
+    assert len(buffer) == 15
+    # The front of the heap is always a live record
+    assert buffer.heap[0][2] is keep
+
+    same_records = [buffer.pop()[0] for _ in range(len(buffer))]
+    assert same_records == [record for i, record in enumerate(records) if i % 4]
+    assert not buffer
+
+
+def test_drop_shard_heap():
+    """Dropping a shard removes its entry from the heap, along with the rest of its records"""
+    now_ = now()
+    keep, drop = new_shard(), new_shard()
+    buffer = RecordBuffer()
+
+    buffer.push(local_record(now_, "0"), drop)
+    buffer.push_all((local_record(now_, str(i)), drop) for i in range(1, 10))
+    buffer.push(local_record(now_, "10"), keep)
+
+    buffer.drop_shard(drop)
+    assert len(buffer) == len(buffer.heap) == 1
+    assert buffer.peek()[1] is keep
+
+    # Unknown or already dropped shards are ignored
+    buffer.drop_shard(drop)
+    buffer.drop_shard(new_shard())
+    assert len(buffer) == 1
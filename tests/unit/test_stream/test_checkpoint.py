@@ -0,0 +1,223 @@
+from unittest.mock import Mock
+
+import pytest
+from bloop.stream.checkpoint import (
+    Checkpoint,
+    CheckpointStore,
+    FileCheckpointStore,
+    SQLiteCheckpointStore,
+    build_token,
+)
+from bloop.stream.coordinator import Coordinator
+from bloop.stream.shard import last_iterator
+from bloop.util import ordered
+
+from . import build_shards
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmpdir):
+    if request.param == "file":
+        store = FileCheckpointStore(str(tmpdir.join("checkpoint.json")))
+    else:
+        store = SQLiteCheckpointStore(str(tmpdir.join("checkpoint.db")))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def coordinator(session, stream_arn):
+    # root -> [active, other]
+    coordinator = Coordinator(session=session, stream_arn=stream_arn)
+    shards = build_shards(3, {0: [1, 2]}, session=session, stream_arn=stream_arn)
+    for shard in shards:
+        shard.iterator_type = "trim_horizon"
+    coordinator.roots.append(shards[0])
+    coordinator.active.extend(shards[1:])
+    return coordinator
+
+
+def stored_token(shard):
+    token = shard.token
+    token.pop("stream_arn")
+    return token
+
+
+def test_build_token():
+    """Parents that aren't stored are dropped, along with active shards that aren't stored"""
+    shard_tokens = {
+        "child": {"shard_id": "child", "parent": "removed", "iterator_type": "latest"},
+        "grandchild": {"shard_id": "grandchild", "parent": "child"}}
+    token = build_token("stream-arn", ["grandchild", "removed"], shard_tokens)
+    assert ordered(token) == ordered({
+        "stream_arn": "stream-arn",
+        "active": ["grandchild"],
+        "shards": [
+            {"shard_id": "child", "iterator_type": "latest"},
+            {"shard_id": "grandchild", "parent": "child"}]})
+    # Stored tokens aren't modified
+    assert shard_tokens["child"]["parent"] == "removed"
+
+
+def test_base_store():
+    store = CheckpointStore()
+    with pytest.raises(NotImplementedError):
+        store.load("stream-arn")
+    with pytest.raises(NotImplementedError):
+        store.save("stream-arn", [], {}, [])
+    store.close()
+
+
+def test_store_round_trip(store):
+    """Saves merge updated shards and drop removed shards, independently for each stream"""
+    assert store.load("stream-arn") is None
+
+    store.save("stream-arn", ["b"], {
+        "a": {"shard_id": "a", "iterator_type": "trim_horizon"},
+        "b": {"shard_id": "b", "parent": "a"}}, [])
+    store.save("other-arn", ["c"], {"c": {"shard_id": "c"}}, [])
+    store.save("stream-arn", ["b"], {"b": {"shard_id": "b", "parent": "a", "sequence_number": "3"}}, ["a"])
+
+    assert ordered(store.load("stream-arn")) == ordered({
+        "stream_arn": "stream-arn",
+        "active": ["b"],
+        "shards": [{"shard_id": "b", "sequence_number": "3"}]})
+
+    # Saves are durable
+    same_store = store.__class__(store.path)
+    assert ordered(same_store.load("other-arn")) == ordered({
+        "stream_arn": "other-arn",
+        "active": ["c"],
+        "shards": [{"shard_id": "c"}]})
+    same_store.close()
+
+
+def test_store_repr(tmpdir):
+    path = str(tmpdir.join("checkpoint.json"))
+    assert repr(FileCheckpointStore(path)) == "<FileCheckpointStore[{!r}]>".format(path)
+    assert repr(SQLiteCheckpointStore(":memory:")) == "<SQLiteCheckpointStore[':memory:']>"
+
+
+def test_flush_changed_shards(coordinator):
+    """Each flush only saves shards whose position changed"""
+    store = Mock(spec=CheckpointStore)
+    checkpoint = Checkpoint(store)
+    root, active, other = coordinator.roots[0], coordinator.active[0], coordinator.active[1]
+
+    checkpoint.flush(coordinator)
+    store.save.assert_called_once_with(
+        "stream-arn", ["shard-id-1", "shard-id-2"],
+        {shard.shard_id: stored_token(shard) for shard in [root, active, other]}, [])
+
+    # Nothing changed
+    store.save.reset_mock()
+    checkpoint.flush(coordinator)
+    store.save.assert_not_called()
+
+    coordinator.buffer.push({"meta": {"created_at": 0, "sequence_number": "12"}}, active)
+    next(coordinator)
+    checkpoint.flush(coordinator)
+    store.save.assert_called_once_with(
+        "stream-arn", ["shard-id-1", "shard-id-2"],
+        {"shard-id-1": {"shard_id": "shard-id-1", "parent": "shard-id-0",
+                        "iterator_type": "after_sequence", "sequence_number": "12"}}, [])
+
+
+def test_flush_removed_shards(coordinator):
+    """Removed shards are forgotten, and their children stop referencing them"""
+    store = Mock(spec=CheckpointStore)
+    checkpoint = Checkpoint(store)
+    checkpoint.flush(coordinator)
+    store.save.reset_mock()
+
+    root = coordinator.roots[0]
+    coordinator.remove_shard(root)
+    checkpoint.flush(coordinator)
+
+    store.save.assert_called_once_with(
+        "stream-arn", ["shard-id-1", "shard-id-2"], {
+            "shard-id-1": {"shard_id": "shard-id-1", "iterator_type": "trim_horizon"},
+            "shard-id-2": {"shard_id": "shard-id-2", "iterator_type": "trim_horizon"}},
+        ["shard-id-0"])
+
+
+def test_flush_failed_save(coordinator):
+    """When the store fails to save, the next flush saves the same changes again"""
+    store = Mock(spec=CheckpointStore)
+    checkpoint = Checkpoint(store)
+    checkpoint.flush(coordinator)
+    store.save.reset_mock()
+
+    active = coordinator.active[0]
+    coordinator.buffer.push({"meta": {"created_at": 0, "sequence_number": "12"}}, active)
+    next(coordinator)
+    coordinator.remove_shard(coordinator.roots[0])
+    store.save.side_effect = [OSError("disk full"), None]
+    with pytest.raises(OSError):
+        checkpoint.flush(coordinator)
+    checkpoint.flush(coordinator)
+
+    expected = ("stream-arn", ["shard-id-1", "shard-id-2"], {
+        "shard-id-1": {"shard_id": "shard-id-1", "iterator_type": "after_sequence", "sequence_number": "12"},
+        "shard-id-2": {"shard_id": "shard-id-2", "iterator_type": "trim_horizon"}},
+        ["shard-id-0"])
+    assert store.save.call_args_list == [(expected,), (expected,)]
+
+    # Saved now, so there's nothing left to flush
+    store.save.reset_mock()
+    checkpoint.flush(coordinator)
+    store.save.assert_not_called()
+
+
+def test_load_seeds_flushed(coordinator, store):
+    """After loading from a store, unchanged shards aren't saved again"""
+    Checkpoint(store).flush(coordinator)
+
+    checkpoint = Checkpoint(store)
+    token = checkpoint.load("stream-arn")
+    assert ordered(token) == ordered(coordinator.token)
+
+    # As if the coordinator moved to the loaded token
+    coordinator.changed = None
+    store.save = Mock()
+    checkpoint.flush(coordinator)
+    store.save.assert_not_called()
+
+
+def test_flush_tracked_shards(coordinator):
+    """After the first flush, only shards the coordinator marked changed are checked"""
+    store = Mock(spec=CheckpointStore)
+    checkpoint = Checkpoint(store)
+    checkpoint.flush(coordinator)
+    store.save.reset_mock()
+
+    root, active = coordinator.roots[0], coordinator.active[0]
+    root.walk_tree = Mock(wraps=root.walk_tree)
+    active.load_children = Mock()
+    active.iterator_id = last_iterator
+    coordinator._handle_exhausted()
+    checkpoint.flush(coordinator)
+
+    root.walk_tree.assert_not_called()
+    assert coordinator.changed == {}
+    store.save.assert_called_once_with("stream-arn", ["shard-id-2"], {}, [])
+
+    # Moving the stream checks every shard again
+    coordinator.changed = None
+    checkpoint.flush(coordinator)
+    root.walk_tree.assert_called_once_with()
+
+
+@pytest.mark.parametrize("records, seconds, returned, expected", [
+    (3, 1000, 2, False),
+    (3, 1000, 3, True),
+    (1000, 0, 0, True),
+])
+def test_maybe_flush(coordinator, records, seconds, returned, expected):
+    """Flushes after enough records, or enough time"""
+    checkpoint = Checkpoint(Mock(spec=CheckpointStore), records=records, seconds=seconds)
+    checkpoint.flush = Mock()
+    for _ in range(returned):
+        checkpoint.returned()
+    checkpoint.maybe_flush(coordinator)
+    assert checkpoint.flush.called is expected
@@ -1,6 +1,7 @@
 import collections
 import datetime
 import functools
+import threading
 from unittest.mock import call
 
 import pytest
@@ -119,6 +120,87 @@ def test_advance_pulls_from_all_active_shards(coordinator, session):
     assert [has_records, no_records] == coordinator.active
 
 
+def test_advance_polls_concurrently(coordinator, session):
+    """With max_workers, every active shard is polled at the same time and records are merged into the buffer"""
+    coordinator.max_workers = 3
+    shards = build_shards(3, session=session, stream_arn=coordinator.stream_arn)
+    for i, shard in enumerate(shards):
+        shard.iterator_id = "iterator-{}".format(i)
+    coordinator.active = list(shards)
+
+    # Each call blocks until all three shards are being polled at once
+    barrier = threading.Barrier(3, timeout=5)
+
+    def mock_get_stream_records(iterator_id):
+        barrier.wait()
+        return {
+            "Records": [dynamodb_record_with(key=True, sequence_number=int(iterator_id[-1]))],
+            "NextShardIterator": "next-" + iterator_id}
+    session.get_stream_records.side_effect = mock_get_stream_records
+
+    coordinator.advance_shards()
+
+    assert session.get_stream_records.call_count == 3
+    assert [shard.iterator_id for shard in shards] == ["next-iterator-0", "next-iterator-1", "next-iterator-2"]
+    assert [coordinator.buffer.pop()[1] for _ in range(3)] == shards
+    assert not coordinator.buffer
+
+
+def test_poll_reuses_executor(coordinator, session):
+    """Concurrent polls share one thread pool until the coordinator is closed"""
+    coordinator.max_workers = 2
+    coordinator.active = build_shards(2, session=session, stream_arn=coordinator.stream_arn)
+    session.get_stream_records.return_value = {"Records": [], "NextShardIterator": "iterator-id"}
+
+    coordinator.advance_shards()
+    executor = coordinator._executor
+    assert executor is not None
+    coordinator.advance_shards()
+    assert coordinator._executor is executor
+
+    coordinator.close()
+    assert coordinator._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+    # Polling again starts a new pool
+    coordinator.advance_shards()
+    assert coordinator._executor not in (None, executor)
+    coordinator.close()
+
+
+@pytest.mark.parametrize("max_workers", [None, 3])
+def test_advance_concurrent_error(coordinator, session, max_workers):
+    """An error from one shard is raised after the records from shards that were polled are buffered"""
+    coordinator.max_workers = max_workers
+    [succeeds, fails, other] = build_shards(3, session=session, stream_arn=coordinator.stream_arn)
+    succeeds.iterator_id = "succeeds"
+    fails.iterator_id = "fails"
+    other.iterator_id = "other"
+    coordinator.active = [succeeds, fails, other]
+
+    def mock_get_stream_records(iterator_id):
+        if iterator_id == "fails":
+            raise RecordsExpired
+        return {
+            "Records": [dynamodb_record_with(key=True, sequence_number=len(iterator_id))],
+            "NextShardIterator": "next-" + iterator_id}
+    session.get_stream_records.side_effect = mock_get_stream_records
+
+    with pytest.raises(RecordsExpired):
+        coordinator.advance_shards()
+    assert succeeds.iterator_id == "next-succeeds"
+    if max_workers:
+        # Every shard is polled
+        assert other.iterator_id == "next-other"
+        assert {id(coordinator.buffer.pop()[1]) for _ in range(2)} == {id(succeeds), id(other)}
+    else:
+        # Polling stops at the error, so the next shard keeps its iterator
+        assert other.iterator_id == "other"
+        assert coordinator.buffer.pop()[1] is succeeds
+    assert not coordinator.buffer
+
+
 @pytest.mark.parametrize("has_children, loads_children", [(True, False), (False, False), (False, True)])
 def test_advance_removes_exhausted(has_children, loads_children, coordinator, shard, session):
     """Exhausted shards are removed; any children are promoted, and reset to trim_horizon"""
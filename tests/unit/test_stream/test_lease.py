@@ -0,0 +1,267 @@
+import pytest
+from bloop.exceptions import InvalidPosition, RecordsExpired
+from bloop.stream.lease import (
+    ConsumerGroup,
+    Lease,
+    LeasedCoordinator,
+    LeaseStore,
+    MemoryLeaseStore,
+    SQLiteLeaseStore,
+    lease_available,
+)
+from bloop.stream.shard import last_iterator
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmpdir):
+    if request.param == "memory":
+        store = MemoryLeaseStore()
+    else:
+        store = SQLiteLeaseStore(str(tmpdir.join("leases.db")))
+    yield store
+    store.close()
+
+
+def describe(*shards):
+    """describe("a", ("b", "a")) -> shard "a", and shard "b" whose parent is "a" """
+    description = []
+    for shard in shards:
+        shard_id, parent = shard if isinstance(shard, tuple) else (shard, None)
+        description.append({"ShardId": shard_id})
+        if parent:
+            description[-1]["ParentShardId"] = parent
+    return {"Shards": description}
+
+
+def worker(session, store, owner):
+    return LeasedCoordinator(session=session, stream_arn="stream-arn", group=ConsumerGroup(store, owner=owner))
+
+
+def held(coordinator):
+    return sorted(shard.shard_id for shard in coordinator.active)
+
+
+@pytest.mark.parametrize("lease, expected", [
+    (Lease("shard-id", None, 0, None, False), True),
+    (Lease("shard-id", "owner", 100, None, False), True),
+    (Lease("shard-id", "other", 100, None, False), False),
+    (Lease("shard-id", "other", 10, None, False), True),
+    (Lease("shard-id", None, 0, None, True), False),
+])
+def test_lease_available(lease, expected):
+    assert lease_available(lease, "owner", now=50) is expected
+
+
+def test_base_store():
+    store = LeaseStore()
+    calls = [
+        lambda: store.leases("stream-arn"),
+        lambda: store.acquire("stream-arn", "shard-id", "owner", now=0, expires=1),
+        lambda: store.renew("stream-arn", "shard-id", "owner", expires=1, token=None),
+        lambda: store.release("stream-arn", "shard-id", "owner"),
+        lambda: store.finish("stream-arn", "shard-id"),
+        lambda: store.register("stream-arn", "owner", expires=1),
+        lambda: store.owners("stream-arn", now=0),
+    ]
+    for call in calls:
+        with pytest.raises(NotImplementedError):
+            call()
+    store.close()
+
+
+def test_store_leases(store):
+    """Only one owner holds a lease until it's released or expires"""
+    assert store.leases("stream-arn") == {}
+    lease = store.acquire("stream-arn", "shard-id", "first", now=0, expires=10)
+    assert lease == Lease("shard-id", "first", 10, None, False)
+    assert store.acquire("stream-arn", "shard-id", "second", now=5, expires=15) is None
+
+    # Renewing saves the position
+    token = {"iterator_type": "after_sequence", "sequence_number": "3"}
+    assert store.renew("stream-arn", "shard-id", "first", expires=20, token=token)
+    assert not store.renew("stream-arn", "shard-id", "second", expires=20, token=None)
+
+    # Expired; the next owner continues from the saved position
+    lease = store.acquire("stream-arn", "shard-id", "second", now=20, expires=30)
+    assert lease == Lease("shard-id", "second", 30, token, False)
+    assert not store.renew("stream-arn", "shard-id", "first", expires=40, token=None)
+
+    # Releasing without a position keeps the last one
+    store.release("stream-arn", "shard-id", "first")
+    store.release("stream-arn", "shard-id", "second")
+    assert store.leases("stream-arn") == {"shard-id": Lease("shard-id", None, 0, token, False)}
+
+    store.acquire("stream-arn", "shard-id", "first", now=20, expires=30)
+    store.release("stream-arn", "shard-id", "first", finished=True)
+    assert store.acquire("stream-arn", "shard-id", "second", now=20, expires=30) is None
+    assert store.leases("stream-arn")["shard-id"].finished
+    assert store.leases("other-arn") == {}
+
+
+def test_store_finish(store):
+    """Finishing a shard that was never leased skips it; leased shards aren't changed"""
+    store.acquire("stream-arn", "leased", "owner", now=0, expires=10)
+    store.finish("stream-arn", "leased")
+    store.finish("stream-arn", "skipped")
+
+    leases = store.leases("stream-arn")
+    assert not leases["leased"].finished
+    assert leases["skipped"].finished
+    assert store.acquire("stream-arn", "skipped", "owner", now=0, expires=10) is None
+
+
+def test_store_owners(store):
+    store.register("stream-arn", "first", expires=10)
+    store.register("stream-arn", "second", expires=20)
+    store.register("other-arn", "third", expires=20)
+    assert store.owners("stream-arn", now=15) == {"second"}
+
+    store.register("stream-arn", "second", expires=0)
+    assert store.owners("stream-arn", now=15) == set()
+
+
+def test_consumer_group_owner(store):
+    assert ConsumerGroup(store, owner="owner").owner == "owner"
+    assert ConsumerGroup(store).owner != ConsumerGroup(store).owner
+    assert repr(ConsumerGroup(store, owner="owner")) == "<ConsumerGroup[owner]>"
+
+
+@pytest.mark.parametrize("position", ["at_sequence", None, {"stream_arn": "stream-arn"}])
+def test_move_to_invalid(session, store, position):
+    with pytest.raises(InvalidPosition):
+        worker(session, store, "owner").move_to(position)
+
+
+def test_rebalance_between_workers(session, store):
+    """Workers split the shards evenly, and take over the shards of a worker that leaves"""
+    session.describe_stream.return_value = describe("a", "b", "c", "d")
+    session.get_stream_records.return_value = {"Records": [], "NextShardIterator": "iterator-id"}
+    first, second = worker(session, store, "first"), worker(session, store, "second")
+
+    first.move_to("trim_horizon")
+    assert held(first) == ["a", "b", "c", "d"]
+    session.get_shard_iterator.assert_any_call(
+        stream_arn="stream-arn", shard_id="a", iterator_type="trim_horizon", sequence_number=None)
+
+    # The second worker registers, but every lease is held
+    second.move_to("trim_horizon")
+    assert held(second) == []
+
+    first.heartbeat()
+    second.heartbeat()
+    assert held(first) == ["a", "b"]
+    assert held(second) == ["c", "d"]
+
+    # Positions are saved when leases are renewed or released
+    shard = first.active[0]
+    shard.iterator_type, shard.sequence_number = "after_sequence", "12"
+    first.release()
+    session.get_shard_iterator.reset_mock()
+    second.heartbeat()
+    assert held(second) == ["a", "b", "c", "d"]
+    session.get_shard_iterator.assert_any_call(
+        stream_arn="stream-arn", shard_id="a", iterator_type="after_sequence", sequence_number="12")
+
+
+def test_failover_record_in_flight(session, store):
+    """A record isn't saved as processed until the next one is requested, so a new owner returns it again"""
+    session.describe_stream.return_value = describe("a")
+    first, second = worker(session, store, "first"), worker(session, store, "second")
+    first.group.lease_seconds = -1
+    first.move_to("trim_horizon")
+    shard = first.active[0]
+    shard.iterator_type, shard.sequence_number = "after_sequence", "1"
+    for sequence_number in ["2", "3"]:
+        first.buffer.push({"meta": {"created_at": 0, "sequence_number": sequence_number}}, shard)
+
+    # "2" is returned but not processed yet
+    assert next(first)["meta"]["sequence_number"] == "2"
+    first.rebalance()
+    assert store.leases("stream-arn")["a"].token == {"iterator_type": "after_sequence", "sequence_number": "1"}
+
+    # Requesting "3" means "2" was processed.  The worker crashes while "3" is in flight
+    assert next(first)["meta"]["sequence_number"] == "3"
+    first.rebalance()
+    assert store.leases("stream-arn")["a"].token == {"iterator_type": "after_sequence", "sequence_number": "2"}
+
+    session.get_shard_iterator.reset_mock()
+    second.move_to("trim_horizon")
+    assert held(second) == ["a"]
+    session.get_shard_iterator.assert_called_once_with(
+        stream_arn="stream-arn", shard_id="a", iterator_type="after_sequence", sequence_number="2")
+
+
+def test_lost_lease(session, store):
+    """A worker that misses its heartbeat loses its leases and their buffered records"""
+    session.describe_stream.return_value = describe("a")
+    first, second = worker(session, store, "first"), worker(session, store, "second")
+    first.group.lease_seconds = -1
+    first.move_to("trim_horizon")
+    first.buffer.push({"meta": {"created_at": 0, "sequence_number": "1"}}, first.active[0])
+
+    second.move_to("trim_horizon")
+    assert held(second) == ["a"]
+
+    first.rebalance()
+    assert held(first) == []
+    assert not first.buffer
+
+
+def test_children_follow_parent(session, store):
+    """Children can't be leased until their parent is finished, and go to the parent's owner first"""
+    session.describe_stream.return_value = describe("parent", ("child", "parent"))
+    first, second = worker(session, store, "first"), worker(session, store, "second")
+    first.move_to("trim_horizon")
+    second.move_to("trim_horizon")
+    first.rebalance()
+    assert held(first) == ["parent"]
+    assert held(second) == []
+
+    first.active[0].iterator_id = last_iterator
+    first._handle_exhausted()
+    assert held(first) == ["child"]
+    assert store.leases("stream-arn")["parent"].finished
+
+    # The other worker forgets the finished parent
+    second.rebalance()
+    assert [root.shard_id for root in second.roots] == ["child"]
+    assert held(second) == []
+
+
+def test_move_to_latest(session, store):
+    """Closed shards are skipped, and open shards without a saved position start at latest"""
+    session.describe_stream.return_value = describe("parent", ("child", "parent"))
+    coordinator = worker(session, store, "owner")
+    coordinator.move_to("latest")
+
+    assert held(coordinator) == ["child"]
+    assert store.leases("stream-arn")["parent"].finished
+    session.get_shard_iterator.assert_called_once_with(
+        stream_arn="stream-arn", shard_id="child", iterator_type="latest", sequence_number=None)
+
+
+def test_join_running_group_at_latest(session, store):
+    """A worker joining a running group at latest doesn't skip shards the group hasn't read yet"""
+    session.describe_stream.return_value = describe("x", ("y", "x"), ("z", "y"))
+    first, joining = worker(session, store, "first"), worker(session, store, "joining")
+    first.move_to("trim_horizon")
+    assert held(first) == ["x"]
+
+    joining.move_to("latest")
+    assert held(joining) == []
+    leases = store.leases("stream-arn")
+    assert set(leases) == {"x"}
+    assert not leases["x"].finished
+
+
+def test_acquire_expired_position(session, store):
+    """When a saved position is beyond the trim_horizon, the shard starts at trim_horizon"""
+    store.acquire("stream-arn", "a", "other", now=0, expires=1)
+    store.release("stream-arn", "a", "other", token={"iterator_type": "after_sequence", "sequence_number": "3"})
+    session.describe_stream.return_value = describe("a")
+    session.get_shard_iterator.side_effect = [RecordsExpired, "iterator-id"]
+
+    coordinator = worker(session, store, "owner")
+    coordinator.move_to("trim_horizon")
+    assert held(coordinator) == ["a"]
+    assert coordinator.active[0].iterator_type == "trim_horizon"
@@ -1,9 +1,13 @@
 import datetime
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, Mock, call
 
 import pytest
+from bloop.exceptions import InvalidStream
 from bloop.models import BaseModel, Column
+from bloop.signals import object_loaded
+from bloop.stream.checkpoint import Checkpoint
 from bloop.stream.coordinator import Coordinator
+from bloop.stream.lease import ConsumerGroup, LeasedCoordinator, MemoryLeaseStore
 from bloop.stream.stream import Stream
 from bloop.types import Integer, String
 from bloop.util import ordered
@@ -76,6 +80,61 @@ def test_move_to(stream, coordinator):
     coordinator.move_to.assert_called_once_with("latest")
 
 
+def test_next_checkpoint(stream, coordinator):
+    """Records are counted once returned, and the checkpoint can flush before the next record"""
+    checkpoint = stream.checkpoint = Mock(spec=Checkpoint)
+    coordinator.__next__.side_effect = [{"new": None, "old": None, "meta": {}}, None]
+
+    next(stream)
+    next(stream)
+    assert checkpoint.mock_calls == [
+        call.maybe_flush(coordinator), call.returned(),
+        call.maybe_flush(coordinator)]
+
+
+def test_flush(stream, coordinator):
+    with pytest.raises(InvalidStream):
+        stream.flush()
+
+    checkpoint = stream.checkpoint = Mock(spec=Checkpoint)
+    stream.flush()
+    checkpoint.flush.assert_called_once_with(coordinator)
+
+
+def test_group(engine):
+    engine.bind(Email)
+    group = ConsumerGroup(MemoryLeaseStore(), owner="owner")
+    stream = Stream(model=Email, engine=engine, group=group)
+    assert isinstance(stream.coordinator, LeasedCoordinator)
+    assert stream.coordinator.group is group
+
+
+def test_close(stream, coordinator):
+    """Without a checkpoint or group there's nothing to save or release, only polling threads to stop"""
+    stream.close()
+    assert coordinator.mock_calls == [call.close()]
+
+    checkpoint = stream.checkpoint = Mock(spec=Checkpoint)
+    stream.close()
+    checkpoint.flush.assert_called_once_with(coordinator)
+
+
+def test_close_group(stream):
+    coordinator = stream.coordinator = MagicMock(spec=LeasedCoordinator)
+    stream.close()
+    coordinator.release.assert_called_once_with()
+    coordinator.close.assert_called_once_with()
+
+
+def test_close_flush_fails(stream, coordinator):
+    """Polling threads are stopped even if the last flush fails"""
+    checkpoint = stream.checkpoint = Mock(spec=Checkpoint)
+    checkpoint.flush.side_effect = OSError
+    with pytest.raises(OSError):
+        stream.close()
+    coordinator.close.assert_called_once_with()
+
+
 def test_next_no_record(stream, coordinator):
     coordinator.__next__.return_value = None
     # Explicit marker so we don't get next's default value
@@ -120,3 +179,29 @@ def test_next_unpacks(stream, coordinator):
 
     assert record["key"] is None
     assert not hasattr(record["key"], "data")
+
+
+def test_next_unpacks_dict(stream, coordinator):
+    """With as_="dict" records hold plain dicts, and object_loaded isn't sent"""
+    loaded = []
+
+    @object_loaded.connect
+    def on_loaded(_, obj, **kwargs):
+        loaded.append(obj)
+
+    stream.as_ = "dict"
+    coordinator.__next__.return_value = {
+        "old": None,
+        "key": None,
+        "new": {
+            "id": {"N": "0"},
+            "data": {"S": "some-data"}
+        },
+        "meta": {}
+    }
+
+    record = next(stream)
+
+    assert record["new"] == {"id": 0, "data": "some-data"}
+    assert record["old"] is None
+    assert not loaded